@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Chequeo de planes de las queries de monitor_db.py
+Corre EXPLAIN (FORMAT JSON) sobre cada query del reporte y falla si aparece un
+Seq Scan sobre `findings` (o las tablas indicadas con --forbid).
+
+Uso: python scripts/check_query_plans.py [--forbid TABLA] [--no-seqscan] [--verbose]
+Requiere: pip install psycopg2-binary y las migraciones aplicadas (incluida monitor_query_indexes)
+El planner elige según las estadísticas: correrlo contra una base con datos y ANALYZE hecho.
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+import monitor_db
+
+# Configuración
+FORBIDDEN_TABLES = ('findings',)
+LATEST_LIMIT = 10
+
+# Queries a revisar: secciones del resumen (normal y con rollups, sin repetir)
+CHECKED_QUERIES = monitor_db.SUMMARY_SECTIONS + tuple(
+    (f"{name} (rollups)", query) for name, query in monitor_db.ROLLUP_SUMMARY_SECTIONS
+    if query != dict(monitor_db.SUMMARY_SECTIONS)[name]
+)
+
+
+def iter_plan_nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Recorrer un nodo del plan y todos sus hijos"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def explain(monitor: monitor_db.DatabaseMonitor, query: str) -> Dict[str, Any]:
+    """Plan en JSON (sin ejecutar la query)"""
+    params = (LATEST_LIMIT,) if '%s' in query else None
+    with monitor.conn.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query.strip().rstrip(';'), params)
+        return cursor.fetchone()[0][0]['Plan']
+
+
+def find_seq_scans(plan: Dict[str, Any], tables) -> List[str]:
+    """Tablas prohibidas que el plan recorre con Seq Scan"""
+    return [
+        node['Relation Name'] for node in iter_plan_nodes(plan)
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in tables
+    ]
+
+
+def check_plans(monitor: monitor_db.DatabaseMonitor, tables,
+                verbose: bool = False) -> List[Tuple[str, List[str]]]:
+    """Revisar cada query; retorna (nombre, tablas con Seq Scan) de las que fallan"""
+    failures = []
+    for name, query in CHECKED_QUERIES:
+        plan = explain(monitor, query)
+        scans = find_seq_scans(plan, tables)
+        mark = "❌" if scans else "✅"
+        print(f"  {mark} {name:35} {plan['Node Type']:20} costo {plan['Total Cost']:>10.2f}")
+        if scans:
+            print(f"     Seq Scan sobre: {', '.join(sorted(set(scans)))}")
+            failures.append((name, scans))
+        if verbose:
+            for node in iter_plan_nodes(plan):
+                target = node.get('Index Name') or node.get('Relation Name') or ''
+                print(f"       - {node['Node Type']} {target}")
+    return failures
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Chequeo de planes de las queries del monitor")
+    parser.add_argument('--forbid', action='append', default=None,
+                        help="Tabla que no puede aparecer en un Seq Scan (repetible, default: findings)")
+    parser.add_argument('--no-seqscan', action='store_true',
+                        help="SET enable_seqscan = off (para bases casi vacías; solo detecta índices faltantes)")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Mostrar todos los nodos de cada plan")
+    args = parser.parse_args()
+
+    if not monitor_db.PSYCOPG2_AVAILABLE:
+        print("❌ Este script requiere psycopg2")
+        print("Instalar con: pip install psycopg2-binary")
+        sys.exit(1)
+
+    tables = tuple(args.forbid or FORBIDDEN_TABLES)
+    monitor = monitor_db.DatabaseMonitor(monitor_db.DB_CONFIG)
+    if not monitor.connect():
+        sys.exit(1)
+
+    try:
+        # Con pocas filas el planner prefiere Seq Scan aunque exista el índice;
+        # con enable_seqscan=off el Seq Scan solo queda cuando no hay otro camino
+        if args.no_seqscan:
+            with monitor.conn.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off;")
+
+        print("\n" + "="*80)
+        print(f"🧭 PLANES DE QUERIES (Seq Scan prohibido en: {', '.join(tables)})")
+        print("="*80 + "\n")
+
+        failures = check_plans(monitor, tables, args.verbose)
+        print()
+        if failures:
+            print(f"❌ {len(failures)} queries recorren tablas completas\n")
+            sys.exit(1)
+        print("✅ Ninguna query hace Seq Scan sobre las tablas prohibidas\n")
+    finally:
+        monitor.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,103 +1,90 @@
 #!/usr/bin/env python3
 """
 Script para monitorear assessments en Supabase
-Uso: python scripts/monitor_assessments.py
+Uso: python scripts/monitor_assessments.py [--source rest|local] [--targets ARCHIVO] [--timeout SEGUNDOS] [--trends]
 """
 
-import requests
-import json
+import argparse
+import sqlite3
+import sys
 from datetime import datetime
-from typing import Dict, List, Any
-import time
-import os
+from typing import Dict, List, Any, Iterator
+
+from monitor_core import (
+    AGGREGATION_MODE, KEYSET_PAGE_SIZE, SNAPSHOT_COLUMNS, TARGET_TIMEOUT, FanOut, FindingsSnapshot,
+    MonitorBackend, MonitorCore, RestBackend, SqliteBackend, TargetResult, TrendStore,
+    ACTIVE_STATUSES, TRENDS_PATH, calculate_progress, format_datetime, load_targets, merge_snapshots,
+    ordered_severities, severity_emoji, trend_sample
+)
 
 # Configuración
 SUPABASE_URL = "http://10.10.10.77:8000"
 ANON_KEY = "eeyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoiYW5vbiIsImlzcyI6InN1cGFiYXNlIiwiaWF0IjoxNzYzMzU1NjAwLCJleHAiOjE5MjExMjIwMDB9.OzXw4tdhXGo59s1KqnAWD8O9XpdN3dcHTazxY0uL0Go"
 
+
 class SupabaseMonitor:
-    def __init__(self, url: str, key: str):
+    """Reporte de texto sobre MonitorCore + RestBackend (o el backend indicado, p.ej. el espejo local)"""
+
+    def __init__(self, url: str, key: str, aggregation_mode: str = AGGREGATION_MODE,
+                 backend: MonitorBackend = None):
         self.url = url
-        self.headers = {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json"
-        }
+        self.backend = backend or RestBackend(url, key, aggregation_mode)
+        self.core = MonitorCore(self.backend)
+        # Sin transporte HTTP con otros backends: el costo del reporte sale de format_stats()
+        self.transport = getattr(self.backend, 'transport', None)
+        self.headers = getattr(self.backend, 'headers', None)
+        self.cache = self.core.cache
 
     def query(self, table: str, select: str = "*", filters: str = "") -> List[Dict[str, Any]]:
         """Hacer query a una tabla de Supabase"""
-        endpoint = f"{self.url}/rest/v1/{table}"
-        params = f"?select={select}{filters}"
+        return self.backend.query(table, select, filters)
 
-        try:
-            response = requests.get(endpoint + params, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error al consultar {table}: {e}")
-            return []
+    def iter_rows(self, table: str, select: str = "*", filters: str = "",
+                  page_size: int = KEYSET_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Recorrer una tabla completa en páginas por keyset (created_at, id), en memoria constante"""
+        return self.backend.iter_rows(table, select, filters, page_size)
+
+    def count_by(self, table: str, column: str) -> Dict[str, int]:
+        """Conteo agrupado por columna, resuelto en el servidor siempre que sea posible"""
+        return self.backend.count_by(table, column)
 
     def get_assessments(self) -> List[Dict[str, Any]]:
         """Obtener todos los assessments"""
-        return self.query(
-            "assessments",
-            "id,domain,status,created_at,updated_at,completed_at,analysis_progress",
-            "&order=created_at.desc"
-        )
+        return self.core.assessments()
 
     def get_findings(self, assessment_id: str = None) -> List[Dict[str, Any]]:
         """Obtener findings"""
         filters = f"&assessment_id=eq.{assessment_id}" if assessment_id else ""
-        return self.query("findings", "*", filters)
+        return list(self.iter_rows("findings", "*", filters))
+
+    def get_findings_snapshot(self, columns: str = SNAPSHOT_COLUMNS) -> FindingsSnapshot:
+        """Findings en columnas compactas pidiendo solo `columns` (conteos y top-N sin un dict por fila)"""
+        return self.core.findings_snapshot(columns)
+
+    def get_latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Obtener los últimos findings (orden y límite resueltos en el servidor)"""
+        return self.core.latest_findings(limit)
 
     def get_status_summary(self) -> Dict[str, int]:
         """Obtener resumen de estados"""
-        assessments = self.get_assessments()
-        summary = {}
-        for assessment in assessments:
-            status = assessment.get('status', 'unknown')
-            summary[status] = summary.get(status, 0) + 1
-        return summary
+        return self.core.status_counts()
 
     def get_severity_summary(self) -> Dict[str, int]:
         """Obtener resumen de severidades"""
-        findings = self.get_findings()
-        summary = {}
-        for finding in findings:
-            severity = finding.get('severity', 'unknown')
-            summary[severity] = summary.get(severity, 0) + 1
-        return summary
-
-    def calculate_progress(self, analysis_progress: Dict) -> float:
-        """Calcular porcentaje de progreso"""
-        if not analysis_progress:
-            return 0.0
-
-        completed = analysis_progress.get('completed', 0)
-        total = analysis_progress.get('total', 0)
+        return self.core.severity_counts()
 
-        if total == 0:
-            return 0.0
-
-        return round((completed / total) * 100, 2)
+    def get_snapshot(self, latest_limit: int = 10) -> Dict[str, Any]:
+        """Obtener cada proyección del reporte una sola vez (vía cache)"""
+        return self.core.snapshot(latest_limit)
 
-    def format_datetime(self, dt_str: str) -> str:
-        """Formatear fecha/hora"""
-        if not dt_str:
-            return "N/A"
-        try:
-            dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
-            return dt.strftime('%Y-%m-%d %H:%M:%S')
-        except:
-            return dt_str
-
-    def print_assessments(self):
+    def print_assessments(self, assessments: List[Dict[str, Any]] = None):
         """Imprimir todos los assessments"""
         print("\n" + "="*80)
         print("📊 ASSESSMENTS")
         print("="*80 + "\n")
 
-        assessments = self.get_assessments()
+        if assessments is None:
+            assessments = self.get_assessments()
 
         if not assessments:
             print("No se encontraron assessments.\n")
@@ -106,11 +93,11 @@ class SupabaseMonitor:
         for i, assessment in enumerate(assessments, 1):
             domain = assessment.get('domain', 'N/A')
             status = assessment.get('status', 'N/A')
-            created = self.format_datetime(assessment.get('created_at'))
+            created = format_datetime(assessment.get('created_at'))
             progress = assessment.get('analysis_progress', {})
 
             print(f"{'─'*80}")
-            print(f"#{i} | {domain}")
+            print(f"#{i} | {domain}" + (f" [{assessment['instance']}]" if 'instance' in assessment else ""))
             print(f"{'─'*80}")
             print(f"  Estado: {status.upper()}")
             print(f"  Creado: {created}")
@@ -119,7 +106,7 @@ class SupabaseMonitor:
                 current = progress.get('current', 'N/A')
                 completed = progress.get('completed', 0)
                 total = progress.get('total', 0)
-                percentage = self.calculate_progress(progress)
+                percentage = calculate_progress(progress)
 
                 print(f"  Progreso: {completed}/{total} ({percentage}%)")
                 if current:
@@ -127,13 +114,14 @@ class SupabaseMonitor:
 
             print()
 
-    def print_status_summary(self):
+    def print_status_summary(self, summary: Dict[str, int] = None):
         """Imprimir resumen de estados"""
         print("\n" + "="*80)
         print("📈 RESUMEN POR ESTADO")
         print("="*80 + "\n")
 
-        summary = self.get_status_summary()
+        if summary is None:
+            summary = self.get_status_summary()
 
         if not summary:
             print("No hay datos disponibles.\n")
@@ -144,13 +132,14 @@ class SupabaseMonitor:
 
         print()
 
-    def print_findings_summary(self):
+    def print_findings_summary(self, summary: Dict[str, int] = None):
         """Imprimir resumen de findings"""
         print("\n" + "="*80)
         print("🔍 RESUMEN DE FINDINGS")
         print("="*80 + "\n")
 
-        summary = self.get_severity_summary()
+        if summary is None:
+            summary = self.get_severity_summary()
         total = sum(summary.values())
 
         if total == 0:
@@ -159,29 +148,20 @@ class SupabaseMonitor:
 
         print(f"  Total: {total}\n")
 
-        severity_order = ['critical', 'high', 'medium', 'low', 'info']
-        for severity in severity_order:
-            count = summary.get(severity, 0)
-            if count > 0:
-                emoji = {
-                    'critical': '🔴',
-                    'high': '🟠',
-                    'medium': '🟡',
-                    'low': '🟢',
-                    'info': 'ℹ️'
-                }.get(severity, '⚪')
-                print(f"  {emoji} {severity.upper():20} : {count}")
+        for severity, count in ordered_severities(summary):
+            print(f"  {severity_emoji(severity)} {severity.upper():20} : {count}")
 
         print()
 
-    def print_active_assessments(self):
+    def print_active_assessments(self, assessments: List[Dict[str, Any]] = None):
         """Imprimir assessments activos con progreso detallado"""
         print("\n" + "="*80)
         print("⏳ ASSESSMENTS EN ANÁLISIS")
         print("="*80 + "\n")
 
-        assessments = self.get_assessments()
-        active = [a for a in assessments if a.get('status') in ['analyzing', 'pending', 'uploaded']]
+        if assessments is None:
+            assessments = self.get_assessments()
+        active = [a for a in assessments if a.get('status') in ACTIVE_STATUSES]
 
         if not active:
             print("No hay assessments activos en este momento.\n")
@@ -193,13 +173,15 @@ class SupabaseMonitor:
             progress = assessment.get('analysis_progress', {})
 
             print(f"  Dominio: {domain}")
+            if 'instance' in assessment:
+                print(f"  Instancia: {assessment['instance']}")
             print(f"  Estado: {status}")
 
             if progress:
                 current = progress.get('current', 'N/A')
                 completed = progress.get('completed', 0)
                 total = progress.get('total', 0)
-                percentage = self.calculate_progress(progress)
+                percentage = calculate_progress(progress)
 
                 # Barra de progreso visual
                 bar_length = 40
@@ -213,13 +195,14 @@ class SupabaseMonitor:
 
             print()
 
-    def print_latest_findings(self, limit: int = 10):
+    def print_latest_findings(self, limit: int = 10, findings: List[Dict[str, Any]] = None):
         """Imprimir últimos findings"""
         print("\n" + "="*80)
         print(f"🆕 ÚLTIMOS {limit} FINDINGS")
         print("="*80 + "\n")
 
-        findings = self.get_findings()[:limit]
+        if findings is None:
+            findings = self.get_latest_findings(limit)
 
         if not findings:
             print("No se encontraron findings.\n")
@@ -230,41 +213,147 @@ class SupabaseMonitor:
             severity = finding.get('severity', 'N/A')
             category = finding.get('category_id', 'N/A')
 
-            emoji = {
-                'critical': '🔴',
-                'high': '🟠',
-                'medium': '🟡',
-                'low': '🟢',
-                'info': 'ℹ️'
-            }.get(severity, '⚪')
-
-            print(f"{i}. {emoji} [{severity.upper()}] {title}")
-            print(f"   Categoría: {category}")
+            print(f"{i}. {severity_emoji(severity)} [{severity.upper()}] {title}")
+            print(f"   Categoría: {category}" + (f" | Instancia: {finding['instance']}" if 'instance' in finding else ""))
             print()
 
-    def print_full_report(self):
-        """Imprimir reporte completo"""
+    def print_full_report(self, snapshot: Dict[str, Any] = None):
+        """Imprimir reporte completo (snapshot: resultado de get_snapshot o equivalente)"""
         print("\n" + "="*80)
         print("📊 REPORTE DE MONITOREO - ASSESSMENTS")
         print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*80)
 
-        self.print_status_summary()
-        self.print_findings_summary()
-        self.print_active_assessments()
-        self.print_assessments()
-        self.print_latest_findings()
+        fetched = snapshot is None and self.transport is not None
+        if fetched:
+            requests_before = self.transport.request_count
+            bytes_before = self.transport.bytes_received
+
+        if snapshot is None:
+            snapshot = self.get_snapshot()
+
+        self.print_status_summary(snapshot['status_summary'])
+        self.print_findings_summary(snapshot['severity_summary'])
+        self.print_active_assessments(snapshot['assessments'])
+        self.print_assessments(snapshot['assessments'])
+        self.print_latest_findings(findings=snapshot['latest_findings'])
+
+        if fetched:
+            print(f"📡 Costo del reporte: {self.transport.request_count - requests_before} peticiones HTTP, "
+                  f"{(self.transport.bytes_received - bytes_before) / 1024:.1f} KB recibidos\n")
+
+
+def record_trends(monitor: SupabaseMonitor):
+    """Guardar el snapshot del reporte en el histórico (--trends; sale de la cache, sin consultas extra)"""
+    snapshot = monitor.get_snapshot()
+    active = [row for row in snapshot['assessments'] if row.get('status') in ACTIVE_STATUSES]
+    store = TrendStore().open()
+    saved = store.record(trend_sample(snapshot['status_summary'], snapshot['severity_summary'], active))
+    store.close()
+    print(f"📈 Histórico: {'snapshot guardado' if saved else 'snapshot no guardado'} en {store.path}")
+
+
+def print_instances(results: Dict[str, TargetResult]):
+    """Imprimir el estado y los totales de cada instancia"""
+    print("\n" + "="*80)
+    print("🌐 INSTANCIAS")
+    print("="*80 + "\n")
+
+    for name, result in results.items():
+        if result.ok:
+            snapshot = result.value
+            active = sum(1 for a in snapshot['assessments'] if a.get('status') in ACTIVE_STATUSES)
+            print(f"  ✅ {name:20} {result.elapsed * 1000:8.0f} ms | "
+                  f"{sum(snapshot['status_summary'].values())} assessments ({active} activos), "
+                  f"{sum(snapshot['severity_summary'].values())} findings")
+        else:
+            print(f"  ❌ {name:20} {result.status.upper()}: {result.error}")
+
+    print()
+
+
+def fetch_target_snapshot(monitor: SupabaseMonitor) -> Dict[str, Any]:
+    """Snapshot de una instancia; falla si no responde (el backend devolvería conteos vacíos)"""
+    monitor.transport.get("rest/v1/", timeout=5)
+    return monitor.get_snapshot()
+
+
+def run_multi_report(targets, timeout: float = TARGET_TIMEOUT) -> bool:
+    """Reporte global y por instancia consultando todos los targets en paralelo"""
+    monitors = {}
+    for target in targets:
+        if not target.url:
+            print(f"❌ El target '{target.name}' no tiene 'url'")
+            return False
+        monitors[target.name] = SupabaseMonitor(target.url, target.key or ANON_KEY)
+
+    print(f"\n🔍 Consultando {len(monitors)} instancias en paralelo (plazo {timeout:g} s)...")
+    fanout = FanOut(monitors, timeout)
+    results = fanout.run(fetch_target_snapshot)
+    snapshots = fanout.values(results, stale=False)
+    if snapshots:
+        next(iter(monitors.values())).print_full_report(merge_snapshots(snapshots))
+    print_instances(results)
+
+    print("="*80)
+    print(f"✅ Reporte completado ({len(snapshots)}/{len(monitors)} instancias)")
+    for name, monitor in monitors.items():
+        print(f"🌐 {name}: {monitor.core.format_stats()}")
+    print("="*80 + "\n")
+
+    # Los que siguen colgados se abandonan (hilos daemon)
+    for name in snapshots:
+        monitors[name].core.close()
+    return bool(snapshots)
 
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Reporte de assessments vía la API REST de Supabase")
+    parser.add_argument('--source', choices=['rest', 'local'], default='rest',
+                        help="local: espejo de monitor_mirror.py (MONITOR_MIRROR), sin consultar Supabase")
+    parser.add_argument('--targets', metavar='ARCHIVO',
+                        help="JSON con varias instancias (por defecto: variable MONITOR_TARGETS)")
+    parser.add_argument('--timeout', type=float, default=TARGET_TIMEOUT,
+                        help="Plazo por instancia en segundos (con varias instancias)")
+    parser.add_argument('--trends', action='store_true',
+                        help=f"Guardar el snapshot en el histórico ({TRENDS_PATH}, ver monitor_trends.py)")
+    args = parser.parse_args()
+
+    try:
+        targets = load_targets(args.targets)
+    except (OSError, ValueError) as e:
+        print(f"❌ Targets inválidos: {e}")
+        sys.exit(1)
+    if targets and args.source == 'rest':
+        if not run_multi_report(targets, args.timeout):
+            sys.exit(1)
+        return
+
+    if args.source == 'local':
+        backend = SqliteBackend()
+        try:
+            backend.connect()
+        except sqlite3.Error as e:
+            print(f"❌ No se pudo abrir el espejo {backend.path} ({e}): correr antes `monitor_mirror.py sync`")
+            sys.exit(1)
+        monitor = SupabaseMonitor(SUPABASE_URL, ANON_KEY, backend=backend)
+        monitor.print_full_report()
+        if args.trends:
+            record_trends(monitor)
+        print("\n" + "="*80)
+        print("✅ Reporte completado")
+        print(f"🗄️  Espejo: {monitor.core.format_stats()}")
+        print("="*80 + "\n")
+        monitor.core.close()
+        return
+
     monitor = SupabaseMonitor(SUPABASE_URL, ANON_KEY)
 
     # Verificar conexión
     print("\n🔍 Conectando a Supabase...")
     try:
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=monitor.headers)
-        response.raise_for_status()
+        monitor.transport.get("rest/v1/", timeout=5)
         print("✅ Conexión exitosa\n")
     except Exception as e:
         print(f"❌ Error de conexión: {e}\n")
@@ -272,10 +361,14 @@ def main():
 
     # Imprimir reporte completo
     monitor.print_full_report()
+    if args.trends:
+        record_trends(monitor)
 
     print("\n" + "="*80)
     print("✅ Reporte completado")
+    print(f"🌐 HTTP: {monitor.core.format_stats()}")
     print("="*80 + "\n")
+    monitor.core.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Reporte completo con queries concurrentes (asyncio)
+Las secciones independientes (resumen por estado, severidades, assessments
+activos, últimos findings, categorías) se ejecutan en paralelo con un límite
+de concurrencia y se imprimen siempre en el mismo orden.
+
+Uso: python scripts/monitor_async.py [--source rest|db] [--concurrency N] [--benchmark]
+Requiere: pip install httpx (REST) / pip install asyncpg (PostgreSQL)
+"""
+
+import argparse
+import asyncio
+import functools
+import itertools
+import re
+import statistics
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
+import monitor_db
+from monitor_assessments import SUPABASE_URL, ANON_KEY, SupabaseMonitor
+from monitor_core import AGGREGATE_RPCS, ASSESSMENT_COLUMNS, DEFAULT_TIMEOUT, LATEST_FINDING_COLUMNS
+from monitor_core.backends import REJECTED_STATUSES
+
+# Configuración
+DEFAULT_CONCURRENCY = 4
+BENCHMARK_RUNS = 5
+
+Section = Tuple[str, Callable[[], Awaitable[Any]]]
+
+# Placeholders de psycopg2 (%s, y %% para un % literal)
+_PSYCOPG2_PARAM = re.compile(r'%([s%])')
+
+
+@functools.lru_cache(maxsize=None)
+def numbered_params(query: str) -> str:
+    """Query con placeholders %s de psycopg2 a los $1, $2... de asyncpg"""
+    counter = itertools.count(1)
+    return _PSYCOPG2_PARAM.sub(lambda match: '%' if match.group(1) == '%' else f"${next(counter)}", query)
+
+
+async def run_sections(sections: List[Section], concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """Ejecutar las secciones en paralelo (máximo `concurrency` a la vez)
+
+    El resultado conserva el orden de `sections`, sin importar cuál termina antes.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def guarded(factory):
+        async with semaphore:
+            return await factory()
+
+    results = await asyncio.gather(*(guarded(factory) for _, factory in sections))
+    return {name: result for (name, _), result in zip(sections, results)}
+
+
+class AsyncRestReport:
+    """Snapshot de SupabaseMonitor.get_snapshot() usando httpx.AsyncClient"""
+
+    def __init__(self, monitor: SupabaseMonitor, concurrency: int = DEFAULT_CONCURRENCY):
+        self.monitor = monitor
+        self.concurrency = concurrency
+        self.client = None
+        # Rutas de conteo que el servidor ya rechazó: no se vuelven a probar
+        self._unsupported_paths = set()
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=f"{self.monitor.url}/rest/v1/",
+            headers=self.monitor.headers,
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def _get_raw(self, path: str) -> Any:
+        response = await self.client.get(path)
+        response.raise_for_status()
+        return response.json()
+
+    async def _get(self, path: str) -> Any:
+        """GET de una sección; [] si falla (como RestBackend.query: el resto del reporte sigue)"""
+        try:
+            return await self._get_raw(path)
+        except (httpx.HTTPError, ValueError) as e:
+            # httpx agrega una segunda línea con un enlace a la documentación del código HTTP
+            print(f"❌ Error al consultar {path.split('?')[0]}: {str(e).splitlines()[0] if str(e) else e!r}")
+            return []
+
+    async def _count_by(self, table: str, column: str) -> Dict[str, int]:
+        """Conteo agrupado: RPC, luego select agregado y por último el conteo paginado síncrono"""
+        function = AGGREGATE_RPCS.get((table, column))
+        paths = ([f"rpc/{function}"] if function else []) + [f"{table}?select={column},count()"]
+        for path in paths:
+            if path in self._unsupported_paths:
+                continue
+            try:
+                rows = await self._get_raw(path)
+            except httpx.HTTPStatusError as e:
+                # Solo un rechazo del servidor se recuerda; un 429 o un 5xx se reintenta en el próximo reporte
+                if e.response.status_code in REJECTED_STATUSES:
+                    self._unsupported_paths.add(path)
+                continue
+            except (httpx.HTTPError, ValueError):
+                continue
+            return {row[column] or 'unknown': int(row['count']) for row in rows}
+        return await asyncio.to_thread(self.monitor.count_by, table, column)
+
+    def sections(self, latest_limit: int = 10) -> List[Section]:
+        return [
+            ('status_summary', lambda: self._count_by("assessments", "status")),
+            ('severity_summary', lambda: self._count_by("findings", "severity")),
+            ('assessments', lambda: self._get(
+                f"assessments?select={ASSESSMENT_COLUMNS}&order=created_at.desc")),
+            ('latest_findings', lambda: self._get(
+                f"findings?select={LATEST_FINDING_COLUMNS}&order=created_at.desc&limit={latest_limit}")),
+        ]
+
+    async def snapshot(self) -> Dict[str, Any]:
+        return await run_sections(self.sections(), self.concurrency)
+
+
+class AsyncDbReport:
+    """Secciones de DatabaseMonitor.fetch_summary() usando un pool de asyncpg"""
+
+    def __init__(self, config: Dict[str, Any], concurrency: int = DEFAULT_CONCURRENCY):
+        self.config = config
+        self.concurrency = concurrency
+        self.pool = None
+
+    async def __aenter__(self):
+        self.pool = await asyncpg.create_pool(min_size=1, max_size=self.concurrency, **self.config)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.pool.close()
+
+    async def _fetch(self, query: str, *params) -> List[Dict[str, Any]]:
+        # Las queries compartidas usan el estilo %s de psycopg2
+        query = numbered_params(query)
+        try:
+            async with self.pool.acquire() as conn:
+                return [dict(row) for row in await conn.fetch(query, *params)]
+        except Exception as e:
+            # Como DatabaseMonitor.execute_query: la sección queda vacía y el resto del reporte sigue
+            print(f"❌ Error en query: {e}")
+            return []
+
+    def sections(self, latest_limit: int = 10) -> List[Section]:
+        return [
+            ('assessments_summary', lambda: self._fetch(monitor_db.ASSESSMENTS_SUMMARY_SQL)),
+            ('active_assessments', lambda: self._fetch(monitor_db.ACTIVE_ASSESSMENTS_SQL)),
+            ('findings_by_severity', lambda: self._fetch(monitor_db.FINDINGS_BY_SEVERITY_SQL)),
+            ('assessments_with_findings', lambda: self._fetch(monitor_db.ASSESSMENTS_WITH_FINDINGS_SQL)),
+            ('latest_findings', lambda: self._fetch(monitor_db.LATEST_FINDINGS_SQL, latest_limit)),
+            ('category_analysis', lambda: self._fetch(monitor_db.CATEGORY_ANALYSIS_SQL)),
+        ]
+
+    async def snapshot(self) -> Dict[str, Any]:
+        return await run_sections(self.sections(), self.concurrency)
+
+
+def make_engine(source: str, concurrency: int):
+    """Crear el motor asíncrono para la fuente indicada"""
+    if source == 'rest':
+        return AsyncRestReport(SupabaseMonitor(SUPABASE_URL, ANON_KEY), concurrency)
+    return AsyncDbReport(dict(monitor_db.DB_CONFIG), concurrency)
+
+
+async def fetch_snapshot(source: str, concurrency: int) -> Dict[str, Any]:
+    async with make_engine(source, concurrency) as engine:
+        return await engine.snapshot()
+
+
+def open_sequential(source: str) -> Optional[Tuple[Callable[[], Any], Callable[[], None]]]:
+    """Implementación síncrona actual (una query tras otra): (ejecutar el reporte, cerrar)"""
+    if source == 'rest':
+        monitor = SupabaseMonitor(SUPABASE_URL, ANON_KEY)
+
+        def run():
+            monitor.cache.invalidate()
+            return monitor.get_snapshot()
+        return run, monitor.transport.close
+
+    monitor = monitor_db.DatabaseMonitor(monitor_db.DB_CONFIG)
+    if not monitor.connect():
+        return None
+    return monitor.fetch_summary, monitor.disconnect
+
+
+async def time_both(source: str, concurrency: int, runs: int) -> Tuple[List[float], List[float]]:
+    """Tiempos secuenciales y concurrentes (conexiones ya abiertas), alternando el orden
+
+    En las ejecuciones impares va primero el concurrente: ninguno de los dos
+    modos corre siempre con la cache (del servidor, del SO) que dejó el otro.
+    """
+    opened = open_sequential(source)
+    if opened is None:
+        return [], []
+    run_sequential, close = opened
+    timings = {'sequential': [], 'concurrent': []}
+    try:
+        async with make_engine(source, concurrency) as engine:
+            for run in range(runs):
+                order = ('sequential', 'concurrent') if run % 2 == 0 else ('concurrent', 'sequential')
+                for mode in order:
+                    started = time.perf_counter()
+                    if mode == 'sequential':
+                        run_sequential()
+                    else:
+                        await engine.snapshot()
+                    timings[mode].append(time.perf_counter() - started)
+    finally:
+        close()
+    return timings['sequential'], timings['concurrent']
+
+
+def print_benchmark(source: str, concurrency: int, runs: int):
+    """Comparar el tiempo total del reporte secuencial contra el concurrente"""
+    print("\n" + "="*80)
+    print(f"⏱️  BENCHMARK ({source}, {runs} ejecuciones, concurrencia {concurrency})")
+    print("="*80 + "\n")
+
+    try:
+        sequential, concurrent = asyncio.run(time_both(source, concurrency, runs))
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}\n")
+        return
+
+    if not sequential or not concurrent:
+        print("  No se pudo completar el benchmark\n")
+        return
+
+    for label, timings in (("Secuencial", sequential), ("Concurrente", concurrent)):
+        print(f"  {label:12} : mediana {statistics.median(timings) * 1000:8.1f} ms | "
+              f"mín {min(timings) * 1000:8.1f} ms | máx {max(timings) * 1000:8.1f} ms")
+
+    speedup = statistics.median(sequential) / max(statistics.median(concurrent), 1e-9)
+    print(f"\n  Aceleración: {speedup:.2f}x\n")
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Reporte de assessments con queries concurrentes")
+    parser.add_argument('--source', choices=['rest', 'db'], default='rest',
+                        help="API REST de Supabase (httpx) o PostgreSQL directo (asyncpg)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Máximo de queries en vuelo a la vez")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Comparar tiempo secuencial vs concurrente")
+    parser.add_argument('--runs', type=int, default=BENCHMARK_RUNS,
+                        help="Ejecuciones por modo en --benchmark")
+    args = parser.parse_args()
+
+    if args.source == 'rest' and not HTTPX_AVAILABLE:
+        print("❌ El modo REST requiere httpx")
+        print("Instalar con: pip install httpx")
+        sys.exit(1)
+    if args.source == 'db' and not ASYNCPG_AVAILABLE:
+        print("❌ El modo PostgreSQL requiere asyncpg")
+        print("Instalar con: pip install asyncpg")
+        sys.exit(1)
+
+    if args.benchmark:
+        print_benchmark(args.source, args.concurrency, args.runs)
+        return
+
+    started = time.perf_counter()
+    try:
+        snapshot = asyncio.run(fetch_snapshot(args.source, args.concurrency))
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    if args.source == 'rest':
+        SupabaseMonitor(SUPABASE_URL, ANON_KEY).print_full_report(snapshot)
+    else:
+        monitor_db.DatabaseMonitor(monitor_db.DB_CONFIG).print_summary(snapshot)
+
+    print("\n" + "="*80)
+    print(f"✅ Reporte completado en {elapsed * 1000:.0f} ms ({len(snapshot)} secciones en paralelo)")
+    print("="*80 + "\n")
+
+
+if __name__ == "__main__":
+    main()
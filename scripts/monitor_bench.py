@@ -0,0 +1,740 @@
+#!/usr/bin/env python3
+"""
+Benchmark reproducible de los scripts de monitoreo
+Genera un dataset sintético con la forma de assessments / findings /
+assessment_data, lo carga en un Postgres local y mide cada método público de
+monitor_db.py, monitor_assessments.py y monitor_live.py (estos dos contra un
+stub de PostgREST servido desde el mismo Postgres).
+
+Uso:
+  python scripts/monitor_bench.py seed --assessments 10000 --findings-per-assessment 500
+  python scripts/monitor_bench.py run [--source db|rest|live|all] [--runs 20] [--output bench.json] [--compare base.json]
+  python scripts/monitor_bench.py serve [--port 8765]   # solo el stub, para apuntar monitor_live.py
+
+La conexión se configura con MONITOR_DB_HOST, MONITOR_DB_NAME, ... (ver monitor_db.py).
+Requiere: pip install psycopg2-binary requests
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+import monitor_db
+from monitor_core import percentile
+
+# Configuración del dataset por defecto
+DEFAULT_ASSESSMENTS = 1000
+DEFAULT_FINDINGS_PER_ASSESSMENT = 100
+DEFAULT_DATA_KB = 4  # tamaño aproximado de cada documento de assessment_data
+DEFAULT_SEED = 42
+COPY_CHUNK_ROWS = 50000  # filas por COPY (memoria acotada al sembrar millones de findings)
+
+# Configuración de las mediciones
+DEFAULT_RUNS = 10
+WARMUP_RUNS = 1
+STUB_PORT = 8765
+STUB_MAX_ROWS = 1000  # como db-max-rows de Supabase: obliga a paginar
+STUB_GZIP_MIN_BYTES = 1024
+REGRESSION_RATIO = 1.2  # --compare marca los casos con p50 un 20% peor
+
+CATEGORIES = ('users', 'gpos', 'domain', 'security', 'dc_health', 'forest_domain', 'dns', 'dhcp')
+CATEGORY_NAMES = {
+    'users': 'Usuarios y Grupos', 'gpos': 'Análisis de GPOs', 'domain': 'Configuración de Dominio',
+    'security': 'Políticas de Seguridad', 'dc_health': 'Salud de Controladores de Dominio',
+    'forest_domain': 'Bosque y Dominio - Mejores Prácticas', 'dns': 'Configuración DNS',
+    'dhcp': 'Configuración DHCP',
+}
+SEVERITY_WEIGHTS = (('critical', 5), ('high', 15), ('medium', 30), ('low', 30), ('info', 20))
+STATUS_WEIGHTS = (('completed', 90), ('failed', 3), ('analyzing', 3), ('pending', 2), ('uploaded', 2))
+
+
+# ============================================================================
+# Dataset sintético
+# ============================================================================
+
+class SyntheticDataset:
+    """Filas deterministas (misma semilla -> mismos datos) con la forma del esquema real"""
+
+    def __init__(self, assessments: int = DEFAULT_ASSESSMENTS,
+                 findings_per_assessment: int = DEFAULT_FINDINGS_PER_ASSESSMENT,
+                 data_kb: int = DEFAULT_DATA_KB, seed: int = DEFAULT_SEED):
+        self.assessments = assessments
+        self.findings_per_assessment = findings_per_assessment
+        self.data_kb = data_kb
+        self.seed = seed
+        self.start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def _uuid(self, rng: random.Random) -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def _choice(self, rng: random.Random, weights) -> str:
+        values, relative = zip(*weights)
+        return rng.choices(values, weights=relative)[0]
+
+    def _progress(self, rng: random.Random, status: str) -> Dict[str, Any]:
+        total = len(CATEGORIES)
+        completed = total if status == 'completed' else rng.randrange(total) if status == 'analyzing' else 0
+        return {
+            'categories': [
+                {'id': c, 'name': CATEGORY_NAMES[c],
+                 'status': 'completed' if i < completed else 'processing' if i == completed else 'pending'}
+                for i, c in enumerate(CATEGORIES)
+            ],
+            'current': CATEGORY_NAMES[CATEGORIES[completed]] if status == 'analyzing' else None,
+            'completed': completed,
+            'total': total,
+        }
+
+    def iter_assessments(self) -> Iterator[Dict[str, Any]]:
+        """Assessments espaciados en el tiempo (uno cada ~10 minutos desde 2025-01-01)"""
+        rng = random.Random(self.seed)
+        for i in range(self.assessments):
+            status = self._choice(rng, STATUS_WEIGHTS)
+            created_at = self.start + timedelta(minutes=10 * i, seconds=rng.randrange(600))
+            yield {
+                'id': self._uuid(rng),
+                'domain': f"corp{i:05d}.example.local",
+                'status': status,
+                'created_at': created_at,
+                'updated_at': created_at + timedelta(minutes=rng.randrange(1, 120)),
+                'analysis_progress': self._progress(rng, status),
+            }
+
+    def iter_findings(self, assessment: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Findings de un assessment, con created_at posterior al del assessment"""
+        rng = random.Random(f"{self.seed}:{assessment['id']}")
+        for i in range(self.findings_per_assessment):
+            category = CATEGORIES[i % len(CATEGORIES)]
+            severity = self._choice(rng, SEVERITY_WEIGHTS)
+            yield {
+                'id': self._uuid(rng),
+                'assessment_id': assessment['id'],
+                'title': f"Hallazgo {i} en {CATEGORY_NAMES[category]}",
+                'severity': severity,
+                'description': f"Descripción sintética del hallazgo {i} ({severity}) " + "x" * rng.randrange(40, 400),
+                'recommendation': "Recomendación sintética " + "y" * rng.randrange(20, 200),
+                'evidence': {'objects': [f"CN=obj{rng.randrange(10**6)}" for _ in range(rng.randrange(1, 5))]},
+                'created_at': assessment['created_at'] + timedelta(seconds=30 + i),
+                'category_id': category,
+            }
+
+    def assessment_data(self, assessment: Dict[str, Any]) -> Dict[str, Any]:
+        """Documento JSONB de ~data_kb KB, como el que sube el script de recolección"""
+        rng = random.Random(f"{self.seed}:data:{assessment['id']}")
+        users = [{'sam': f"user{n}", 'enabled': rng.random() > 0.1, 'lastLogon': rng.randrange(10**9)}
+                 for n in range(max(self.data_kb * 1024 // 60, 1))]
+        return {'domain': assessment['domain'], 'Users': users}
+
+
+def _copy_value(value: Any) -> str:
+    """Valor en formato texto de COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+def _copy_rows(cursor, table: str, columns: Tuple[str, ...], rows: Iterator[Dict[str, Any]]) -> int:
+    """COPY ... FROM STDIN en bloques de COPY_CHUNK_ROWS filas"""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    total, buffer, pending = 0, io.StringIO(), 0
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(row[column]) for column in columns) + '\n')
+        pending += 1
+        if pending == COPY_CHUNK_ROWS:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            total, buffer, pending = total + pending, io.StringIO(), 0
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        total += pending
+    return total
+
+
+def seed_database(config: Dict[str, Any], dataset: SyntheticDataset) -> Dict[str, int]:
+    """Vaciar las tablas del monitor y cargar el dataset sintético"""
+    conn = monitor_db.psycopg2.connect(**config)
+    counts = {}
+    try:
+        with conn.cursor() as cursor:
+            # Sin triggers (NOTIFY por fila, rollups) durante la carga; requiere superusuario
+            try:
+                cursor.execute("SET session_replication_role = replica;")
+                triggers_disabled = True
+            except monitor_db.psycopg2.Error:
+                conn.rollback()
+                triggers_disabled = False
+                print("⚠️  Sin permisos para desactivar triggers: la carga será más lenta")
+
+            cursor.execute("TRUNCATE assessments, findings, assessment_data CASCADE;")
+
+            assessments = []
+            counts['assessments'] = _copy_rows(
+                cursor, 'assessments',
+                ('id', 'domain', 'status', 'created_at', 'updated_at', 'analysis_progress'),
+                (assessments.append(a) or a for a in dataset.iter_assessments())
+            )
+            print(f"  ✅ assessments: {counts['assessments']}")
+
+            counts['findings'] = _copy_rows(
+                cursor, 'findings',
+                ('id', 'assessment_id', 'title', 'severity', 'description', 'recommendation',
+                 'evidence', 'created_at', 'category_id'),
+                (finding for a in assessments for finding in dataset.iter_findings(a))
+            )
+            print(f"  ✅ findings: {counts['findings']}")
+
+            if dataset.data_kb > 0:
+                counts['assessment_data'] = _copy_rows(
+                    cursor, 'assessment_data', ('assessment_id', 'data', 'received_at'),
+                    ({'assessment_id': a['id'], 'data': dataset.assessment_data(a),
+                      'received_at': a['created_at']} for a in assessments)
+                )
+                print(f"  ✅ assessment_data: {counts['assessment_data']}")
+
+            if triggers_disabled:
+                cursor.execute("SET session_replication_role = DEFAULT;")
+                cursor.execute("SELECT to_regproc('public.refresh_finding_rollups') IS NOT NULL;")
+                if cursor.fetchone()[0]:
+                    cursor.execute("SELECT public.refresh_finding_rollups();")
+                    print("  ✅ rollups reconstruidos")
+        conn.commit()
+
+        # Estadísticas frescas para que los planes sean los de producción
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE assessments, findings, assessment_data;")
+    finally:
+        conn.close()
+    return counts
+
+
+# ============================================================================
+# Stub de PostgREST
+# ============================================================================
+
+IDENTIFIER = re.compile(r'^[a-z_][a-z0-9_]*$')
+OPERATORS = {'eq': '=', 'neq': '<>', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+RESERVED_PARAMS = {'select', 'order', 'limit', 'offset', 'or', 'and'}
+
+
+def _identifier(name: str) -> str:
+    if not IDENTIFIER.match(name):
+        raise ValueError(f"identificador no soportado: {name}")
+    return name
+
+
+def _split_top_level(expr: str) -> List[str]:
+    """Separar por comas que no estén dentro de paréntesis ni comillas"""
+    parts, depth, quoted, current = [], 0, False, ''
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == ',':
+            parts.append(current)
+            current = ''
+            continue
+        current += char
+    return parts + [current] if current else parts
+
+
+def _condition(column: str, expr: str, params: List[Any]) -> str:
+    """`col=op.valor` de PostgREST a SQL parametrizado"""
+    column = _identifier(column)
+    op, _, value = expr.partition('.')
+    if op == 'in':
+        params.append([v.strip('"') for v in _split_top_level(value.strip('()'))])
+        return f"{column}::text = ANY(%s)"
+    if op == 'is' and value == 'null':
+        return f"{column} IS NULL"
+    if op not in OPERATORS:
+        raise ValueError(f"operador no soportado: {op}")
+    params.append(value.strip('"'))
+    return f"{column} {OPERATORS[op]} %s"
+
+
+def _logic(joiner: str, expr: str, params: List[Any]) -> str:
+    """`or=(a.gt.1,and(b.eq.2,c.gt.3))` a SQL"""
+    clauses = []
+    for item in _split_top_level(expr.strip()[1:-1]):
+        if item.startswith(('and(', 'or(')):
+            nested, _, rest = item.partition('(')
+            clauses.append(_logic(nested.upper(), '(' + rest, params))
+        else:
+            column, op, value = item.split('.', 2)
+            clauses.append(_condition(column, f"{op}.{value}", params))
+    return '(' + f" {joiner} ".join(clauses) + ')'
+
+
+def build_rest_sql(table: str, query: str, max_rows: int = STUB_MAX_ROWS) -> Tuple[str, str, List[Any]]:
+    """Traducir el subconjunto de PostgREST que usan los monitores
+
+    Retorna (query de filas en JSON, query de conteo, parámetros).
+    """
+    table = _identifier(table)
+    params: List[Any] = []
+    where, group_by, order_by = [], [], []
+    columns, limit = '*', max_rows
+
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key == 'select':
+            selected = []
+            for column in value.split(','):
+                if column == 'count()':
+                    selected.append('COUNT(*) AS count')
+                elif column == '*':
+                    selected.append('*')
+                else:
+                    selected.append(_identifier(column))
+                    group_by.append(column)
+            columns = ', '.join(selected)
+            if 'count()' not in value:
+                group_by = []
+        elif key == 'order':
+            for term in value.split(','):
+                column, _, direction = term.partition('.')
+                direction = direction.split('.')[0] or 'asc'
+                if direction not in ('asc', 'desc'):
+                    raise ValueError(f"orden no soportado: {term}")
+                order_by.append(f"{_identifier(column)} {direction.upper()}")
+        elif key == 'limit':
+            limit = min(int(value), max_rows)
+        elif key in ('or', 'and'):
+            where.append(_logic(key.upper(), value, params))
+        elif key not in RESERVED_PARAMS:
+            where.append(_condition(key, value, params))
+
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ''
+    rows_sql = (
+        f"SELECT {columns} FROM public.{table}{where_sql}"
+        + (f" GROUP BY {', '.join(group_by)}" if group_by else '')
+        + (f" ORDER BY {', '.join(order_by)}" if order_by else '')
+        + f" LIMIT {int(limit)}"
+    )
+    json_sql = f"SELECT COALESCE(json_agg(t), '[]'::json)::text FROM ({rows_sql}) t"
+    count_sql = f"SELECT COUNT(*) FROM public.{table}{where_sql}"
+    return json_sql, count_sql, params
+
+
+class PostgrestStub:
+    """Servidor HTTP mínimo compatible con las peticiones de los monitores REST
+
+    Cada petición se traduce a SQL sobre el Postgres sembrado, así que los bytes
+    y la paginación (max-rows, keyset) se parecen a los de un PostgREST real.
+    """
+
+    def __init__(self, config: Dict[str, Any], port: int = STUB_PORT, max_rows: int = STUB_MAX_ROWS):
+        self.config = config
+        self.max_rows = max_rows
+        self.local = threading.local()
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or conn.closed:
+            conn = self.local.conn = monitor_db.psycopg2.connect(**self.config)
+            conn.autocommit = True
+        return conn
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, como detrás de Kong
+            # Headers y body salen en dos writes: sin esto Nagle + ACK retardado suman ~40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: bytes = b'', headers: Dict[str, str] = None,
+                      head: bool = False):
+                headers = dict(headers or {})
+                if len(body) >= STUB_GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=1)
+                    headers['Content-Encoding'] = 'gzip'
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(0 if head else len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+
+            def _serve(self, head: bool = False):
+                url = urlsplit(self.path)
+                path = url.path[len('/rest/v1'):].strip('/') if url.path.startswith('/rest/v1') else None
+                if path is None:
+                    self._send(404, b'{"message":"not found"}', head=head)
+                    return
+                if self.headers.get('Content-Length'):
+                    self.rfile.read(int(self.headers['Content-Length']))
+
+                try:
+                    with stub._connection().cursor() as cursor:
+                        if path == '':
+                            self._send(200, b'{}', head=head)
+                            return
+                        if path.startswith('rpc/'):
+                            function = _identifier(path[len('rpc/'):])
+                            cursor.execute(
+                                f"SELECT COALESCE(json_agg(t), '[]'::json)::text FROM public.{function}() t"
+                            )
+                            self._send(200, cursor.fetchone()[0].encode(), head=head)
+                            return
+
+                        json_sql, count_sql, params = build_rest_sql(path, url.query, stub.max_rows)
+                        headers = {}
+                        if 'count=exact' in self.headers.get('Prefer', ''):
+                            cursor.execute(count_sql, params)
+                            headers['Content-Range'] = f"*/{cursor.fetchone()[0]}"
+                        body = b'[]'
+                        if not head:
+                            cursor.execute(json_sql, params)
+                            body = cursor.fetchone()[0].encode()
+                        self._send(200, body, headers, head=head)
+                except (ValueError, monitor_db.psycopg2.Error) as e:
+                    message = json.dumps({'message': str(e).strip()}).encode()
+                    self._send(400, message, head=head)
+
+            def do_GET(self):
+                self._serve()
+
+            def do_POST(self):
+                self._serve()
+
+            def do_HEAD(self):
+                self._serve(head=True)
+
+        return Handler
+
+    def start(self) -> str:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ============================================================================
+# Casos medidos
+# ============================================================================
+
+def _db_cases() -> Dict[str, Callable]:
+    return {
+        'get_assessments_summary': lambda m: m.get_assessments_summary(),
+        'get_active_assessments': lambda m: m.get_active_assessments(),
+        'get_findings_by_severity': lambda m: m.get_findings_by_severity(),
+        'get_assessments_with_findings': lambda m: m.get_assessments_with_findings(),
+        'get_latest_findings': lambda m: m.get_latest_findings(10),
+        'get_category_analysis': lambda m: m.get_category_analysis(),
+        'fetch_summary': lambda m: m.fetch_summary(),
+        'fetch_summary_rollups': lambda m: m.fetch_summary(use_rollups=True),
+        'fetch_summary_single': lambda m: m.fetch_summary_single(),
+        'iter_findings': lambda m: sum(1 for _ in m.iter_findings("severity, category_id")),
+    }
+
+
+def _uncached(call: Callable) -> Callable:
+    """Caso medido siempre en frío: MonitorCore cachea las proyecciones por SNAPSHOT_TTL"""
+    def case(m):
+        m.core.invalidate()
+        return call(m)
+    return case
+
+
+def _rest_cases() -> Dict[str, Callable]:
+    return {
+        'get_status_summary': _uncached(lambda m: m.get_status_summary()),
+        'get_severity_summary': _uncached(lambda m: m.get_severity_summary()),
+        'get_severity_summary_client': lambda m: m.backend._count_by_client("findings", "severity"),
+        'get_findings': lambda m: m.get_findings(),
+        'get_findings_snapshot': _uncached(lambda m: m.get_findings_snapshot()),
+        'get_assessments': _uncached(lambda m: m.get_assessments()),
+        'get_latest_findings': _uncached(lambda m: m.get_latest_findings(10)),
+        'get_snapshot': _uncached(lambda m: m.get_snapshot()),
+    }
+
+
+def _live_cases() -> Dict[str, Callable]:
+    return {
+        'get_stats': _uncached(lambda m: m.get_stats()),
+        'count': lambda m: m.core.count("findings"),
+        'sync_poll': lambda m: m.sync.poll(),
+    }
+
+
+CASE_GROUPS = {'db': _db_cases, 'rest': _rest_cases, 'live': _live_cases}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _result_size(result: Any) -> Tuple[Optional[int], int]:
+    """(filas, bytes del resultado serializado a JSON)"""
+    rows = result if isinstance(result, int) else len(result) if hasattr(result, '__len__') else None
+    return rows, len(json.dumps(result, default=str).encode())
+
+
+def _make_monitor(source: str, url: str, key: str):
+    if source == 'db':
+        monitor = monitor_db.DatabaseMonitor(monitor_db.DB_CONFIG)
+        monitor.connect()
+        return monitor
+    if source == 'rest':
+        from monitor_assessments import SupabaseMonitor
+        return SupabaseMonitor(url, key)
+    from monitor_live import AssessmentMonitor
+    return AssessmentMonitor(url, key)
+
+
+def _run_case(source: str, name: str, runs: int, url: str, key: str, results) -> None:
+    """Medir un caso en un proceso propio (el pico de RSS es solo de este caso)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        monitor = _make_monitor(source, url, key)
+        case = CASE_GROUPS[source]()[name]
+        for _ in range(WARMUP_RUNS):
+            case(monitor)
+
+        rss_before = _peak_rss_mb()
+        bytes_before = monitor.transport.bytes_received if source != 'db' else 0
+        timings, result = [], None
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = case(monitor)
+            timings.append(time.perf_counter() - started)
+        rss_after = _peak_rss_mb()
+
+        rows, result_bytes = _result_size(result)
+        if source == 'db':
+            monitor.disconnect()
+            wire_bytes = None
+        else:
+            wire_bytes = (monitor.transport.bytes_received - bytes_before) // runs
+            monitor.transport.close()
+
+    results.put({
+        'source': source,
+        'case': name,
+        'runs': runs,
+        'p50_ms': round(percentile(timings, 50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 95) * 1000, 2),
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+        'rows': rows,
+        'result_bytes': result_bytes,
+        'wire_bytes': wire_bytes,
+        'peak_rss_mb': rss_after,
+        'rss_growth_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+    })
+
+
+def run_benchmarks(sources: List[str], runs: int, url: str, key: str,
+                   cases: List[str] = None) -> List[Dict[str, Any]]:
+    """Correr cada caso en un proceso nuevo (spawn) y juntar los resultados"""
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for source in sources:
+        for name in CASE_GROUPS[source]():
+            if cases and name not in cases:
+                continue
+            queue = context.Queue()
+            process = context.Process(target=_run_case, args=(source, name, runs, url, key, queue))
+            process.start()
+            process.join()
+            if process.exitcode != 0 or queue.empty():
+                print(f"  ❌ {source}.{name}: falló (exit {process.exitcode})")
+                continue
+            result = queue.get()
+            results.append(result)
+            wire = f"{result['wire_bytes'] / 1024:9.1f} KB" if result['wire_bytes'] is not None else "        - "
+            print(f"  {source:4} {name:30} p50 {result['p50_ms']:9.2f} ms | p95 {result['p95_ms']:9.2f} ms | "
+                  f"red {wire} | RSS {result['peak_rss_mb']} MB")
+    return results
+
+
+def dataset_info(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Tamaño del dataset contra el que se midió"""
+    conn = monitor_db.psycopg2.connect(**config)
+    try:
+        with conn.cursor() as cursor:
+            info = {}
+            for table in ('assessments', 'findings', 'assessment_data'):
+                cursor.execute(f"SELECT COUNT(*), pg_total_relation_size('public.{table}') FROM public.{table};")
+                count, size = cursor.fetchone()
+                info[table] = {'rows': count, 'bytes': size}
+            cursor.execute("SHOW server_version;")
+            info['server_version'] = cursor.fetchone()[0]
+            return info
+    finally:
+        conn.close()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_comparison(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """Comparar p50 / p95 contra un JSON anterior"""
+    print("\n" + "="*80)
+    print("📊 COMPARACIÓN CONTRA BASELINE")
+    print("="*80 + "\n")
+
+    previous = {(r['source'], r['case']): r for r in baseline.get('results', [])}
+    for result in current['results']:
+        before = previous.get((result['source'], result['case']))
+        if not before:
+            print(f"  {result['source']:4} {result['case']:30} (nuevo)")
+            continue
+        ratio = result['p50_ms'] / max(before['p50_ms'], 1e-9)
+        mark = "⚠️ " if ratio > REGRESSION_RATIO else "✅"
+        print(f"  {mark} {result['source']:4} {result['case']:30} p50 {before['p50_ms']:9.2f} -> "
+              f"{result['p50_ms']:9.2f} ms ({ratio:.2f}x)")
+    print()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Benchmark reproducible de los scripts de monitoreo")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help="Cargar un dataset sintético (vacía las tablas)")
+    seed.add_argument('--assessments', type=int, default=DEFAULT_ASSESSMENTS)
+    seed.add_argument('--findings-per-assessment', type=int, default=DEFAULT_FINDINGS_PER_ASSESSMENT)
+    seed.add_argument('--data-kb', type=int, default=DEFAULT_DATA_KB,
+                      help="KB por documento de assessment_data (0 = no cargar)")
+    seed.add_argument('--seed', type=int, default=DEFAULT_SEED)
+
+    serve = commands.add_parser('serve', help="Solo levantar el stub de PostgREST")
+    serve.add_argument('--port', type=int, default=STUB_PORT)
+    serve.add_argument('--max-rows', type=int, default=STUB_MAX_ROWS)
+
+    run = commands.add_parser('run', help="Medir los métodos de los monitores")
+    run.add_argument('--source', choices=['db', 'rest', 'live', 'all'], default='all')
+    run.add_argument('--case', action='append', help="Medir solo este caso (repetible)")
+    run.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    run.add_argument('--url', help="PostgREST real en vez del stub (p.ej. http://localhost:54321)")
+    run.add_argument('--key', default='bench', help="API key para --url")
+    run.add_argument('--port', type=int, default=0, help="Puerto del stub (0 = libre)")
+    run.add_argument('--max-rows', type=int, default=STUB_MAX_ROWS)
+    run.add_argument('--output', help="Guardar resultados en este JSON")
+    run.add_argument('--compare', help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    if not monitor_db.PSYCOPG2_AVAILABLE:
+        print("❌ Este script requiere psycopg2")
+        print("Instalar con: pip install psycopg2-binary")
+        sys.exit(1)
+
+    config = dict(monitor_db.DB_CONFIG)
+
+    if args.command == 'seed':
+        # TRUNCATE de las tablas: solo contra un Postgres elegido explícitamente
+        if 'MONITOR_DB_HOST' not in os.environ:
+            print("❌ Definir MONITOR_DB_HOST (y el resto de MONITOR_DB_*) apuntando a un Postgres local")
+            sys.exit(1)
+        dataset = SyntheticDataset(args.assessments, args.findings_per_assessment, args.data_kb, args.seed)
+        print(f"\n🌱 Sembrando {config['host']}/{config['database']}: {args.assessments} assessments x "
+              f"{args.findings_per_assessment} findings (semilla {args.seed})\n")
+        started = time.perf_counter()
+        seed_database(config, dataset)
+        print(f"\n✅ Dataset cargado en {time.perf_counter() - started:.1f} s\n")
+        return
+
+    if args.command == 'serve':
+        stub = PostgrestStub(config, args.port, args.max_rows)
+        print(f"📡 Stub de PostgREST en {stub.url}/rest/v1/ (Ctrl+C para detener)")
+        try:
+            stub.server.serve_forever()
+        except KeyboardInterrupt:
+            stub.stop()
+        return
+
+    sources = ['db', 'rest', 'live'] if args.source == 'all' else [args.source]
+    stub = None
+    url = args.url
+    if url is None and any(source != 'db' for source in sources):
+        stub = PostgrestStub(config, args.port, args.max_rows)
+        url = stub.start()
+
+    print("\n" + "="*80)
+    print(f"⏱️  BENCHMARK ({args.runs} ejecuciones por caso)")
+    print("="*80 + "\n")
+    try:
+        results = run_benchmarks(sources, args.runs, url, args.key, args.case)
+    finally:
+        if stub:
+            stub.stop()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs,
+            'warmup_runs': WARMUP_RUNS,
+            'rest_url': args.url or ('stub' if stub else None),
+            'stub_max_rows': args.max_rows if stub else None,
+            'dataset': dataset_info(config),
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Resultados guardados en {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Capa de acceso a datos compartida por los monitores
+
+    MonitorCore(backend)  cache, agrupación de queries e instrumentación
+    RestBackend           API REST de Supabase (PostgREST)
+    PostgresBackend       conexión directa con psycopg2
+    MemoryBackend         datos en memoria (pruebas y demos)
+    SqliteBackend         espejo local en SQLite (LocalMirror lo sincroniza)
+    ProgressTracker       ritmo, latencia por categoría y ETA de los análisis en curso
+    FindingsSnapshot      findings en columnas compactas (array/NumPy)
+    FanOut                consultas en paralelo a varias instancias (targets)
+    TrendStore            histórico de snapshots con resúmenes por minuto y por hora
+"""
+
+from .backends import (
+    ACTIVE_ASSESSMENT_COLUMNS,
+    AGGREGATE_RPCS,
+    AGGREGATION_MODE,
+    ASSESSMENT_COLUMNS,
+    LATEST_FINDING_COLUMNS,
+    PSYCOPG2_AVAILABLE,
+    MemoryBackend,
+    MonitorBackend,
+    PostgresBackend,
+    RestBackend,
+)
+from .cache import SNAPSHOT_TTL, SnapshotCache
+from .columnar import NUMPY_AVAILABLE, SNAPSHOT_COLUMNS, FindingsSnapshot
+from .common import (
+    ACTIVE_STATUSES,
+    SEVERITY_COLORS,
+    SEVERITY_EMOJI,
+    SEVERITY_ORDER,
+    calculate_progress,
+    format_datetime,
+    ordered_severities,
+    parse_timestamp,
+    percentile,
+    severity_emoji,
+)
+from .core import MonitorCore, open_core
+from .mirror import MIRROR_PATH, LocalMirror, SqliteBackend
+from .progress import ProgressTracker, format_duration
+from .targets import (
+    TARGET_TIMEOUT,
+    FanOut,
+    Target,
+    TargetResult,
+    load_targets,
+    merge_counts,
+    merge_live_stats,
+    merge_rows,
+    merge_snapshots,
+)
+from .transport import DEFAULT_TIMEOUT, KEYSET_PAGE_SIZE, HttpTransport
+from .trends import TRENDS_PATH, TrendPoint, TrendStore, trend_sample
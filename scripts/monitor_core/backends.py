@@ -0,0 +1,661 @@
+"""
+Backends de acceso a datos de los monitores
+
+Todos implementan la misma interfaz (MonitorBackend) y devuelven los mismos
+tipos que PostgREST: dicts con timestamps en texto ISO y JSONB ya decodificado,
+así que las front-ends no distinguen de dónde vienen los datos.
+"""
+
+import itertools
+import re
+from abc import ABC, abstractmethod
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+try:
+    import psycopg2
+    from psycopg2.extras import RealDictCursor, NamedTupleCursor
+    PSYCOPG2_AVAILABLE = True
+except ImportError:
+    PSYCOPG2_AVAILABLE = False
+
+from .columnar import SNAPSHOT_COLUMNS, FindingsSnapshot
+from .common import ACTIVE_STATUSES, SEVERITY_ORDER
+from .transport import HttpTransport, KEYSET_PAGE_SIZE
+
+# Proyecciones compartidas por todos los backends
+ASSESSMENT_COLUMNS = "id,domain,status,created_at,updated_at,completed_at,analysis_progress"
+ACTIVE_ASSESSMENT_COLUMNS = "id,domain,status,created_at,updated_at,analysis_progress"
+LATEST_FINDING_COLUMNS = "title,severity,category_id,created_at"
+
+# Modo de agregación de los conteos del backend REST:
+#   auto      -> intenta rpc, luego aggregate y por último client
+#   rpc       -> funciones SQL (migración monitor_aggregate_functions); las
+#                categorías, tabla de rollups (CATEGORY_MODES)
+#   aggregate -> selects agregados de PostgREST (select=status,count())
+#   client    -> conteo en Python paginando solo la columna necesaria
+AGGREGATION_MODE = "auto"
+
+# Funciones RPC que devuelven conteos agrupados por (tabla, columna)
+AGGREGATE_RPCS = {
+    ("assessments", "status"): "monitor_status_counts",
+    ("findings", "severity"): "monitor_severity_counts",
+}
+
+# Tabla mantenida por triggers (migración monitor_finding_rollups) con los
+# findings por categoría y severidad ya contados
+CATEGORY_ROLLUP_TABLE = "category_finding_rollup"
+
+# Respuestas con las que el servidor rechaza una agregación (función RPC o tabla
+# inexistente, PostgREST < 12 o sin db-aggregates-enabled, sin permisos): ese modo
+# no se vuelve a probar. Un timeout o un 5xx solo afectan a la llamada en curso
+REJECTED_STATUSES = (400, 403, 404)
+
+# Modos que prueba category_counts() según AGGREGATION_MODE: no hay función RPC
+# para categorías, su equivalente en el servidor es la tabla de rollups
+CATEGORY_MODES = {'auto': ['rollup', 'aggregate'], 'rpc': ['rollup']}
+
+# Tablas que aceptan count() / iter_rows() / rows_since() -> columna de orden de
+# iter_rows() (assessment_data no tiene created_at)
+ORDER_COLUMNS = {'assessments': 'created_at', 'findings': 'created_at', 'assessment_data': 'received_at'}
+TABLES = tuple(ORDER_COLUMNS)
+
+# Streaming con cursores server-side: filas que trae cada viaje al servidor
+STREAM_ITERSIZE = 2000
+
+# Conteos agrupados: método de la interfaz -> columna agrupada
+COUNT_COLUMNS = {'status_counts': 'status', 'severity_counts': 'severity'}
+
+_IDENTIFIER = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+class _Rejected(Exception):
+    """El servidor rechazó una agregación (REJECTED_STATUSES o una respuesta que no es una lista)"""
+
+
+def _check_table(table: str) -> str:
+    if table not in TABLES:
+        raise ValueError(f"Tabla no soportada: {table}")
+    return table
+
+
+def _sql_columns(columns: str) -> str:
+    """Lista de columnas estilo PostgREST ("a,b") a SQL, validando cada nombre"""
+    if columns == "*":
+        return columns
+    names = [name.strip() for name in columns.split(',')]
+    if not all(_IDENTIFIER.match(name) for name in names):
+        raise ValueError(f"Columnas no soportadas: {columns}")
+    return ', '.join(names)
+
+
+def _group_counts(rows: List[Dict[str, Any]], column: str) -> Dict[str, int]:
+    return {row[column] or 'unknown': int(row['count']) for row in rows}
+
+
+def _nested_counts(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Filas (category_id, severity, count) a {categoría: {severidad: cantidad}}"""
+    counts = {}
+    for row in rows:
+        by_severity = counts.setdefault(row['category_id'] or 'unknown', {})
+        severity = row['severity'] or 'unknown'
+        by_severity[severity] = by_severity.get(severity, 0) + int(row['count'])
+    return counts
+
+
+def _shape(method: str, rows: List[Dict[str, Any]]) -> Any:
+    """Filas de una query de POSTGRES_QUERIES al tipo que devuelve el método de la interfaz"""
+    if method in COUNT_COLUMNS:
+        return _group_counts(rows, COUNT_COLUMNS[method])
+    if method == 'category_counts':
+        return _nested_counts(rows)
+    return rows
+
+
+class MonitorBackend(ABC):
+    """Interfaz de acceso a datos común a los tres monitores
+
+    Los métodos de datos son abstractos: un backend incompleto falla al
+    instanciarse, no en la primera llamada.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def status_counts(self) -> Dict[str, int]:
+        """Assessments por estado"""
+
+    @abstractmethod
+    def severity_counts(self) -> Dict[str, int]:
+        """Findings por severidad"""
+
+    @abstractmethod
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        """Findings por categoría y severidad: {categoría: {severidad: cantidad}}"""
+
+    @abstractmethod
+    def category_batches(self) -> List[Dict[str, Any]]:
+        """Primer created_at de los findings de cada (assessment_id, category_id) como `finished_at`
+
+        analyze-assessment inserta los findings de una categoría en un solo
+        batch al terminarla, así que ese instante marca el fin de la categoría.
+        """
+
+    @abstractmethod
+    def assessments(self) -> List[Dict[str, Any]]:
+        """Todos los assessments (ASSESSMENT_COLUMNS), más nuevos primero"""
+
+    @abstractmethod
+    def active_assessments(self) -> List[Dict[str, Any]]:
+        """Assessments en ACTIVE_STATUSES (ACTIVE_ASSESSMENT_COLUMNS), más nuevos primero"""
+
+    @abstractmethod
+    def latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Últimos findings (LATEST_FINDING_COLUMNS)"""
+
+    @abstractmethod
+    def count(self, table: str) -> Optional[int]:
+        """Conteo exacto de filas (None si no se pudo obtener)"""
+
+    @abstractmethod
+    def iter_rows(self, table: str, columns: str = "*") -> Iterator[Dict[str, Any]]:
+        """Recorrer una tabla completa en orden (ORDER_COLUMNS[table], id), en memoria constante"""
+
+    @abstractmethod
+    def rows_since(self, table: str, columns: str, column: str, since: datetime) -> List[Dict[str, Any]]:
+        """Filas con `column` >= since, en orden ascendente (deltas de sincronización)"""
+
+    def findings_snapshot(self, columns: str = SNAPSHOT_COLUMNS) -> FindingsSnapshot:
+        """Findings en un snapshot columnar, pidiendo solo las columnas de la proyección"""
+        return FindingsSnapshot(columns).extend(self.iter_rows("findings", columns))
+
+    def fetch_many(self, calls: Dict[str, Tuple[str, tuple]]) -> Dict[str, Any]:
+        """Resolver varias queries (clave -> (método, args)); por defecto una tras otra"""
+        return {key: getattr(self, method)(*args) for key, (method, args) in calls.items()}
+
+    def ensure_connection(self):
+        """Reabrir la conexión si se perdió (procesos de larga duración)"""
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores propios del backend (peticiones, viajes, bytes...)"""
+        return {}
+
+    def format_stats(self) -> str:
+        """Resumen de una línea de stats()"""
+        return ""
+
+    def close(self):
+        pass
+
+
+class RestBackend(MonitorBackend):
+    """API REST de Supabase (PostgREST) sobre HttpTransport"""
+
+    name = "rest"
+
+    def __init__(self, url: str, key: str, aggregation_mode: str = AGGREGATION_MODE, verbose: bool = True):
+        self.url = url
+        self.transport = HttpTransport(url, key)
+        self.headers = self.transport.headers
+        self.aggregation_mode = aggregation_mode
+        # False en la UI en vivo: los errores no se imprimen encima del layout
+        self.verbose = verbose
+        # (modo, tabla, columna) que el servidor ya rechazó: no se vuelven a probar
+        self._unsupported_aggregations = set()
+
+    def query(self, table: str, select: str = "*", filters: str = "") -> List[Dict[str, Any]]:
+        """GET de una tabla con filtros de PostgREST; [] si falla"""
+        try:
+            return self.transport.get(f"rest/v1/{table}?select={select}{filters}").json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if self.verbose:
+                print(f"❌ Error al consultar {table}: {e}")
+            return []
+
+    def iter_rows(self, table: str, columns: str = "*", filters: str = "",
+                  page_size: int = KEYSET_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        key = ORDER_COLUMNS[_check_table(table)]
+        try:
+            yield from self.transport.iter_rows(table, columns, filters, page_size, key=key)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            if self.verbose:
+                print(f"❌ Error al recorrer {table}: {e}")
+
+    def _get_json(self, path: str) -> Optional[List[Dict[str, Any]]]:
+        """GET silencioso de una lista: None si falló la red o el servidor, _Rejected si la rechazó"""
+        try:
+            rows = self.transport.get(f"rest/v1/{path}").json()
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code in REJECTED_STATUSES:
+                raise _Rejected(path) from e
+            return None
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        if not isinstance(rows, list):
+            raise _Rejected(path)
+        return rows
+
+    def _aggregate(self, key: tuple, fetch: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Resultado de un modo de agregación (key = (modo, tabla, columnas)); None si no está disponible
+
+        Solo un rechazo del servidor lo descarta para el resto del proceso; con
+        un error transitorio esta llamada sigue con el modo siguiente.
+        """
+        if key in self._unsupported_aggregations:
+            return None
+        try:
+            return fetch()
+        except _Rejected:
+            self._unsupported_aggregations.add(key)
+            return None
+
+    def _count_by_rpc(self, table: str, column: str) -> Optional[Dict[str, int]]:
+        """Conteo agrupado usando una función SQL expuesta vía RPC"""
+        function = AGGREGATE_RPCS.get((table, column))
+        if not function:
+            return None
+        rows = self._get_json(f"rpc/{function}")
+        return None if rows is None else _group_counts(rows, column)
+
+    def _count_by_aggregate(self, table: str, column: str) -> Optional[Dict[str, int]]:
+        """Conteo agrupado usando selects agregados de PostgREST (>= v12)"""
+        rows = self._get_json(f"{table}?select={column},count()")
+        return None if rows is None else _group_counts(rows, column)
+
+    def _count_by_client(self, table: str, column: str) -> Dict[str, int]:
+        """Conteo en el cliente, en streaming y pidiendo solo la columna agrupada"""
+        summary = {}
+        for row in self.iter_rows(table, column):
+            value = row.get(column) or 'unknown'
+            summary[value] = summary.get(value, 0) + 1
+        return summary
+
+    def count_by(self, table: str, column: str) -> Dict[str, int]:
+        """Conteo agrupado por columna, resuelto en el servidor siempre que sea posible"""
+        modes = ['rpc', 'aggregate'] if self.aggregation_mode == 'auto' else [self.aggregation_mode]
+        for mode in modes:
+            if mode == 'rpc':
+                summary = self._aggregate((mode, table, column), lambda: self._count_by_rpc(table, column))
+            elif mode == 'aggregate':
+                summary = self._aggregate((mode, table, column), lambda: self._count_by_aggregate(table, column))
+            else:
+                break
+            if summary is not None:
+                return summary
+        return self._count_by_client(table, column)
+
+    def status_counts(self) -> Dict[str, int]:
+        return self.count_by("assessments", "status")
+
+    def severity_counts(self) -> Dict[str, int]:
+        return self.count_by("findings", "severity")
+
+    def _uncategorized_counts(self) -> Optional[Dict[str, int]]:
+        """Findings sin categoría por severidad (la tabla de rollups no los guarda)"""
+        summary = {}
+        try:
+            for row in self.transport.iter_rows("findings", "severity", "&category_id=is.null"):
+                summary[row['severity']] = summary.get(row['severity'], 0) + 1
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        return summary
+
+    def _category_counts_by_rollup(self) -> Optional[Dict[str, Dict[str, int]]]:
+        """Tabla de rollups más los findings sin categoría como 'unknown', igual que los demás modos"""
+        rows = self._get_json(f"{CATEGORY_ROLLUP_TABLE}?select=category_id,{','.join(SEVERITY_ORDER)}")
+        uncategorized = self._uncategorized_counts() if rows is not None else None
+        if uncategorized is None:
+            return None
+        counts = {row['category_id']: {severity: int(row[severity]) for severity in SEVERITY_ORDER if row[severity]}
+                  for row in rows}
+        if uncategorized:
+            by_severity = counts.setdefault('unknown', {})
+            for severity, count in uncategorized.items():
+                by_severity[severity] = by_severity.get(severity, 0) + count
+        return counts
+
+    def _category_counts_by_aggregate(self) -> Optional[Dict[str, Dict[str, int]]]:
+        rows = self._get_json("findings?select=category_id,severity,count()")
+        return None if rows is None else _nested_counts(rows)
+
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        """Conteo por categoría y severidad: tabla de rollups, select agregado o cliente"""
+        key = ("findings", "category_id,severity")
+        for mode in CATEGORY_MODES.get(self.aggregation_mode, [self.aggregation_mode]):
+            if mode == 'rollup':
+                counts = self._aggregate((mode, *key), self._category_counts_by_rollup)
+            elif mode == 'aggregate':
+                counts = self._aggregate((mode, *key), self._category_counts_by_aggregate)
+            else:
+                break
+            if counts is not None:
+                return counts
+        return self.findings_snapshot("category_id,severity").category_counts()
+
+    def _category_batches_by_aggregate(self) -> Optional[List[Dict[str, Any]]]:
+        rows, offset = [], 0
+        while True:
+            page = self._get_json(
+                "findings?select=assessment_id,category_id,finished_at:created_at.min()"
+                f"&category_id=not.is.null&order=assessment_id,category_id&offset={offset}"
+            )
+            if page is None:
+                return None
+            if not page:
+                return rows
+            rows.extend(page)
+            offset += len(page)
+
+    def category_batches(self) -> List[Dict[str, Any]]:
+        """Select agregado paginado (min() de PostgREST >= 12) o, si no, snapshot columnar de findings"""
+        if self.aggregation_mode in ('auto', 'aggregate'):
+            rows = self._aggregate(('aggregate', "findings", "assessment_id,category_id"),
+                                   self._category_batches_by_aggregate)
+            if rows is not None:
+                return rows
+        return self.findings_snapshot("assessment_id,category_id,created_at").category_batches()
+
+    def assessments(self) -> List[Dict[str, Any]]:
+        return self.query("assessments", ASSESSMENT_COLUMNS, "&order=created_at.desc")
+
+    def active_assessments(self) -> List[Dict[str, Any]]:
+        return self.query(
+            "assessments", ACTIVE_ASSESSMENT_COLUMNS,
+            f"&status=in.({','.join(ACTIVE_STATUSES)})&order=created_at.desc"
+        )
+
+    def latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.query("findings", LATEST_FINDING_COLUMNS, f"&order=created_at.desc&limit={limit}")
+
+    def count(self, table: str) -> Optional[int]:
+        """Conteo exacto vía Content-Range (sin descargar filas)"""
+        try:
+            response = self.transport.head(f"rest/v1/{_check_table(table)}?select=id",
+                                           headers={"Prefer": "count=exact"})
+            total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+            return int(total) if total.isdigit() else None
+        except requests.exceptions.RequestException:
+            return None
+
+    def rows_since(self, table: str, columns: str, column: str, since: datetime) -> List[Dict[str, Any]]:
+        return self.query(table, columns, f"&{column}=gte.{quote(since.isoformat(), safe='')}&order={column}.asc")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.transport.stats()
+
+    def format_stats(self) -> str:
+        return self.transport.format_stats()
+
+    def close(self):
+        self.transport.close()
+
+
+# Queries de la interfaz para PostgresBackend (mismas proyecciones que REST)
+POSTGRES_QUERIES = {
+    'status_counts': "SELECT status, COUNT(*) AS count FROM assessments GROUP BY status",
+    'severity_counts': "SELECT severity, COUNT(*) AS count FROM findings GROUP BY severity",
+    'category_counts': (
+        "SELECT category_id, severity, COUNT(*) AS count FROM findings GROUP BY category_id, severity"
+    ),
+    'category_batches': (
+        "SELECT assessment_id, category_id, MIN(created_at) AS finished_at FROM findings "
+        "WHERE category_id IS NOT NULL GROUP BY assessment_id, category_id"
+    ),
+    'assessments': f"SELECT {_sql_columns(ASSESSMENT_COLUMNS)} FROM assessments ORDER BY created_at DESC",
+    'active_assessments': (
+        f"SELECT {_sql_columns(ACTIVE_ASSESSMENT_COLUMNS)} FROM assessments "
+        f"WHERE status IN ({', '.join(repr(status) for status in ACTIVE_STATUSES)}) "
+        "ORDER BY created_at DESC"
+    ),
+    'latest_findings': (
+        f"SELECT {_sql_columns(LATEST_FINDING_COLUMNS)} FROM findings ORDER BY created_at DESC LIMIT %s"
+    ),
+}
+
+
+class PostgresBackend(MonitorBackend):
+    """Conexión directa a PostgreSQL con psycopg2
+
+    Cada query se contabiliza (viajes y tiempo de espera a la BD) y
+    fetch_many() resuelve varias queries de la interfaz en un solo viaje.
+    """
+
+    name = "postgres"
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.conn = None
+        self._cursor_ids = itertools.count(1)
+        # Statements preparados en la conexión actual (PREPARE dura lo que la sesión)
+        self.prepared = set()
+        self.round_trips = 0
+        self.db_time = 0.0
+
+    def connect(self):
+        """Abrir la conexión (lanza psycopg2.Error si falla)"""
+        self.conn = psycopg2.connect(**self.config)
+        self.prepared.clear()
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def ensure_connection(self):
+        if self.conn is None or self.conn.closed:
+            self.connect()
+
+    def timed_execute(self, cursor, query: str, params: tuple = None):
+        """cursor.execute() contabilizando el viaje y el tiempo de espera a la BD"""
+        started = time.perf_counter()
+        try:
+            cursor.execute(query, params)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.round_trips += 1
+
+    def reset_stats(self):
+        """Reiniciar los contadores de viajes y tiempo en BD"""
+        self.round_trips = 0
+        self.db_time = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {'round_trips': self.round_trips, 'db_time_ms': round(self.db_time * 1000, 1)}
+
+    def format_stats(self) -> str:
+        return f"{self.db_time * 1000:.1f} ms en BD, {self.round_trips} viajes"
+
+    def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
+        """Ejecutar query y retornar resultados (para queries con pocas filas)"""
+        try:
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                self.timed_execute(cursor, query, params)
+                # RealDictRow ya es un dict: no se copia cada fila
+                return cursor.fetchall()
+        except Exception as e:
+            print(f"❌ Error en query: {e}")
+            if not self.conn.autocommit:
+                self.conn.rollback()
+            return []
+
+    def iter_query(self, query: str, params: tuple = None, itersize: int = STREAM_ITERSIZE,
+                   cursor_factory=None) -> Iterator[NamedTuple]:
+        """Ejecutar query con un cursor con nombre (server-side) y entregar filas en streaming
+
+        El servidor envía `itersize` filas por viaje y cada fila es un namedtuple,
+        así que la memoria queda acotada aunque la query recorra toda la tabla.
+        Un error a mitad del recorrido se propaga (tras el rollback): un
+        resultado cortado no debe pasar por completo.
+        """
+        name = f"monitor_stream_{next(self._cursor_ids)}"
+        # Un cursor WITH HOLD fuera de una transacción materializa todo el resultado
+        # al declararse: con autocommit el recorrido va en su propia transacción
+        own_transaction = self.conn.autocommit
+        if own_transaction:
+            self.conn.autocommit = False
+        try:
+            with self.conn.cursor(name=name, cursor_factory=cursor_factory or NamedTupleCursor) as cursor:
+                cursor.itersize = itersize
+                self.timed_execute(cursor, query, params)
+                yield from cursor
+        except Exception:
+            if not self.conn.closed:
+                self.conn.rollback()
+            raise
+        finally:
+            # También si el consumidor dejó de iterar antes del final (GeneratorExit)
+            if own_transaction and not self.conn.closed:
+                self.conn.commit()
+                self.conn.autocommit = True
+
+    def fetch_many(self, calls: Dict[str, Tuple[str, tuple]]) -> Dict[str, Any]:
+        """Todas las queries pedidas en una sola sentencia (un documento JSON)"""
+        if any(method not in POSTGRES_QUERIES for method, _ in calls.values()):
+            return super().fetch_many(calls)
+
+        parts, params = [], []
+        for key, (method, args) in calls.items():
+            parts.append(f"%s, (SELECT COALESCE(json_agg(t), '[]'::json) FROM ({POSTGRES_QUERIES[method]}) t)")
+            params.extend((key, *args))
+        rows = self.execute_query(f"SELECT json_build_object({', '.join(parts)}) AS result", tuple(params))
+        result = rows[0]['result'] if rows else {}
+
+        return {key: _shape(method, result.get(key, [])) for key, (method, _) in calls.items()}
+
+    def _call(self, method: str, *args) -> Any:
+        return self.fetch_many({method: (method, args)})[method]
+
+    def status_counts(self) -> Dict[str, int]:
+        return self._call('status_counts')
+
+    def severity_counts(self) -> Dict[str, int]:
+        return self._call('severity_counts')
+
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        return self._call('category_counts')
+
+    def category_batches(self) -> List[Dict[str, Any]]:
+        return self._call('category_batches')
+
+    def assessments(self) -> List[Dict[str, Any]]:
+        return self._call('assessments')
+
+    def active_assessments(self) -> List[Dict[str, Any]]:
+        return self._call('active_assessments')
+
+    def latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._call('latest_findings', limit)
+
+    def count(self, table: str) -> Optional[int]:
+        rows = self.execute_query(f"SELECT COUNT(*) AS count FROM {_check_table(table)};")
+        return rows[0]['count'] if rows else None
+
+    def _iter_json(self, query: str, params: tuple = None) -> Iterator[Dict[str, Any]]:
+        # to_json deja los timestamps como texto ISO, igual que PostgREST
+        for row in self.iter_query(f"SELECT to_json(t) FROM ({query}) t", params, cursor_factory=psycopg2.extensions.cursor):
+            yield row[0]
+
+    def iter_rows(self, table: str, columns: str = "*") -> Iterator[Dict[str, Any]]:
+        return self._iter_json(
+            f"SELECT {_sql_columns(columns)} FROM {_check_table(table)} ORDER BY {ORDER_COLUMNS[table]}, id"
+        )
+
+    def rows_since(self, table: str, columns: str, column: str, since: datetime) -> List[Dict[str, Any]]:
+        column = _sql_columns(column)
+        return list(self._iter_json(
+            f"SELECT {_sql_columns(columns)} FROM {_check_table(table)} WHERE {column} >= %s ORDER BY {column}",
+            (since,)
+        ))
+
+    def findings_snapshot(self, columns: str = SNAPSHOT_COLUMNS) -> FindingsSnapshot:
+        """Tuplas en streaming (sin to_json ni dicts por fila) directo a las columnas"""
+        snapshot = FindingsSnapshot(columns)
+        return snapshot.extend_tuples(self.iter_query(
+            f"SELECT {_sql_columns(snapshot.projection)} FROM findings", cursor_factory=psycopg2.extensions.cursor
+        ))
+
+
+class MemoryBackend(MonitorBackend):
+    """Backend en memoria: doble de prueba y demos sin servidor
+
+    Las filas se guardan tal cual (timestamps en texto ISO, como en PostgREST);
+    `tables` se puede modificar directamente para simular cambios.
+    """
+
+    name = "memory"
+
+    def __init__(self, assessments: List[Dict[str, Any]] = None, findings: List[Dict[str, Any]] = None,
+                 assessment_data: List[Dict[str, Any]] = None):
+        self.tables = {
+            'assessments': list(assessments or []),
+            'findings': list(findings or []),
+            'assessment_data': list(assessment_data or []),
+        }
+        self.calls = 0
+
+    def _rows(self, table: str) -> List[Dict[str, Any]]:
+        self.calls += 1
+        return self.tables[_check_table(table)]
+
+    @staticmethod
+    def _project(row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        if columns == "*":
+            return dict(row)
+        return {column: row.get(column) for column in columns.split(',')}
+
+    @staticmethod
+    def _newest_first(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return sorted(rows, key=lambda row: row.get('created_at') or '', reverse=True)
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(Counter(row.get('status') or 'unknown' for row in self._rows('assessments')))
+
+    def severity_counts(self) -> Dict[str, int]:
+        return dict(Counter(row.get('severity') or 'unknown' for row in self._rows('findings')))
+
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        return _nested_counts(
+            {'category_id': row.get('category_id'), 'severity': row.get('severity'), 'count': 1}
+            for row in self._rows('findings')
+        )
+
+    def category_batches(self) -> List[Dict[str, Any]]:
+        first = {}
+        for row in self._rows('findings'):
+            if row.get('category_id'):
+                batch = (row.get('assessment_id'), row['category_id'])
+                if batch not in first or row['created_at'] < first[batch]:
+                    first[batch] = row['created_at']
+        return [{'assessment_id': assessment_id, 'category_id': category_id, 'finished_at': finished_at}
+                for (assessment_id, category_id), finished_at in first.items()]
+
+    def assessments(self) -> List[Dict[str, Any]]:
+        rows = self._newest_first(self._rows('assessments'))
+        return [self._project(row, ASSESSMENT_COLUMNS) for row in rows]
+
+    def active_assessments(self) -> List[Dict[str, Any]]:
+        rows = self._newest_first([row for row in self._rows('assessments') if row.get('status') in ACTIVE_STATUSES])
+        return [self._project(row, ACTIVE_ASSESSMENT_COLUMNS) for row in rows]
+
+    def latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        rows = self._newest_first(self._rows('findings'))[:limit]
+        return [self._project(row, LATEST_FINDING_COLUMNS) for row in rows]
+
+    def count(self, table: str) -> Optional[int]:
+        return len(self._rows(table))
+
+    def iter_rows(self, table: str, columns: str = "*") -> Iterator[Dict[str, Any]]:
+        key = ORDER_COLUMNS[_check_table(table)]
+        rows = sorted(self._rows(table), key=lambda row: (row.get(key) or '', str(row.get('id'))))
+        for row in rows:
+            yield self._project(row, columns)
+
+    def rows_since(self, table: str, columns: str, column: str, since: datetime) -> List[Dict[str, Any]]:
+        since_iso = since.isoformat()
+        rows = [row for row in self._rows(table) if (row.get(column) or '') >= since_iso]
+        return [self._project(row, columns) for row in sorted(rows, key=lambda row: row.get(column) or '')]
@@ -0,0 +1,47 @@
+"""
+Cache de proyecciones compartido por los monitores (usado por MonitorCore)
+"""
+
+import time
+from typing import Any, Callable, Tuple
+
+# Tiempo (segundos) que una proyección se reutiliza entre reportes
+SNAPSHOT_TTL = 30
+
+
+class SnapshotCache:
+    """Cache de proyecciones indexado por generación y con expiración por TTL"""
+
+    def __init__(self, ttl: float = SNAPSHOT_TTL):
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def peek(self, key: str) -> Tuple[bool, Any]:
+        """(encontrado, valor) sin cargar nada"""
+        entry = self._entries.get(key)
+        if entry and entry[0] == self.generation and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return True, entry[2]
+        return False, None
+
+    def put(self, key: str, value: Any):
+        """Guardar una proyección en la generación actual"""
+        self.misses += 1
+        self._entries[key] = (self.generation, time.monotonic(), value)
+
+    def get(self, key: str, loader: Callable[[], Any]):
+        """Retornar la proyección cacheada o cargarla con loader()"""
+        found, value = self.peek(key)
+        if found:
+            return value
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def invalidate(self):
+        """Descartar todo lo cacheado pasando a una nueva generación"""
+        self.generation += 1
+        self._entries.clear()
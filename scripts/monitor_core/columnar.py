@@ -0,0 +1,249 @@
+"""
+Snapshot columnar de findings
+
+Cada columna es un array compacto (array.array) y los valores repetidos
+(assessment, categoría, severidad) se guardan como códigos enteros con su
+diccionario. Con la proyección completa un finding ocupa 15 bytes en vez de
+un dict con sus strings, y solo se piden y guardan las columnas de la
+proyección. Con NumPy los conteos agrupados, el primer created_at por grupo y
+el top-N se resuelven con bincount/lexsort/argpartition sobre vistas sin copia
+de los arrays; sin NumPy, con Counter y heapq.
+"""
+
+import heapq
+import sys
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .common import parse_timestamp
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Columnas soportadas -> typecode de array.array (también sirve como dtype de NumPy)
+COLUMN_TYPES = {
+    'assessment_id': 'I',  # código (uint32)
+    'category_id': 'H',  # código (uint16)
+    'severity': 'B',  # código (uint8)
+    'created_at': 'd',  # epoch en segundos (float64)
+}
+SNAPSHOT_COLUMNS = "assessment_id,category_id,severity,created_at"
+
+MISSING_TIME = float('-inf')  # created_at nulo: queda último en el top-N y fuera de los batches
+
+
+def _epoch(value: Any) -> float:
+    ts = parse_timestamp(value)
+    if ts is None:
+        return MISSING_TIME
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def _epoch_memo():
+    """_epoch que reusa el último valor: los findings de un batch comparten created_at"""
+    last = [None, MISSING_TIME]
+
+    def epoch(value: Any) -> float:
+        if value != last[0]:
+            last[0], last[1] = value, _epoch(value)
+        return last[1]
+    return epoch
+
+
+def _iso(epoch: float) -> Optional[str]:
+    if epoch == MISSING_TIME:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def _label(value: Any) -> str:
+    return value or 'unknown'
+
+
+class Interner:
+    """Valor <-> código entero, en orden de aparición"""
+
+    __slots__ = ('codes', 'values')
+
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def code(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.codes) + sys.getsizeof(self.values) + \
+            sum(sys.getsizeof(value) for value in self.values)
+
+
+class FindingsSnapshot:
+    """Findings en columnas compactas; solo guarda las columnas de su proyección"""
+
+    def __init__(self, columns: str = SNAPSHOT_COLUMNS):
+        self.columns = tuple(name.strip() for name in columns.split(','))
+        unknown = [name for name in self.columns if name not in COLUMN_TYPES]
+        if unknown:
+            raise ValueError(f"Columnas no soportadas en el snapshot: {', '.join(unknown)}")
+        self.data = {name: array(COLUMN_TYPES[name]) for name in self.columns}
+        self.dictionaries = {name: Interner() for name in self.columns if name != 'created_at'}
+
+    @property
+    def projection(self) -> str:
+        return ','.join(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.data[self.columns[0]])
+
+    def _encoders(self):
+        return [(self.data[name].append,
+                 self.dictionaries[name].code if name in self.dictionaries else _epoch_memo())
+                for name in self.columns]
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> 'FindingsSnapshot':
+        """Agregar filas (dicts con al menos las columnas de la proyección)"""
+        encoders = list(zip(self.columns, self._encoders()))
+        for row in rows:
+            for name, (append, encode) in encoders:
+                append(encode(row.get(name)))
+        return self
+
+    def extend_tuples(self, rows: Iterable[Sequence[Any]]) -> 'FindingsSnapshot':
+        """Agregar filas como tuplas en el orden de la proyección (cursor de psycopg2)"""
+        encoders = self._encoders()
+        for row in rows:
+            for value, (append, encode) in zip(row, encoders):
+                append(encode(value))
+        return self
+
+    def nbytes(self) -> int:
+        """Memoria de las columnas y de los diccionarios de códigos"""
+        return sum(column.buffer_info()[1] * column.itemsize for column in self.data.values()) + \
+            sum(interner.nbytes() for interner in self.dictionaries.values())
+
+    def _column(self, name: str):
+        """La columna como vista NumPy sin copia (o el array.array si no hay NumPy)"""
+        if name not in self.data:
+            raise ValueError(f"La proyección '{self.projection}' no incluye {name}")
+        column = self.data[name]
+        if not NUMPY_AVAILABLE:
+            return column
+        if not column:
+            return np.empty(0, dtype=column.typecode)
+        return np.frombuffer(column, dtype=column.typecode)
+
+    def count_by(self, name: str) -> Dict[str, int]:
+        """Conteo por una columna codificada: {valor: cantidad}"""
+        codes, values = self._column(name), self.dictionaries[name].values
+        if NUMPY_AVAILABLE:
+            counts = np.bincount(codes, minlength=len(values)).tolist()
+        else:
+            counter = Counter(codes)
+            counts = [counter.get(code, 0) for code in range(len(values))]
+
+        result: Dict[str, int] = {}
+        for value, count in zip(values, counts):
+            if count:
+                result[_label(value)] = result.get(_label(value), 0) + count
+        return result
+
+    def count_by_pair(self, outer: str, inner: str) -> Dict[str, Dict[str, int]]:
+        """Conteo por dos columnas codificadas: {valor externo: {valor interno: cantidad}}"""
+        outer_codes, inner_codes = self._column(outer), self._column(inner)
+        outer_values, inner_values = self.dictionaries[outer].values, self.dictionaries[inner].values
+        if NUMPY_AVAILABLE:
+            keys = outer_codes.astype(np.int64) * len(inner_values) + inner_codes
+            counts = np.bincount(keys, minlength=len(outer_values) * len(inner_values))
+            nonzero = np.flatnonzero(counts)
+            pairs = zip((nonzero // len(inner_values)).tolist(), (nonzero % len(inner_values)).tolist(),
+                        counts[nonzero].tolist())
+        else:
+            pairs = ((o, i, count) for (o, i), count in Counter(zip(outer_codes, inner_codes)).items())
+
+        result: Dict[str, Dict[str, int]] = {}
+        for outer_code, inner_code, count in pairs:
+            by_inner = result.setdefault(_label(outer_values[outer_code]), {})
+            key = _label(inner_values[inner_code])
+            by_inner[key] = by_inner.get(key, 0) + count
+        return result
+
+    def severity_counts(self) -> Dict[str, int]:
+        return self.count_by('severity')
+
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        return self.count_by_pair('category_id', 'severity')
+
+    def category_batches(self) -> List[Dict[str, Any]]:
+        """Primer created_at de cada (assessment_id, category_id), como MonitorBackend.category_batches()"""
+        assessments, categories = self._column('assessment_id'), self._column('category_id')
+        created = self._column('created_at')
+        assessment_values = self.dictionaries['assessment_id'].values
+        category_values = self.dictionaries['category_id'].values
+        empty = [code for code, value in enumerate(category_values) if not value]
+
+        if NUMPY_AVAILABLE:
+            keep = np.isfinite(created)
+            if empty:
+                keep &= ~np.isin(categories, empty)
+            rows = np.flatnonzero(keep)
+            keys = assessments[rows].astype(np.int64) * max(len(category_values), 1) + categories[rows]
+            order = np.lexsort((created[rows], keys))
+            sorted_keys = keys[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+            indexes = rows[order[first]].tolist()
+        else:
+            skip = set(empty)
+            best: Dict[tuple, int] = {}
+            for index, (assessment, category, at) in enumerate(zip(assessments, categories, created)):
+                if category in skip or at == MISSING_TIME:
+                    continue
+                key = (assessment, category)
+                if key not in best or at < created[best[key]]:
+                    best[key] = index
+            indexes = list(best.values())
+
+        return [{'assessment_id': assessment_values[assessments[index]],
+                 'category_id': category_values[categories[index]],
+                 'finished_at': _iso(created[index])} for index in indexes]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Una fila decodificada (timestamps en texto ISO, como PostgREST)"""
+        row = {}
+        for name in self.columns:
+            value = self.data[name][index]
+            row[name] = _iso(value) if name == 'created_at' else self.dictionaries[name].values[value]
+        return row
+
+    def latest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top-N por created_at, más nuevos primero"""
+        created = self._column('created_at')
+        limit = min(limit, len(created))
+        if limit <= 0:
+            return []
+        if NUMPY_AVAILABLE:
+            negated = -created
+            top = np.argpartition(negated, limit - 1)[:limit] if limit < len(created) else np.arange(len(created))
+            indexes = top[np.argsort(negated[top], kind='stable')].tolist()
+        else:
+            indexes = heapq.nlargest(limit, range(len(created)), key=created.__getitem__)
+        return [self.row(index) for index in indexes]
+
+    def top(self, name: str, limit: int = 10) -> List[tuple]:
+        """Los `limit` valores más frecuentes de una columna codificada: [(valor, cantidad)]"""
+        counts = self.count_by(name)
+        return heapq.nlargest(limit, counts.items(), key=lambda item: item[1])
@@ -0,0 +1,77 @@
+"""
+Constantes y utilidades de presentación compartidas por los tres monitores
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+ACTIVE_STATUSES = ('analyzing', 'pending', 'uploaded')
+
+SEVERITY_ORDER = ('critical', 'high', 'medium', 'low', 'info')
+SEVERITY_EMOJI = {
+    'critical': '🔴',
+    'high': '🟠',
+    'medium': '🟡',
+    'low': '🟢',
+    'info': 'ℹ️'
+}
+SEVERITY_COLORS = {
+    'critical': 'red',
+    'high': 'orange1',
+    'medium': 'yellow',
+    'low': 'green',
+    'info': 'blue'
+}
+
+
+def severity_emoji(severity: str) -> str:
+    """Emoji de una severidad (⚪ si no es conocida)"""
+    return SEVERITY_EMOJI.get(severity, '⚪')
+
+
+def ordered_severities(counts: Dict[str, int]) -> List[Tuple[str, int]]:
+    """(severidad, cantidad) de mayor a menor gravedad, sin las que están en cero"""
+    return [(severity, counts[severity]) for severity in SEVERITY_ORDER if counts.get(severity, 0) > 0]
+
+
+def calculate_progress(analysis_progress: Optional[Dict[str, Any]], digits: int = 2) -> float:
+    """Porcentaje de categorías completadas de un analysis_progress"""
+    if not analysis_progress:
+        return 0.0
+
+    completed = int(analysis_progress.get('completed') or 0)
+    total = int(analysis_progress.get('total') or 0)
+
+    if total <= 0:
+        return 0.0
+
+    return round(completed * 100.0 / total, digits)
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Convertir un timestamp de PostgREST (o un datetime) a datetime"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def format_datetime(value: Any) -> str:
+    """Formatear fecha/hora para los reportes"""
+    if not value:
+        return "N/A"
+    dt = parse_timestamp(value)
+    return dt.strftime('%Y-%m-%d %H:%M:%S') if dt else str(value)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil con interpolación lineal (q entre 0 y 100)"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
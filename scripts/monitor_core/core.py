@@ -0,0 +1,172 @@
+"""
+Núcleo de acceso a datos de los monitores (MonitorCore)
+
+Cache de proyecciones, agrupación de queries en un solo viaje cuando el
+backend lo permite e instrumentación de cada llamada, sobre cualquier
+MonitorBackend.
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .backends import MonitorBackend, PostgresBackend, RestBackend
+from .cache import SNAPSHOT_TTL, SnapshotCache
+from .columnar import SNAPSHOT_COLUMNS, FindingsSnapshot
+from .mirror import MIRROR_PATH, SqliteBackend
+
+
+class MonitorCore:
+    """Capa de datos común de monitor_assessments, monitor_live y monitor_db"""
+
+    def __init__(self, backend: MonitorBackend, ttl: float = SNAPSHOT_TTL):
+        self.backend = backend
+        self.cache = SnapshotCache(ttl)
+        # método -> [llamadas, segundos acumulados] (solo lo que llega al backend)
+        self.timings = {}
+
+    def _record(self, name: str, started: float):
+        entry = self.timings.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - started
+
+    def _fetch(self, calls: Dict[str, Tuple[str, tuple]]) -> Dict[str, Any]:
+        """Resolver varias proyecciones cacheadas; los faltantes van juntos al backend"""
+        result, missing = {}, {}
+        for key, call in calls.items():
+            found, value = self.cache.peek(key)
+            if found:
+                result[key] = value
+            else:
+                missing[key] = call
+
+        if missing:
+            started = time.perf_counter()
+            fetched = self.backend.fetch_many(missing)
+            self._record('+'.join(method for method, _ in missing.values()), started)
+            for key, value in fetched.items():
+                self.cache.put(key, value)
+            result.update(fetched)
+        return result
+
+    def _fetch_one(self, key: str, method: str, *args) -> Any:
+        return self._fetch({key: (method, args)})[key]
+
+    def status_counts(self) -> Dict[str, int]:
+        return self._fetch_one('status_counts', 'status_counts')
+
+    def severity_counts(self) -> Dict[str, int]:
+        return self._fetch_one('severity_counts', 'severity_counts')
+
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        return self._fetch_one('category_counts', 'category_counts')
+
+    def category_batches(self) -> List[Dict[str, Any]]:
+        return self._fetch_one('category_batches', 'category_batches')
+
+    def assessments(self) -> List[Dict[str, Any]]:
+        return self._fetch_one('assessments', 'assessments')
+
+    def active_assessments(self) -> List[Dict[str, Any]]:
+        return self._fetch_one('active_assessments', 'active_assessments')
+
+    def latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._fetch_one(f'latest_findings:{limit}', 'latest_findings', limit)
+
+    def findings_snapshot(self, columns: str = SNAPSHOT_COLUMNS) -> FindingsSnapshot:
+        """Findings en columnas compactas (cacheado por proyección)"""
+        return self._fetch_one(f'findings_snapshot:{columns}', 'findings_snapshot', columns)
+
+    def count(self, table: str) -> Optional[int]:
+        """Conteo exacto (sin cache: se usa para validar deltas)"""
+        started = time.perf_counter()
+        try:
+            return self.backend.count(table)
+        finally:
+            self._record('count', started)
+
+    def iter_rows(self, table: str, columns: str = "*") -> Iterator[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            yield from self.backend.iter_rows(table, columns)
+        finally:
+            self._record('iter_rows', started)
+
+    def rows_since(self, table: str, columns: str, column: str, since: datetime) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            return self.backend.rows_since(table, columns, column, since)
+        finally:
+            self._record('rows_since', started)
+
+    def snapshot(self, latest_limit: int = 10) -> Dict[str, Any]:
+        """Proyecciones del reporte completo, pedidas juntas y una sola vez (vía cache)"""
+        data = self._fetch({
+            'status_counts': ('status_counts', ()),
+            'severity_counts': ('severity_counts', ()),
+            'assessments': ('assessments', ()),
+            f'latest_findings:{latest_limit}': ('latest_findings', (latest_limit,)),
+        })
+        return {
+            'status_summary': data['status_counts'],
+            'severity_summary': data['severity_counts'],
+            'assessments': data['assessments'],
+            'latest_findings': data[f'latest_findings:{latest_limit}'],
+        }
+
+    def live_stats(self) -> Dict[str, Any]:
+        """Estadísticas del dashboard en vivo; todos los conteos se resuelven en el servidor"""
+        data = self._fetch({
+            'status_counts': ('status_counts', ()),
+            'severity_counts': ('severity_counts', ()),
+            'active_assessments': ('active_assessments', ()),
+        })
+        return {
+            'total_assessments': sum(data['status_counts'].values()),
+            'total_findings': sum(data['severity_counts'].values()),
+            'status_counts': data['status_counts'],
+            'severity_counts': data['severity_counts'],
+            'active_assessments': data['active_assessments'],
+        }
+
+    def invalidate(self):
+        self.cache.invalidate()
+
+    def instrumentation(self) -> Dict[str, Any]:
+        """Cache, tiempos por llamada y contadores del backend"""
+        return {
+            'backend': self.backend.name,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'calls': {name: {'calls': calls, 'ms': round(seconds * 1000, 1)}
+                      for name, (calls, seconds) in self.timings.items()},
+            **self.backend.stats(),
+        }
+
+    def format_stats(self) -> str:
+        """Resumen de una línea: cache y contadores del backend"""
+        stats = f"cache {self.cache.hits} aciertos / {self.cache.misses} fallos"
+        backend_stats = self.backend.format_stats()
+        return f"{backend_stats}; {stats}" if backend_stats else stats
+
+    def close(self):
+        self.backend.close()
+
+
+def open_core(source: str, url: str = None, key: str = None, db_config: Dict[str, Any] = None,
+              ttl: float = SNAPSHOT_TTL, mirror_path: str = None) -> MonitorCore:
+    """MonitorCore para `--source rest|db|local`
+
+    Con db lanza psycopg2.Error si no conecta; con local, sqlite3.Error si el espejo no existe.
+    """
+    if source == 'db':
+        backend = PostgresBackend(db_config)
+        backend.connect()
+        # Procesos de larga duración: cada consulta ve los datos actuales, sin transacción abierta
+        backend.conn.autocommit = True
+    elif source == 'local':
+        backend = SqliteBackend(mirror_path or MIRROR_PATH)
+        backend.connect()
+    else:
+        backend = RestBackend(url, key)
+    return MonitorCore(backend, ttl)
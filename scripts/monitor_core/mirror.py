@@ -0,0 +1,485 @@
+"""
+Espejo local (SQLite) de assessments y findings
+
+LocalMirror copia las tablas desde cualquier MonitorCore (rest o db) a un
+archivo SQLite y lo mantiene al día con deltas por updated_at / created_at.
+SqliteBackend lo lee con la misma interfaz y los mismos tipos que los demás
+backends, así que los monitores reportan con `--source local` sin consultar
+producción. run_sql() corre SQL de Postgres (como queries-assessments.sql)
+contra el espejo, traduciendo lo que SQLite no entiende.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from .backends import (
+    POSTGRES_QUERIES, PSYCOPG2_AVAILABLE, MonitorBackend, PostgresBackend, RestBackend, _check_table, _shape,
+    _sql_columns
+)
+from .columnar import SNAPSHOT_COLUMNS, FindingsSnapshot
+from .common import parse_timestamp
+from .export import EXPORT_COLUMNS, JSON_COLUMNS, TIMESTAMP_COLUMNS
+from .progress import format_duration
+
+if PSYCOPG2_AVAILABLE:
+    import psycopg2
+
+# Archivo del espejo (por defecto: variable MONITOR_MIRROR)
+MIRROR_ENV = "MONITOR_MIRROR"
+MIRROR_PATH = os.environ.get(MIRROR_ENV, "monitor_mirror.sqlite3")
+
+# Tabla espejada -> columna de los deltas (los findings no se actualizan, solo se insertan)
+MIRROR_TABLES = {'assessments': 'updated_at', 'findings': 'created_at'}
+MIRROR_COLUMNS = {table: EXPORT_COLUMNS[table] for table in MIRROR_TABLES}
+
+SYNC_OVERLAP = timedelta(seconds=2)  # el delta repite este margen: filas confirmadas con un timestamp anterior
+SYNC_BATCH_ROWS = 5000  # filas por executemany (y por viaje del cursor en las copias desde la BD)
+PG_UTC_ISO = 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'  # to_char con el mismo texto que _utc_iso()
+
+# Índice -> (tabla, columnas); en las copias completas se borran y se crean al final
+MIRROR_INDEXES = {
+    'findings_severity': ('findings', 'severity'),
+    'findings_category': ('findings', 'category_id, severity'),
+    'findings_assessment': ('findings', 'assessment_id, category_id, created_at'),
+    'findings_created': ('findings', 'created_at'),
+    'assessments_status': ('assessments', 'status'),
+    'assessments_created': ('assessments', 'created_at'),
+    'assessments_updated': ('assessments', 'updated_at'),
+}
+
+# Queries de la interfaz: las de PostgresBackend con placeholders de sqlite3
+SQLITE_QUERIES = {method: query.replace('%s', '?') for method, query in POSTGRES_QUERIES.items()}
+
+# Tipos de los casts de Postgres (x::tipo) en SQLite
+CAST_TYPES = {
+    'int': 'INTEGER', 'integer': 'INTEGER', 'bigint': 'INTEGER', 'smallint': 'INTEGER',
+    'numeric': 'REAL', 'decimal': 'REAL', 'float': 'REAL', 'real': 'REAL',
+}
+_PAREN_CAST = re.compile(r"\(([^()]+)\)::(\w+)")
+_NAME_CAST = re.compile(r"('[^']*'|[\w.]+)::(\w+)")
+# Resta de timestamps (completed_at - created_at, NOW() - created_at): en Postgres da un interval
+_TIMESTAMP_DIFF = re.compile(r"(NOW\(\)|\b[\w.]*_at\b)\s*-\s*(NOW\(\)|\b[\w.]*_at\b)", re.IGNORECASE)
+_QUERY_TITLE = re.compile(r"^--\s*(\d+)\.\s*(.+)$")
+
+
+def _utc_iso(value: Any) -> Optional[str]:
+    """Timestamp a texto ISO en UTC con microsegundos: en el espejo el orden de texto es el cronológico"""
+    ts = parse_timestamp(value)
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _json_text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _utc_iso_memo():
+    """_utc_iso que reusa el último valor: los findings de un batch comparten created_at"""
+    last = [None, None]
+
+    def encode(value: Any) -> Optional[str]:
+        if value != last[0]:
+            last[0], last[1] = value, _utc_iso(value)
+        return last[1]
+    return encode
+
+
+def _encoders(columns: List[str]):
+    return [_utc_iso_memo() if name in TIMESTAMP_COLUMNS else _json_text if name in JSON_COLUMNS else None
+            for name in columns]
+
+
+def _encode(table: str, rows: Iterable[Dict[str, Any]]) -> Iterator[tuple]:
+    """Filas del origen (dicts como los de PostgREST) a tuplas con los tipos del espejo"""
+    columns = MIRROR_COLUMNS[table].split(',')
+    encoders = list(zip(columns, _encoders(columns)))
+    for row in rows:
+        yield tuple(encode(row.get(name)) if encode else row.get(name) for name, encode in encoders)
+
+
+def _source_rows(core, table: str) -> Iterator[tuple]:
+    """Tabla completa del origen en tuplas del espejo
+
+    Con PostgresBackend la conversión la hace el servidor (timestamps en UTC
+    y JSONB como texto) y las tuplas llegan del cursor sin pasar por to_json
+    ni por un dict por fila.
+    """
+    if not isinstance(core.backend, PostgresBackend):
+        return _encode(table, core.iter_rows(table, MIRROR_COLUMNS[table]))
+    select = []
+    for name in MIRROR_COLUMNS[table].split(','):
+        if name in TIMESTAMP_COLUMNS:
+            select.append(f"to_char({name} AT TIME ZONE 'UTC', '{PG_UTC_ISO}') AS {name}")
+        elif name in JSON_COLUMNS:
+            select.append(f"{name}::text AS {name}")
+        else:
+            select.append(name)
+    return core.backend.iter_query(f"SELECT {', '.join(select)} FROM {table} ORDER BY created_at, id",
+                                   itersize=SYNC_BATCH_ROWS, cursor_factory=psycopg2.extensions.cursor)
+
+
+def _delta_rows(core, table: str, since: datetime) -> Iterable[Dict[str, Any]]:
+    """Filas del delta
+
+    Con REST se paginan por keyset: rows_since() es una sola respuesta y el
+    límite de filas de PostgREST la recorta si el delta es grande.
+    """
+    column = MIRROR_TABLES[table]
+    if isinstance(core.backend, RestBackend):
+        return core.backend.iter_rows(table, MIRROR_COLUMNS[table],
+                                      f"&{column}=gte.{quote(since.isoformat(), safe='')}")
+    return core.rows_since(table, MIRROR_COLUMNS[table], column, since)
+
+
+def _indexes(table: str = None) -> List[str]:
+    return [f"CREATE INDEX IF NOT EXISTS {name} ON {on} ({columns})"
+            for name, (on, columns) in MIRROR_INDEXES.items() if table in (None, on)]
+
+
+def _schema() -> List[str]:
+    statements = []
+    for table, columns in MIRROR_COLUMNS.items():
+        definition = ', '.join(f"{name} TEXT PRIMARY KEY" if name == 'id' else f"{name} TEXT"
+                               for name in columns.split(','))
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+    statements.append(
+        "CREATE TABLE IF NOT EXISTS mirror_sync "
+        "(table_name TEXT PRIMARY KEY, watermark TEXT, rows INTEGER, synced_at TEXT, source TEXT)"
+    )
+    return statements + _indexes()
+
+
+def _interval(end: Optional[str], start: Optional[str]) -> Optional[str]:
+    """end - start con el formato de un interval de Postgres (1 day 02:03:04.5)"""
+    end_ts, start_ts = parse_timestamp(end), parse_timestamp(start)
+    if end_ts is None or start_ts is None:
+        return None
+    if end_ts.tzinfo is None:
+        end_ts = end_ts.replace(tzinfo=timezone.utc)
+    if start_ts.tzinfo is None:
+        start_ts = start_ts.replace(tzinfo=timezone.utc)
+    delta = end_ts - start_ts
+    sign = "-" if delta.total_seconds() < 0 else ""
+    delta = abs(delta)
+    hours, rest = divmod(delta.seconds, 3600)
+    clock = f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+    if delta.microseconds:
+        clock += f".{delta.microseconds:06d}".rstrip('0')
+    if delta.days:
+        return f"{sign}{delta.days} day{'s' if delta.days != 1 else ''} {clock}"
+    return f"{sign}{clock}"
+
+
+def _now() -> str:
+    return _utc_iso(datetime.now(timezone.utc))
+
+
+def to_sqlite(sql: str) -> str:
+    """SQL de Postgres a SQLite: casts (x::int), restas de timestamps y NOW()
+
+    `->` / `->>` sobre JSON ya funcionan en SQLite (>= 3.38) con la misma sintaxis.
+    """
+    def cast(match):
+        return f"CAST({match.group(1)} AS {CAST_TYPES.get(match.group(2).lower(), 'TEXT')})"
+
+    sql = _PAREN_CAST.sub(cast, sql)
+    sql = _NAME_CAST.sub(cast, sql)
+    return _TIMESTAMP_DIFF.sub(r"pg_interval(\1, \2)", sql)
+
+
+def split_queries(text: str) -> List[Tuple[str, str]]:
+    """Sentencias de un archivo .sql como (título, sql); el título es el último `-- N. TÍTULO`"""
+    queries, lines, title = [], [], None
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('--'):
+            match = _QUERY_TITLE.match(stripped)
+            if match:
+                title = f"{match.group(1)}. {match.group(2)}"
+            continue
+        lines.append(line)
+        statement = '\n'.join(lines).strip()
+        if statement and sqlite3.complete_statement(statement):
+            queries.append((title or f"{len(queries) + 1}.", statement))
+            lines, title = [], None
+    return queries
+
+
+class LocalMirror:
+    """Copia local de MIRROR_TABLES, sincronizada desde cualquier MonitorCore
+
+    La primera sincronización de cada tabla la copia completa; las siguientes
+    piden solo las filas con la columna del delta >= la última vista (menos
+    SYNC_OVERLAP) y hacen upsert por id. Si después el conteo no coincide con
+    el del origen, los assessments borrados se detectan por id (y sus findings
+    se borran con ellos); si aun así no coincide la tabla se copia entera.
+    """
+
+    def __init__(self, path: str = MIRROR_PATH):
+        self.path = path
+        self.conn = None
+
+    def open(self):
+        """Abrir (o crear) el espejo con su esquema e índices"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        # WAL: los monitores leen mientras se sincroniza
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _schema():
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        """Estado de sincronización por tabla: watermark, filas, synced_at y origen"""
+        cursor = self.conn.execute("SELECT table_name, watermark, rows, synced_at, source FROM mirror_sync")
+        return {table: {'watermark': watermark, 'rows': rows, 'synced_at': synced_at, 'source': source}
+                for table, watermark, rows, synced_at, source in cursor}
+
+    def count(self, table: str) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {_mirrored(table)}").fetchone()[0]
+
+    def _watermark(self, table: str) -> Optional[str]:
+        return self.conn.execute(f"SELECT MAX({MIRROR_TABLES[table]}) FROM {_mirrored(table)}").fetchone()[0]
+
+    def _upsert(self, table: str, rows: Iterable[tuple]) -> int:
+        """INSERT ... ON CONFLICT(id) DO UPDATE de tuplas ya codificadas, en lotes de SYNC_BATCH_ROWS"""
+        columns = MIRROR_COLUMNS[table].split(',')
+        updates = ', '.join(f"{name} = excluded.{name}" for name in columns if name != 'id')
+        statement = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                     f"ON CONFLICT(id) DO UPDATE SET {updates}")
+        total, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= SYNC_BATCH_ROWS:
+                self.conn.executemany(statement, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.conn.executemany(statement, batch)
+            total += len(batch)
+        return total
+
+    def _reload(self, core, table: str) -> int:
+        """Copia completa en una transacción: los lectores ven la copia anterior hasta el commit
+
+        Los índices de la tabla se crean al final (una pasada ordenada en vez
+        de actualizarlos fila por fila).
+        """
+        if not self.conn.in_transaction:
+            # sqlite3 no abre la transacción antes de un DROP INDEX: sin BEGIN quedaría confirmado al instante
+            self.conn.execute("BEGIN")
+        for name, (on, _) in MIRROR_INDEXES.items():
+            if on == table:
+                self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+        self.conn.execute(f"DELETE FROM {table}")
+        received = self._upsert(table, _source_rows(core, table))
+        for statement in _indexes(table):
+            self.conn.execute(statement)
+        return received
+
+    def _pull(self, core, table: str, since: str) -> int:
+        """Upsert de las filas con la columna del delta >= since - SYNC_OVERLAP"""
+        return self._upsert(table, _encode(table, _delta_rows(core, table, parse_timestamp(since) - SYNC_OVERLAP)))
+
+    def _matches(self, core, table: str) -> bool:
+        remote = core.count(table)
+        return remote is None or remote == self.count(table)
+
+    def _delete(self, table: str, column: str, values: List[str]) -> int:
+        return self.conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(value,) for value in values]).rowcount
+
+    def _prune_assessments(self, core) -> List[str]:
+        """Borrar del espejo los assessments que ya no están en el origen; retorna sus ids"""
+        remote = {row['id'] for row in core.iter_rows('assessments', 'id')}
+        # Un listado incompleto (p.ej. un error de red a mitad) borraría assessments vigentes
+        if len(remote) != core.count('assessments'):
+            return []
+        gone = [assessment_id for (assessment_id,) in self.conn.execute("SELECT id FROM assessments")
+                if assessment_id not in remote]
+        self._delete('assessments', 'id', gone)
+        return gone
+
+    def sync(self, core, full: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Sincronizar MIRROR_TABLES desde `core`
+
+        Por tabla retorna el modo (full o delta), las filas recibidas y
+        borradas, el total en el espejo y los segundos.
+        """
+        results, pruned = {}, []
+        try:
+            for table in MIRROR_TABLES:
+                started = time.perf_counter()
+                since = None if full else self.state().get(table, {}).get('watermark')
+                deleted = 0
+                if since is None:
+                    mode, received = 'full', self._reload(core, table)
+                else:
+                    mode, received = 'delta', self._pull(core, table, since)
+                    if table == 'findings' and pruned:
+                        # Los findings de los assessments borrados (ON DELETE CASCADE en el origen)
+                        deleted += self._delete('findings', 'assessment_id', pruned)
+                    if not self._matches(core, table):
+                        # Otra vuelta por si entraron filas entre el delta y el conteo
+                        received += self._pull(core, table, self._watermark(table) or since)
+                    if table == 'assessments' and not self._matches(core, table):
+                        pruned = self._prune_assessments(core)
+                        deleted += len(pruned)
+                    if not self._matches(core, table):
+                        mode, received, deleted = 'full', self._reload(core, table), 0
+
+                rows = self.count(table)
+                self.conn.execute(
+                    "INSERT INTO mirror_sync (table_name, watermark, rows, synced_at, source) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(table_name) DO UPDATE SET watermark = excluded.watermark, rows = excluded.rows, "
+                    "synced_at = excluded.synced_at, source = excluded.source",
+                    (table, self._watermark(table), rows, _now(), core.backend.name)
+                )
+                self.conn.commit()
+                results[table] = {'mode': mode, 'received': received, 'deleted': deleted, 'rows': rows,
+                                  'seconds': time.perf_counter() - started}
+        except Exception:
+            # Sin el rollback la próxima sincronización seguiría esta transacción con la copia a medias
+            self.conn.rollback()
+            raise
+        return results
+
+
+def _mirrored(table: str) -> str:
+    if _check_table(table) not in MIRROR_TABLES:
+        raise ValueError(f"{table} no está en el espejo local")
+    return table
+
+
+class SqliteBackend(MonitorBackend):
+    """Espejo local de LocalMirror, en solo lectura
+
+    Las filas salen con los mismos tipos que PostgREST (timestamps en texto
+    ISO, JSONB decodificado) y los conteos con las mismas queries que
+    PostgresBackend, resueltas con los índices del espejo.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str = MIRROR_PATH):
+        self.path = path
+        self.conn = None
+        self.queries = 0
+        self.db_time = 0.0
+
+    def connect(self):
+        """Abrir el espejo (lanza sqlite3.Error si no existe: hay que sincronizarlo antes)"""
+        self.conn = sqlite3.connect(f"file:{quote(os.path.abspath(self.path))}?mode=ro", uri=True,
+                                    check_same_thread=False)
+        self.conn.create_function("now", 0, _now)
+        self.conn.create_function("pg_interval", 2, _interval, deterministic=True)
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def _timed(self, query: str, params: tuple = (), consume=sqlite3.Cursor.fetchall) -> Any:
+        """Ejecutar query y consumir el cursor contando el tiempo (SQLite calcula las filas al leerlas)"""
+        started = time.perf_counter()
+        try:
+            return consume(self.conn.execute(query, params))
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    @staticmethod
+    def _decode(cursor: sqlite3.Cursor) -> Iterator[Dict[str, Any]]:
+        names = [column[0] for column in cursor.description]
+        decoders = [json.loads if name in JSON_COLUMNS else None for name in names]
+        for values in cursor:
+            yield {name: decode(value) if decode and value is not None else value
+                   for name, decode, value in zip(names, decoders, values)}
+
+    def _rows(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        return self._timed(query, params, lambda cursor: list(self._decode(cursor)))
+
+    def _call(self, method: str, *args) -> Any:
+        return _shape(method, self._rows(SQLITE_QUERIES[method], args))
+
+    def status_counts(self) -> Dict[str, int]:
+        return self._call('status_counts')
+
+    def severity_counts(self) -> Dict[str, int]:
+        return self._call('severity_counts')
+
+    def category_counts(self) -> Dict[str, Dict[str, int]]:
+        return self._call('category_counts')
+
+    def category_batches(self) -> List[Dict[str, Any]]:
+        return self._call('category_batches')
+
+    def assessments(self) -> List[Dict[str, Any]]:
+        return self._call('assessments')
+
+    def active_assessments(self) -> List[Dict[str, Any]]:
+        return self._call('active_assessments')
+
+    def latest_findings(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._call('latest_findings', limit)
+
+    def count(self, table: str) -> Optional[int]:
+        if _check_table(table) not in MIRROR_TABLES:
+            return None
+        return self._timed(f"SELECT COUNT(*) FROM {table}", (), sqlite3.Cursor.fetchone)[0]
+
+    def iter_rows(self, table: str, columns: str = "*") -> Iterator[Dict[str, Any]]:
+        # En streaming: solo se contabiliza la ejecución, las filas se leen a medida que se piden
+        cursor = self._timed(f"SELECT {_sql_columns(columns)} FROM {_mirrored(table)} ORDER BY created_at, id",
+                             (), lambda cursor: cursor)
+        return self._decode(cursor)
+
+    def rows_since(self, table: str, columns: str, column: str, since: datetime) -> List[Dict[str, Any]]:
+        column = _sql_columns(column)
+        return self._rows(
+            f"SELECT {_sql_columns(columns)} FROM {_mirrored(table)} WHERE {column} >= ? ORDER BY {column}",
+            (_utc_iso(since),)
+        )
+
+    def findings_snapshot(self, columns: str = SNAPSHOT_COLUMNS) -> FindingsSnapshot:
+        """Tuplas del cursor directo a las columnas, sin un dict por fila"""
+        snapshot = FindingsSnapshot(columns)
+        return self._timed(f"SELECT {_sql_columns(snapshot.projection)} FROM findings", (), snapshot.extend_tuples)
+
+    def run_sql(self, sql: str, params: tuple = ()) -> Tuple[List[str], List[tuple]]:
+        """(columnas, filas) de una query de Postgres traducida con to_sqlite()"""
+        return self._timed(to_sqlite(sql), params,
+                           lambda cursor: ([column[0] for column in cursor.description or ()], cursor.fetchall()))
+
+    def sync_state(self) -> Dict[str, Dict[str, Any]]:
+        """Filas y última sincronización de cada tabla del espejo"""
+        cursor = self.conn.execute("SELECT table_name, rows, synced_at FROM mirror_sync")
+        return {table: {'rows': rows, 'synced_at': synced_at} for table, rows, synced_at in cursor}
+
+    def stats(self) -> Dict[str, Any]:
+        synced = [state['synced_at'] for state in self.sync_state().values() if state['synced_at']]
+        return {'queries': self.queries, 'db_time_ms': round(self.db_time * 1000, 1),
+                'synced_at': min(synced) if synced else None}
+
+    def format_stats(self) -> str:
+        synced_at = parse_timestamp(self.stats()['synced_at'])
+        age = f"hace {format_duration((datetime.now(timezone.utc) - synced_at).total_seconds())}" \
+            if synced_at else "nunca"
+        return f"{self.db_time * 1000:.1f} ms en el espejo local, {self.queries} queries (sincronizado {age})"
@@ -0,0 +1,127 @@
+"""
+Latencia por categoría del pipeline de análisis, reconstruida desde el monitor
+
+analyze-assessment procesa las categorías en el orden de
+analysis_progress.categories e inserta los findings de cada una en un solo
+batch al terminarla. Con eso:
+
+    fin(categoría)    = finished_at de su batch (category_batches()), el
+                        completed_at si es la última sin findings, o la
+                        transición de analysis_progress.current observada
+    inicio(categoría) = transición observada a esa categoría, o el fin de la
+                        categoría anterior en el orden
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from .common import parse_timestamp, percentile
+
+# Sufijo que agrega analyze-assessment a `current` en los reintentos
+RETRY_SUFFIX = re.compile(r'\s*\(Intento \d+/\d+\)$')
+
+
+def _epoch(value: Any) -> Optional[float]:
+    ts = parse_timestamp(value)
+    return ts.timestamp() if ts else None
+
+
+class CategoryProfiler:
+    """Intervalos (inicio, fin) por (assessment, categoría) y sus percentiles por categoría"""
+
+    def __init__(self, include_first: bool = False):
+        # La primera categoría solo tiene el created_at del assessment como inicio,
+        # que incluye la subida y la cola: se excluye salvo que se pida
+        self.include_first = include_first
+        self.orders: Dict[Any, List[str]] = {}
+        self.names: Dict[Any, Dict[str, str]] = {}
+        self.created: Dict[Any, float] = {}
+        self.completed: Dict[Any, float] = {}
+        self.ends: Dict[tuple, float] = {}
+        self.observed_starts: Dict[tuple, float] = {}
+        self.observed_ends: Dict[tuple, float] = {}
+        self._current: Dict[Any, Optional[str]] = {}
+
+    def add_assessment(self, row: Dict[str, Any]):
+        """Orden de categorías, created_at y completed_at de un assessment (ASSESSMENT_COLUMNS)"""
+        categories = (row.get('analysis_progress') or {}).get('categories') or []
+        assessment_id = row['id']
+        if categories:
+            self.orders[assessment_id] = [category['id'] for category in categories]
+            self.names[assessment_id] = {category.get('name'): category['id'] for category in categories}
+        created, completed = _epoch(row.get('created_at')), _epoch(row.get('completed_at'))
+        if created:
+            self.created[assessment_id] = created
+        if completed:
+            self.completed[assessment_id] = completed
+
+    def add_batch(self, assessment_id: Any, category_id: str, finished_at: Any):
+        """Fin de una categoría según el batch de findings que insertó"""
+        at = _epoch(finished_at)
+        if at is not None:
+            self.ends[(assessment_id, category_id)] = at
+
+    def observe(self, row: Dict[str, Any]):
+        """Registrar analysis_progress.current de una versión de assessment (modo --watch)"""
+        assessment_id = row['id']
+        self.add_assessment(row)
+        current = (row.get('analysis_progress') or {}).get('current')
+        category = self.names.get(assessment_id, {}).get(RETRY_SUFFIX.sub('', current or ''))
+        at = _epoch(row.get('updated_at'))
+        if at is None:
+            return
+
+        if assessment_id in self._current:
+            previous = self._current[assessment_id]
+            # Solo una transición vista da un inicio exacto (no la primera muestra)
+            if category != previous:
+                if previous:
+                    self.observed_ends.setdefault((assessment_id, previous), at)
+                if category:
+                    self.observed_starts.setdefault((assessment_id, category), at)
+        self._current[assessment_id] = category
+
+    def _end(self, assessment_id: Any, order: List[str], index: int) -> Optional[float]:
+        key = (assessment_id, order[index])
+        if key in self.ends:
+            return self.ends[key]
+        if key in self.observed_ends:
+            return self.observed_ends[key]
+        if index == len(order) - 1:
+            return self.completed.get(assessment_id)
+        return None
+
+    def intervals(self) -> Dict[str, List[float]]:
+        """Segundos por categoría, uno por assessment en el que se pudo reconstruir"""
+        latencies: Dict[str, List[float]] = {}
+        for assessment_id, order in self.orders.items():
+            for index, category in enumerate(order):
+                end = self._end(assessment_id, order, index)
+                if end is None:
+                    continue
+                start = self.observed_starts.get((assessment_id, category))
+                if start is None and index > 0:
+                    start = self._end(assessment_id, order, index - 1)
+                if start is None and index == 0 and self.include_first:
+                    start = self.created.get(assessment_id)
+                if start is not None and end >= start:
+                    latencies.setdefault(category, []).append(end - start)
+        return latencies
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Percentiles por categoría, de la más lenta (p50) a la más rápida"""
+        latencies = self.intervals()
+        grand_total = sum(sum(values) for values in latencies.values()) or 1.0
+        rows = [{
+            'category_id': category,
+            'samples': len(values),
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p95': percentile(values, 95),
+            'max': max(values),
+            'mean': sum(values) / len(values),
+            'total': sum(values),
+            'share': sum(values) * 100 / grand_total,
+        } for category, values in latencies.items()]
+        rows.sort(key=lambda row: row['p50'], reverse=True)
+        return rows
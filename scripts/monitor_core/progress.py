@@ -0,0 +1,151 @@
+"""
+Ritmo, latencia por categoría y ETA de los análisis en curso
+
+ProgressTracker muestrea el analysis_progress (completed, total, current) y el
+updated_at de cada assessment activo en un ring buffer acotado; la memoria no
+crece con la duración de la sesión y los assessments que dejan de estar activos
+se olvidan.
+"""
+
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set
+
+from .common import ACTIVE_STATUSES, parse_timestamp
+
+HISTORY_SIZE = 60  # muestras por assessment (ring buffer)
+EWMA_ALPHA = 0.3  # peso de la última latencia en la media móvil exponencial
+STALL_AFTER = 300  # segundos sin que avance updated_at para marcar un análisis como detenido
+
+
+class ProgressSample(NamedTuple):
+    at: float  # updated_at (epoch, reloj del servidor)
+    completed: int
+    total: int
+    current: Optional[str]
+
+
+class AssessmentProgress:
+    """Historial acotado y estimaciones de un assessment"""
+
+    __slots__ = ('samples', 'latency', 'last_updated', 'last_completion_at', 'last_advance')
+
+    def __init__(self, history_size: int, last_advance: float):
+        self.samples = deque(maxlen=history_size)
+        self.latency = None  # EWMA de segundos por categoría
+        self.last_updated = None
+        self.last_completion_at = None
+        # Reloj local (monotonic) del último avance de updated_at: no depende del desfase con el servidor
+        self.last_advance = last_advance
+
+
+class ProgressTracker:
+    """Historial de analysis_progress por assessment activo"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE, alpha: float = EWMA_ALPHA,
+                 stall_after: float = STALL_AFTER):
+        self.history_size = history_size
+        self.alpha = alpha
+        self.stall_after = stall_after
+        self.tracks: Dict[Any, AssessmentProgress] = {}
+
+    def observe(self, row: Dict[str, Any]):
+        """Registrar una fila de assessment (id, status, updated_at, analysis_progress)"""
+        if row.get('status') not in ACTIVE_STATUSES:
+            self.forget(row.get('id'))
+            return
+
+        updated = parse_timestamp(row.get('updated_at'))
+        if updated is None:
+            return
+        if updated.tzinfo is None:
+            updated = updated.replace(tzinfo=timezone.utc)
+
+        track = self.tracks.get(row['id'])
+        if track is None:
+            # Al empezar a observarlo, el análisis puede llevar tiempo sin avanzar
+            age = max((datetime.now(timezone.utc) - updated).total_seconds(), 0.0)
+            track = self.tracks[row['id']] = AssessmentProgress(self.history_size, time.monotonic() - age)
+        elif track.last_updated is not None and updated <= track.last_updated:
+            return  # misma versión (p.ej. el solapamiento de la marca de agua)
+
+        progress = row.get('analysis_progress') or {}
+        sample = ProgressSample(
+            at=updated.timestamp(),
+            completed=int(progress.get('completed') or 0),
+            total=int(progress.get('total') or 0),
+            current=progress.get('current'),
+        )
+
+        if track.last_updated is not None:
+            track.last_advance = time.monotonic()
+        track.last_updated = updated
+
+        previous = track.samples[-1] if track.samples else None
+        if previous is None or sample.completed < previous.completed:
+            # Primera muestra o análisis reiniciado: se descarta la historia
+            track.samples.clear()
+            track.latency = None
+            track.last_completion_at = sample.at
+        elif sample.completed > previous.completed:
+            latency = (sample.at - track.last_completion_at) / (sample.completed - previous.completed)
+            track.latency = latency if track.latency is None else \
+                self.alpha * latency + (1 - self.alpha) * track.latency
+            track.last_completion_at = sample.at
+        track.samples.append(sample)
+
+    def forget(self, assessment_id: Any):
+        self.tracks.pop(assessment_id, None)
+
+    def prune(self, active_ids: Iterable[Any]):
+        """Olvidar los assessments que ya no están (p.ej. tras una recarga completa)"""
+        keep = set(active_ids)
+        for assessment_id in [key for key in self.tracks if key not in keep]:
+            del self.tracks[assessment_id]
+
+    def is_stalled(self, track: AssessmentProgress) -> bool:
+        return time.monotonic() - track.last_advance > self.stall_after
+
+    def stalled_ids(self) -> Set[Any]:
+        return {assessment_id for assessment_id, track in self.tracks.items() if self.is_stalled(track)}
+
+    def estimate(self, assessment_id: Any) -> Optional[Dict[str, Any]]:
+        """Ritmo (categorías/min), latencia EWMA por categoría, ETA y si está detenido"""
+        track = self.tracks.get(assessment_id)
+        if track is None or not track.samples:
+            return None
+
+        first, last = track.samples[0], track.samples[-1]
+        elapsed = last.at - first.at
+        rate = (last.completed - first.completed) * 60 / elapsed if elapsed > 0 else None
+
+        remaining = max(last.total - last.completed, 0)
+        if track.latency is not None:
+            eta = remaining * track.latency
+        elif rate:
+            eta = remaining * 60 / rate
+        else:
+            eta = 0.0 if remaining == 0 and last.total else None
+
+        return {
+            'completed': last.completed,
+            'total': last.total,
+            'current': last.current,
+            'rate_per_min': rate,
+            'category_latency': track.latency,
+            'eta_seconds': eta,
+            'stalled': self.is_stalled(track),
+        }
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Duración corta para tablas: 45s, 12m 30s, 3h 05m"""
+    if seconds is None:
+        return "--"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
@@ -0,0 +1,193 @@
+"""
+Varias instancias de Supabase: lista de targets y consultas en paralelo
+
+Los targets salen de --targets o de la variable MONITOR_TARGETS (ruta a un
+archivo JSON o el JSON mismo):
+
+    [
+      {"name": "prod", "url": "http://10.10.10.77:8000", "key": "...",
+       "db": {"host": "10.10.10.77", "password": "..."}},
+      {"name": "staging", "url": "http://10.10.10.78:8000"}
+    ]
+
+Lo que falte en un target (key, usuario, puerto, base...) se toma de la
+configuración del script. FanOut consulta todos los targets en paralelo (un
+hilo daemon por target y ronda) con un plazo por target: uno lento o caído
+queda como timeout/error y los demás responden igual. Mientras su consulta
+anterior siga en curso no se le lanza otra, así un target colgado ocupa como
+mucho un hilo y nunca retrasa la salida del proceso.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .common import parse_timestamp
+
+TARGETS_ENV = "MONITOR_TARGETS"
+TARGET_TIMEOUT = 8  # segundos de plazo por target en cada ronda
+DB_CONNECT_TIMEOUT = 5  # segundos para conectar a la BD de un target (si no trae connect_timeout)
+
+
+class Target(NamedTuple):
+    name: str
+    url: Optional[str] = None
+    key: Optional[str] = None
+    db: Optional[Dict[str, Any]] = None
+
+    def db_config(self, defaults: Dict[str, Any]) -> Dict[str, Any]:
+        """DB_CONFIG del script con lo que defina el target encima"""
+        if not self.db:
+            raise ValueError(f"El target '{self.name}' no tiene configuración 'db'")
+        return {'connect_timeout': DB_CONNECT_TIMEOUT, **defaults, **self.db}
+
+
+class TargetResult(NamedTuple):
+    name: str
+    status: str  # ok | timeout | error | busy
+    value: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'ok'
+
+
+def load_targets(spec: Optional[str] = None) -> List[Target]:
+    """Targets de `spec` o de MONITOR_TARGETS ([] si no hay ninguno configurado)"""
+    spec = spec or os.environ.get(TARGETS_ENV)
+    if not spec:
+        return []
+    if os.path.exists(spec):
+        with open(spec) as f:
+            entries = json.load(f)
+    else:
+        entries = json.loads(spec)
+
+    targets, names = [], set()
+    for i, entry in enumerate(entries, 1):
+        name = entry.get('name') or f"target{i}"
+        if name in names:
+            raise ValueError(f"Target duplicado: {name}")
+        names.add(name)
+        targets.append(Target(name, entry.get('url'), entry.get('key'), entry.get('db')))
+    return targets
+
+
+def _submit(name: str, call: Callable[[Any], Any], item: Any) -> Future:
+    """Ejecutar call(item) en un hilo daemon; el Future trae (valor, segundos)"""
+    future = Future()
+
+    def worker():
+        if not future.set_running_or_notify_cancel():
+            return
+        started = time.perf_counter()
+        try:
+            future.set_result((call(item), time.perf_counter() - started))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=worker, name=f"monitor-target-{name}", daemon=True).start()
+    return future
+
+
+class FanOut:
+    """Ejecuta la misma llamada sobre cada target en paralelo, con plazo por target"""
+
+    def __init__(self, items: Dict[str, Any], timeout: float = TARGET_TIMEOUT):
+        self.items = items  # nombre -> objeto del target (core, monitor...)
+        self.timeout = timeout
+        self.pending: Dict[str, Future] = {}  # consultas que vencieron el plazo y siguen en curso
+        self.last: Dict[str, TargetResult] = {}  # último resultado ok de cada target
+
+    def run(self, call: Callable[[Any], Any]) -> Dict[str, TargetResult]:
+        """Una ronda: resultados por target en el orden de `items`, sin esperar más de `timeout`"""
+        started = time.monotonic()
+        futures, results = {}, {}
+        for name, item in self.items.items():
+            previous = self.pending.get(name)
+            if previous is not None and not previous.done():
+                results[name] = TargetResult(name, 'busy', error="la consulta anterior sigue en curso")
+                continue
+            self.pending.pop(name, None)
+            futures[name] = _submit(name, call, item)
+
+        deadline = started + self.timeout
+        for name, future in futures.items():
+            try:
+                value, elapsed = future.result(timeout=max(deadline - time.monotonic(), 0))
+                results[name] = self.last[name] = TargetResult(name, 'ok', value, elapsed=elapsed)
+            except FutureTimeout:
+                self.pending[name] = future
+                results[name] = TargetResult(name, 'timeout', error=f"sin respuesta en {self.timeout:g} s",
+                                             elapsed=self.timeout)
+            except Exception as e:
+                message = str(e).strip().splitlines()
+                results[name] = TargetResult(name, 'error', error=message[0] if message else type(e).__name__,
+                                             elapsed=time.monotonic() - started)
+        return {name: results[name] for name in self.items}
+
+    def values(self, results: Dict[str, TargetResult], stale: bool = True) -> Dict[str, Any]:
+        """Valor por target; con `stale` los que fallaron aportan su último resultado ok"""
+        values = {}
+        for name, result in results.items():
+            if result.ok:
+                values[name] = result.value
+            elif stale and name in self.last:
+                values[name] = self.last[name].value
+        return values
+
+
+def merge_counts(counts: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """Suma de conteos agrupados (status_counts, severity_counts...)"""
+    merged: Dict[str, int] = {}
+    for by_key in counts:
+        for key, count in by_key.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+def _epoch(value: Any) -> float:
+    """Orden cronológico entre instancias (timestamps con distinto offset, o sin zona = UTC)"""
+    ts = parse_timestamp(value)
+    if ts is None:
+        return float('-inf')
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def merge_rows(rows_by_target: Dict[str, List[Dict[str, Any]]], sort_key: str = 'created_at',
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Filas de todos los targets (con su 'instance'), de la más reciente a la más antigua"""
+    merged = [{**row, 'instance': name} for name, rows in rows_by_target.items() for row in rows]
+    merged.sort(key=lambda row: _epoch(row.get(sort_key)), reverse=True)
+    return merged[:limit] if limit is not None else merged
+
+
+def merge_snapshots(snapshots: Dict[str, Dict[str, Any]], latest_limit: int = 10) -> Dict[str, Any]:
+    """Snapshot global (MonitorCore.snapshot) a partir del de cada target"""
+    return {
+        'status_summary': merge_counts(s['status_summary'] for s in snapshots.values()),
+        'severity_summary': merge_counts(s['severity_summary'] for s in snapshots.values()),
+        'assessments': merge_rows({name: s['assessments'] for name, s in snapshots.items()}),
+        'latest_findings': merge_rows({name: s['latest_findings'] for name, s in snapshots.items()},
+                                      limit=latest_limit),
+    }
+
+
+def merge_live_stats(stats: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Estadísticas globales del dashboard (MonitorCore.live_stats) a partir de las de cada target"""
+    return {
+        'total_assessments': sum(s['total_assessments'] for s in stats.values()),
+        'total_findings': sum(s['total_findings'] for s in stats.values()),
+        'status_counts': merge_counts(s['status_counts'] for s in stats.values()),
+        'severity_counts': merge_counts(s['severity_counts'] for s in stats.values()),
+        'active_assessments': merge_rows({name: s['active_assessments'] for name, s in stats.items()}),
+        'delta_rows': sum(s.get('delta_rows', 0) for s in stats.values()),
+    }
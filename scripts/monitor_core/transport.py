@@ -0,0 +1,153 @@
+"""
+Transporte HTTP del backend REST (RestBackend)
+
+Una sola requests.Session con pool de conexiones keep-alive, reintentos
+acotados con backoff, timeout por petición, gzip y contadores de latencia
+y reutilización de conexiones.
+"""
+
+import time
+from typing import Any, Dict, Iterator
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configuración
+DEFAULT_TIMEOUT = 10  # segundos por petición
+POOL_SIZE = 10  # conexiones keep-alive por host
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s entre reintentos
+RETRY_STATUSES = (429, 502, 503, 504)
+KEYSET_PAGE_SIZE = 1000  # filas por página en iter_rows
+STREAM_CHUNK_SIZE = 1024 * 1024  # bytes por bloque en stream()
+
+
+class HttpTransport:
+    """Sesión HTTP instrumentada contra la API de Supabase"""
+
+    def __init__(self, url: str, key: str, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = MAX_RETRIES, pool_size: int = POOL_SIZE):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip"
+        }
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        # Contadores
+        self.request_count = 0
+        self.error_count = 0
+        self.bytes_received = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def request(self, method: str, path: str, headers: Dict[str, str] = None,
+                timeout: float = None, stream: bool = False) -> requests.Response:
+        """Petición contabilizada; `path` es relativo a la URL base (p.ej. rest/v1/findings)"""
+        url = path if path.startswith(('http://', 'https://')) else f"{self.url}/{path.lstrip('/')}"
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, headers=headers, timeout=timeout or self.timeout,
+                                            stream=stream)
+        except requests.exceptions.RequestException:
+            self.error_count += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.total_latency += elapsed
+            self.max_latency = max(self.max_latency, elapsed)
+            self.request_count += 1
+
+        # Bytes en la red (comprimidos si el servidor respondió con gzip); en streaming los cuenta stream()
+        if not stream:
+            self.bytes_received += int(response.headers.get('Content-Length') or len(response.content))
+        if response.status_code >= 400:
+            self.error_count += 1
+            response.close()
+        response.raise_for_status()
+        return response
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request('GET', path, **kwargs)
+
+    def head(self, path: str, **kwargs) -> requests.Response:
+        return self.request('HEAD', path, **kwargs)
+
+    def stream(self, path: str, headers: Dict[str, str] = None,
+               chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """GET en streaming: el cuerpo llega en bloques y nunca se carga entero en memoria"""
+        response = self.request('GET', path, headers=headers, stream=True)
+        with response:
+            for block in response.iter_content(chunk_size):
+                self.bytes_received += len(block)
+                yield block
+
+    def iter_rows(self, table: str, select: str = "*", filters: str = "",
+                  page_size: int = KEYSET_PAGE_SIZE, key: str = "created_at") -> Iterator[Dict[str, Any]]:
+        """Recorrer una tabla de PostgREST por keyset (key, id), página a página
+
+        Cada página se parsea al llegar y se descarta después de entregar sus
+        filas: la memoria no depende del tamaño de la tabla y el recorrido no se
+        corta en el max-rows del servidor (solo termina con una página vacía).
+        `filters` no debe incluir su propio `or=`.
+        """
+        if select != "*":
+            columns = select.split(',')
+            select = ','.join(columns + [column for column in (key, 'id') if column not in columns])
+
+        after = ""
+        while True:
+            page = self.get(
+                f"rest/v1/{table}?select={select}{filters}{after}&order={key}.asc,id.asc&limit={page_size}"
+            ).json()
+            if not page:
+                return
+            yield from page
+
+            last = page[-1]
+            cursor = f'({key}.gt."{last[key]}",and({key}.eq."{last[key]}",id.gt.{last["id"]}))'
+            # El `gte` redundante es el que usa el índice de `key`: el `or` solo no
+            # acota el rango y cada página volvería a recorrer la tabla desde el inicio
+            after = f"&{key}=gte.{quote(str(last[key]), safe='')}&or={quote(cursor, safe='')}"
+
+    def stats(self) -> Dict[str, Any]:
+        """Latencia y reutilización de conexiones acumuladas"""
+        pools = self.adapter.poolmanager.pools
+        connections = sum(pools[key].num_connections for key in pools.keys())
+        return {
+            'requests': self.request_count,
+            'errors': self.error_count,
+            'bytes': self.bytes_received,
+            'avg_latency_ms': round(self.total_latency * 1000 / max(self.request_count, 1), 1),
+            'max_latency_ms': round(self.max_latency * 1000, 1),
+            'new_connections': connections,
+            'reused_connections': max(self.request_count - connections, 0)
+        }
+
+    def format_stats(self) -> str:
+        """Resumen de una línea para imprimir al final de un reporte"""
+        stats = self.stats()
+        return (f"{stats['requests']} peticiones ({stats['errors']} errores), "
+                f"{stats['bytes'] / 1024:.1f} KB, "
+                f"latencia media {stats['avg_latency_ms']} ms (máx {stats['max_latency_ms']} ms), "
+                f"conexiones nuevas {stats['new_connections']} / reutilizadas {stats['reused_connections']}")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,276 @@
+"""
+Histórico de los snapshots de los monitores (series de tiempo en SQLite)
+
+Cada snapshot (assessments por estado, findings por severidad, progreso de
+los análisis activos) se guarda como un punto por serie en `points_raw`. Al
+cerrar cada minuto y cada hora los puntos se resumen (mín, máx, suma,
+cantidad y último valor) en `points_1m` y `points_1h`, y cada resolución se
+poda según su retención, así que el archivo crece hasta un tope fijo aunque
+los monitores corran meses. Una consulta de una semana lee los resúmenes
+por hora: unas pocas filas por serie.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .common import ACTIVE_STATUSES, calculate_progress
+
+# Archivo del histórico (por defecto: variable MONITOR_TRENDS)
+TRENDS_ENV = "MONITOR_TRENDS"
+TRENDS_PATH = os.environ.get(TRENDS_ENV, "monitor_trends.sqlite3")
+
+RAW_INTERVAL = 10  # segundos mínimos entre puntos crudos (los monitores en vivo pueden refrescar cada segundo)
+
+# Resoluciones de la más fina a la más gruesa: (nombre, segundos por punto, retención en segundos)
+RESOLUTIONS = (
+    ('raw', RAW_INTERVAL, 6 * 3600),
+    ('1m', 60, 7 * 86400),
+    ('1h', 3600, 400 * 86400),
+)
+MAX_POINTS = 1500  # con resolution='auto', la más fina que no pase de estos puntos por serie
+BUSY_TIMEOUT = 5.0  # segundos de espera si otro monitor está escribiendo
+
+
+class TrendPoint(NamedTuple):
+    """Un punto (o el resumen de un intervalo) de una serie"""
+    ts: int
+    min: float
+    max: float
+    sum: float
+    count: int
+    last: float
+
+    @property
+    def avg(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+def trend_sample(status_counts: Dict[str, int], severity_counts: Dict[str, int],
+                 active: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    """Valores de un snapshot por serie
+
+    `active` acepta las filas de REST (con analysis_progress) y las de
+    monitor_db (con completed y progress_percentage).
+    """
+    sample = {'assessments.total': sum(status_counts.values()),
+              'assessments.backlog': sum(status_counts.get(status, 0) for status in ACTIVE_STATUSES),
+              'findings.total': sum(severity_counts.values())}
+    for status, count in status_counts.items():
+        sample[f'assessments.status.{status}'] = count
+    for severity, count in severity_counts.items():
+        sample[f'findings.severity.{severity}'] = count
+
+    progress, completed = [], 0
+    for row in active:
+        if 'progress_percentage' in row:
+            progress.append(float(row['progress_percentage'] or 0))
+            completed += int(row.get('completed') or 0)
+        else:
+            analysis = row.get('analysis_progress') or {}
+            progress.append(calculate_progress(analysis))
+            completed += int(analysis.get('completed') or 0)
+    sample['active.count'] = len(progress)
+    sample['active.progress_pct'] = sum(progress) / len(progress) if progress else 0.0
+    sample['active.categories_completed'] = completed
+    return sample
+
+
+def _schema() -> List[str]:
+    # Clave (ts, series_id): resúmenes, poda y consultas son rangos de ts
+    statements = [
+        "CREATE TABLE IF NOT EXISTS trend_series (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "CREATE TABLE IF NOT EXISTS trend_state (key TEXT PRIMARY KEY, value INTEGER)",
+        "CREATE TABLE IF NOT EXISTS points_raw (series_id INTEGER NOT NULL, ts INTEGER NOT NULL, "
+        "value REAL, PRIMARY KEY (ts, series_id)) WITHOUT ROWID",
+    ]
+    for name, _, _ in RESOLUTIONS[1:]:
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS points_{name} (series_id INTEGER NOT NULL, ts INTEGER NOT NULL, "
+            "min_value REAL, max_value REAL, sum_value REAL, samples INTEGER, last_value REAL, "
+            "PRIMARY KEY (ts, series_id)) WITHOUT ROWID"
+        )
+    return statements
+
+
+def _point_columns(name: str) -> str:
+    if name == 'raw':
+        return "ts, value, value, value, 1, value"
+    return "ts, min_value, max_value, sum_value, samples, last_value"
+
+
+def _rollup_sql(name: str, step: int, source: str) -> str:
+    """INSERT de los resúmenes de `name` a partir de la resolución anterior, para ts en [?, ?)"""
+    if source == 'raw':
+        aggregates, last = "MIN(value), MAX(value), SUM(value), COUNT(*)", "value"
+    else:
+        aggregates, last = "MIN(min_value), MAX(max_value), SUM(sum_value), SUM(samples)", "last_value"
+    return f"""
+        INSERT OR REPLACE INTO points_{name} (series_id, ts, min_value, max_value, sum_value, samples, last_value)
+        SELECT series_id, bucket, {aggregates}, MAX(CASE WHEN rn = 1 THEN {last} END)
+        FROM (SELECT *, ts - ts % {step} AS bucket,
+                     ROW_NUMBER() OVER (PARTITION BY series_id, ts - ts % {step} ORDER BY ts DESC) AS rn
+              FROM points_{source} WHERE ts >= ? AND ts < ?)
+        GROUP BY series_id, bucket
+    """
+
+
+def _regroup(points: List[TrendPoint], step: int) -> List[TrendPoint]:
+    """Puntos ordenados de una resolución fina resumidos en intervalos de `step` segundos"""
+    grouped: List[TrendPoint] = []
+    for point in points:
+        bucket = point.ts - point.ts % step
+        if grouped and grouped[-1].ts == bucket:
+            last = grouped[-1]
+            grouped[-1] = TrendPoint(bucket, min(last.min, point.min), max(last.max, point.max),
+                                     last.sum + point.sum, last.count + point.count, point.last)
+        else:
+            grouped.append(point._replace(ts=bucket))
+    return grouped
+
+
+class TrendStore:
+    """Series de tiempo de los snapshots, con resúmenes por minuto y por hora y retención"""
+
+    def __init__(self, path: str = TRENDS_PATH):
+        self.path = path
+        self.conn = None
+        self.series: Dict[str, int] = {}
+        self.last_record = 0
+        self.errors = 0
+
+    def open(self) -> 'TrendStore':
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # check_same_thread=False: el exporter registra desde su hilo de refresco
+        self.conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # WAL: varios monitores pueden escribir el mismo histórico y `show` leerlo mientras tanto
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _schema():
+            self.conn.execute(statement)
+        self.conn.commit()
+        self.series = {name: series_id for series_id, name in self.conn.execute("SELECT id, name FROM trend_series")}
+        return self
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def _series_id(self, name: str) -> int:
+        series_id = self.series.get(name)
+        if series_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO trend_series (name) VALUES (?)", (name,))
+            series_id = self.series[name] = self.conn.execute(
+                "SELECT id FROM trend_series WHERE name = ?", (name,)).fetchone()[0]
+        return series_id
+
+    def _state(self, key: str) -> Optional[int]:
+        row = self.conn.execute("SELECT value FROM trend_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value: int):
+        self.conn.execute("INSERT OR REPLACE INTO trend_state (key, value) VALUES (?, ?)", (key, value))
+
+    def record(self, sample: Dict[str, float], at: float = None) -> bool:
+        """Guardar un snapshot (serie -> valor); False si llegó antes de RAW_INTERVAL o si falló
+
+        Un error (p.ej. el archivo bloqueado más de BUSY_TIMEOUT) se cuenta
+        en `errors` y no se propaga: el histórico no debe tumbar al monitor.
+        """
+        now = int(time.time() if at is None else at)
+        if now - self.last_record < RAW_INTERVAL:
+            return False
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO points_raw (series_id, ts, value) VALUES (?, ?, ?)",
+                [(self._series_id(name), now, float(value)) for name, value in sample.items()]
+            )
+            self.compact(now)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.errors += 1
+            self.conn.rollback()
+            return False
+        self.last_record = now
+        return True
+
+    def compact(self, now: int):
+        """Resumir los minutos y horas ya cerrados y podar cada resolución según su retención"""
+        for (name, step, _), (source, _, _) in zip(RESOLUTIONS[1:], RESOLUTIONS):
+            end = now - now % step
+            rolled = self._state(f"rolled_{name}")
+            if rolled is None:
+                oldest = self.conn.execute(f"SELECT MIN(ts) FROM points_{source}").fetchone()[0]
+                rolled = end if oldest is None else oldest - oldest % step
+            if end > rolled:
+                self.conn.execute(_rollup_sql(name, step, source), (rolled, end))
+                self._set_state(f"rolled_{name}", end)
+        for name, _, retention in RESOLUTIONS:
+            self.conn.execute(f"DELETE FROM points_{name} WHERE ts < ?", (now - retention,))
+
+    def names(self, prefixes: Iterable[str] = None) -> List[str]:
+        """Series guardadas (las que empiezan con alguno de `prefixes`, si se indican)"""
+        prefixes = tuple(prefixes or ())
+        return sorted(name for name in self.series if not prefixes or name.startswith(prefixes))
+
+    @staticmethod
+    def pick_resolution(since: float, until: float) -> str:
+        """La resolución más fina que cubre `since` y no pasa de MAX_POINTS puntos por serie"""
+        now = time.time()
+        for name, step, retention in RESOLUTIONS:
+            if since >= now - retention and (until - since) / step <= MAX_POINTS:
+                return name
+        return RESOLUTIONS[-1][0]
+
+    def _points(self, level: int, series_ids: List[int], since: int, until: int) -> Dict[int, List[TrendPoint]]:
+        """Puntos de la resolución `level` en [since, until)
+
+        Lo que todavía no se resumió (el minuto o la hora en curso) se arma
+        con los puntos de la resolución anterior.
+        """
+        name, step, _ = RESOLUTIONS[level]
+        rolled = until if level == 0 else max(self._state(f"rolled_{name}") or since, since)
+        placeholders = ', '.join('?' * len(series_ids))
+        points: Dict[int, List[TrendPoint]] = {series_id: [] for series_id in series_ids}
+        cursor = self.conn.execute(
+            f"SELECT series_id, {_point_columns(name)} FROM points_{name} "
+            f"WHERE series_id IN ({placeholders}) AND ts >= ? AND ts < ? ORDER BY ts",
+            (*series_ids, since - since % step, min(rolled, until))
+        )
+        for series_id, *values in cursor:
+            points[series_id].append(TrendPoint(*values))
+
+        if level and rolled < until:
+            for series_id, tail in self._points(level - 1, series_ids, rolled, until).items():
+                points[series_id].extend(_regroup(tail, step))
+        return points
+
+    def query(self, prefixes: Iterable[str] = None, since: float = None, until: float = None,
+              resolution: str = 'auto') -> Tuple[str, Dict[str, List[TrendPoint]]]:
+        """(resolución, {serie: puntos}) de las series pedidas entre `since` y `until` (epoch)"""
+        until = time.time() if until is None else until
+        since = until - 86400 if since is None else since
+        if resolution == 'auto':
+            resolution = self.pick_resolution(since, until)
+        level = [name for name, _, _ in RESOLUTIONS].index(resolution)
+        names = self.names(prefixes)
+        if not names:
+            return resolution, {}
+        ids = [self.series[name] for name in names]
+        points = self._points(level, ids, int(since), int(until) + 1)
+        return resolution, {name: points[series_id] for name, series_id in zip(names, ids)}
+
+    def info(self) -> Dict[str, Any]:
+        """Puntos, rango de tiempo y tope de puntos de cada resolución, y tamaño del archivo"""
+        resolutions = {}
+        for name, step, retention in RESOLUTIONS:
+            count, oldest, newest = self.conn.execute(
+                f"SELECT COUNT(*), MIN(ts), MAX(ts) FROM points_{name}").fetchone()
+            resolutions[name] = {'points': count, 'oldest': oldest, 'newest': newest,
+                                 'max_points': len(self.series) * (retention // step + 1)}
+        return {'path': self.path, 'series': len(self.series), 'resolutions': resolutions,
+                'bytes': sum(os.path.getsize(self.path + suffix) for suffix in ('', '-wal')
+                             if os.path.exists(self.path + suffix))}
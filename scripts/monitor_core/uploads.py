@@ -0,0 +1,384 @@
+"""
+Perfil de un upload de assessment (assessment_data.data o archivo de Storage)
+
+JsonProfiler recorre el JSON en streaming, bloque a bloque, sin construir los
+objetos: por cada clave de primer nivel (Users, GPOs, DomainInfo...) cuenta
+sus elementos, su tamaño compacto (sin el espacio fuera de los strings, como
+JSON.stringify) y el de su elemento más grande. La memoria no depende del
+tamaño del archivo. UploadProfile traduce eso a lo que harán las edge
+functions: datos por categoría de analyze-assessment, chunks y grupos de
+process-large-file, llamadas a la IA, tokens estimados y advertencias.
+
+Los límites son copia de los de las edge functions; si cambian allá hay que
+actualizarlos acá.
+"""
+
+import json
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# Límites de las edge functions
+MAX_ITEMS_PER_CHUNK = 1000  # process-large-file: usuarios por chunk
+CHUNK_BATCH_SIZE = 15  # process-large-file: chunks por grupo
+MAX_CATEGORY_FILE = 10 * 1024 * 1024  # analyze-category: tamaño máximo de un chunk
+MAX_PROMPT = 8000  # analyze-category: caracteres de datos por prompt
+MAX_DATA_SIZE_CHARS = 80000  # analyze-assessment: caracteres de datos por categoría
+MAX_RETRIES = 3  # analyze-assessment: intentos por categoría
+SAMPLED_ITEMS = {'Users': 30, 'GPOs': 20}  # analyze-assessment: muestra por clave (MAX_USERS_PER_CATEGORY, MAX_GPOS)
+
+# Claves de primer nivel que lee cada categoría (prepareCategoryData en analyze-assessment)
+CATEGORY_KEYS = {
+    'users': ('Users', 'ProtectedUsers', 'OldPasswords'),
+    'gpos': ('GPOs', 'GPOPermissions', 'DCPolicy'),
+    'domain': ('DomainInfo', 'DomainControllers', 'PasswordPolicies', 'SiteTopology'),
+    'security': ('KerberosConfig', 'LAPS', 'DCSyncPermissions', 'RC4EncryptionTypes', 'RecycleBinStatus',
+                 'UnconstrainedDelegation', 'NTLMSettings', 'SMBv1Status'),
+    'dc_health': ('DomainControllers', 'DCHealth', 'ReplicationStatus', 'BackupStatus'),
+    'forest_domain': ('DomainInfo', 'Trusts', 'OUStructure', 'AdminSDHolder', 'RecycleBinStatus',
+                      'TombstoneLifetime'),
+    'dns': ('DNSConfiguration', 'DNSScavenging'),
+    'dhcp': ('DHCPConfiguration',),
+}
+
+# Umbrales de las advertencias
+LARGE_UPLOAD_BYTES = 50 * 1024 * 1024  # process-large-file hace text() + JSON.parse del archivo entero
+LARGE_ITEM_BYTES = 1024 * 1024  # un solo elemento (usuario, GPO...) de más de 1 MB
+CHARS_PER_TOKEN = 4  # estimación de tokens de entrada
+SCALAR_PREVIEW = 200  # bytes que se guardan de los valores escalares (DomainName...)
+
+# Un string completo, o cualquier carácter estructural (incluida una comilla de un string que sigue en el próximo bloque)
+TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|["{}\[\],:]')
+STRING_END = re.compile(rb'["\\]')
+# Strings completos y todo lo que no sea corchete ni comilla (contenido de un elemento)
+SKIP = re.compile(rb'(?:"[^"\\]*(?:\\.[^"\\]*)*"|[^"{}\[\]]+)*')
+# Espacio fuera de strings: los strings dan b'' y el espacio su longitud
+WHITESPACE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|([ \t\r\n]+)')
+QUOTE, BACKSLASH, COLON, COMMA, OPEN_OBJECT = b'"\\:,{'
+OPENERS, CLOSERS = b'{[', b'}]'
+
+
+class MemberStats:
+    """Tamaños de una clave de primer nivel"""
+
+    __slots__ = ('name', 'kind', 'bytes', 'items', 'max_item_bytes', 'value')
+
+    def __init__(self, name: str, kind: str = 'null', size: int = 0, items: int = 0,
+                 max_item_bytes: int = 0, value: Any = None):
+        self.name = name
+        self.kind = kind  # array | object | string | number | boolean | null
+        self.bytes = size  # tamaño compacto del valor
+        self.items = items  # elementos del array / claves del objeto
+        self.max_item_bytes = max_item_bytes
+        self.value = value  # valor de los escalares cortos
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _scalar(raw: bytes) -> tuple:
+    """(kind, valor) de un escalar compacto"""
+    text = raw.decode('utf-8', errors='replace')
+    if not text or text == 'null':
+        return 'null', None
+    if text[0] == '"':
+        return 'string', text[1:-1] if text.endswith('"') else text[1:] + '…'
+    if text in ('true', 'false'):
+        return 'boolean', text == 'true'
+    return 'number', text
+
+
+class JsonProfiler:
+    """Perfil de las claves de primer nivel de un JSON que llega por bloques (feed)
+
+    `root_depth` es la profundidad del objeto a perfilar: 1 para el documento
+    mismo, 2 para un envoltorio como {"data": {...}} de PostgREST.
+    """
+
+    def __init__(self, root_depth: int = 1):
+        self.root_depth = root_depth
+        self.members: Dict[str, MemberStats] = {}
+        self.total_bytes = 0
+        self.root_bytes = 0  # bytes del objeto perfilado (sin el envoltorio)
+        self._root_start = 0
+        self.root_kind: Optional[str] = None
+        self.depth = 0
+        self.in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key: Any = None  # clave en curso: str, o bytearray si quedó cortada entre bloques
+        self._member: Optional[MemberStats] = None
+        self._start = 0  # offset absoluto del inicio del valor en curso
+        self._ws = 0  # espacio fuera de strings dentro del valor en curso
+        self._item_start = 0  # tamaño compacto del valor al empezar el elemento en curso
+        self._raw: Optional[bytearray] = None  # bytes del valor escalar en curso
+
+    @property
+    def complete(self) -> bool:
+        return self.root_kind is not None and self.depth == 0 and not self.in_string
+
+    def _compact(self, position: int) -> int:
+        return position - self._start - self._ws
+
+    def _capture(self, data: bytes):
+        """Bytes de un string cortado entre bloques: la clave o el preview de un escalar"""
+        if isinstance(self._key, bytearray):
+            self._key += data
+        elif self._raw is not None and len(self._raw) < SCALAR_PREVIEW:
+            self._raw += data[:SCALAR_PREVIEW - len(self._raw)]
+
+    def _gap(self, data: bytes):
+        """Bytes entre tokens (espacio, números, true/false/null)"""
+        if self._member is None or not data:
+            return
+        stripped = data.strip()
+        self._ws += len(data) - len(stripped)
+        if stripped and self._raw is not None and len(self._raw) < SCALAR_PREVIEW:
+            self._raw += stripped[:SCALAR_PREVIEW - len(self._raw)]
+
+    def _string(self, data: bytes):
+        """String completo (con sus comillas)"""
+        if self.depth != self.root_depth:
+            return
+        if self._expect_key:
+            self._key = json.loads(data)
+        elif self._raw is not None and len(self._raw) < SCALAR_PREVIEW:
+            self._raw += data[:SCALAR_PREVIEW - len(self._raw)]
+
+    def _open_string(self):
+        """Comilla de un string que sigue en el próximo bloque"""
+        self.in_string = True
+        if self.depth == self.root_depth:
+            if self._expect_key:
+                self._key = bytearray(b'"')
+            elif self._raw is not None:
+                self._raw += b'"'
+
+    def _close_string(self):
+        self.in_string = False
+        if isinstance(self._key, bytearray):
+            self._key = json.loads(bytes(self._key))
+
+    def _close_item(self, position: int):
+        size = self._compact(position) - self._item_start
+        if size > 0:
+            member = self._member
+            member.items += 1
+            member.max_item_bytes = max(member.max_item_bytes, size)
+        self._item_start = self._compact(position + 1)
+
+    def _close_member(self, position: int):
+        member = self._member
+        member.bytes = self._compact(position)
+        if self._raw is not None:
+            member.kind, member.value = _scalar(bytes(self._raw))
+        self.members[member.name] = member
+        self._member = self._raw = None
+
+    def _token(self, token: int, position: int):
+        """Carácter estructural fuera de un string"""
+        depth, root, member = self.depth, self.root_depth, self._member
+        if token == QUOTE:
+            self._open_string()
+        elif token in OPENERS:
+            if depth + 1 == root and self.root_kind is None:
+                self.root_kind = 'object' if token == OPEN_OBJECT else 'array'
+                self._expect_key = token == OPEN_OBJECT
+                self._root_start = position
+            elif depth == root and member is not None:
+                member.kind = 'object' if token == OPEN_OBJECT else 'array'
+                self._raw = None
+                self._item_start = self._compact(position + 1)
+            self.depth += 1
+        elif token in CLOSERS:
+            if member is not None and depth == root + 1:
+                self._close_item(position)
+            elif depth == root:
+                if member is not None:
+                    self._close_member(position)
+                self.root_bytes = position + 1 - self._root_start
+            self.depth -= 1
+        elif token == COMMA:
+            if member is not None and depth == root + 1:
+                self._close_item(position)
+            elif member is not None and depth == root:
+                self._close_member(position)
+                self._expect_key = True
+        elif token == COLON and depth == root and self._expect_key and isinstance(self._key, str):
+            self._member = MemberStats(self._key)
+            self._key, self._expect_key = None, False
+            self._start, self._ws, self._raw = position + 1, 0, bytearray()
+
+    def feed(self, data: bytes):
+        """Procesar el siguiente bloque del documento"""
+        offset, pos, size = self.total_bytes, 0, len(data)
+        deep = self.root_depth + 2
+        while pos < size:
+            if self.in_string:
+                if self._escape:
+                    self._escape = False
+                    self._capture(data[pos:pos + 1])
+                    pos += 1
+                    continue
+                match = STRING_END.search(data, pos)
+                if match is None:
+                    self._capture(data[pos:])
+                    break
+                end = match.end()
+                self._capture(data[pos:end])
+                pos = end
+                if data[end - 1] == BACKSLASH:
+                    self._escape = True
+                else:
+                    self._close_string()
+                continue
+
+            if self.depth >= deep:
+                # Dentro de un elemento solo importan los corchetes: el resto se salta de una vez
+                end = SKIP.match(data, pos).end()
+                if end > pos:
+                    self._ws += sum(map(len, WHITESPACE.findall(data, pos, end)))
+                    pos = end
+                    if pos == size:
+                        break
+            else:
+                match = TOKEN.search(data, pos)
+                if match is None:
+                    self._gap(data[pos:])
+                    break
+                start, end = match.span()
+                if start > pos:
+                    self._gap(data[pos:start])
+                if end - start > 1:
+                    self._string(data[start:end])
+                    pos = end
+                    continue
+                pos = start
+            self._token(data[pos], offset + pos)
+            pos += 1
+        self.total_bytes += size
+
+    def feed_all(self, blocks: Iterable[bytes]) -> 'JsonProfiler':
+        for block in blocks:
+            self.feed(block)
+        return self
+
+
+def _ceil(value: int, size: int) -> int:
+    return math.ceil(value / size) if value else 0
+
+
+class UploadProfile:
+    """Predicción de lo que harán las edge functions con un upload"""
+
+    def __init__(self, members: Dict[str, MemberStats], total_bytes: Optional[int] = None,
+                 complete: bool = True):
+        self.members = members
+        self.total_bytes = total_bytes if total_bytes is not None else sum(m.bytes for m in members.values())
+        self.complete = complete
+
+    def member(self, name: str) -> MemberStats:
+        return self.members.get(name) or MemberStats(name, 'missing')
+
+    def _sent_bytes(self, member: MemberStats) -> int:
+        """Bytes de la clave que analyze-assessment pone en el prompt (muestra de Users/GPOs)"""
+        limit = SAMPLED_ITEMS.get(member.name)
+        if limit is None or member.kind != 'array' or member.items <= limit:
+            return member.bytes
+        return member.bytes * limit // member.items
+
+    def categories(self) -> List[Dict[str, Any]]:
+        """Por categoría: claves presentes, elementos, bytes y caracteres que van a la IA"""
+        rows = []
+        for category, keys in CATEGORY_KEYS.items():
+            members = [self.member(key) for key in keys]
+            present = [m for m in members if m.kind not in ('missing', 'null')]
+            sent = sum(self._sent_bytes(m) for m in present)
+            rows.append({
+                'category_id': category,
+                'keys': len(present),
+                'missing': [m.name for m in members if m.kind in ('missing', 'null')],
+                'items': sum(m.items for m in present),
+                'bytes': sum(m.bytes for m in present),
+                'max_item_bytes': max((m.max_item_bytes for m in present), default=0),
+                'prompt_chars': min(sent, MAX_DATA_SIZE_CHARS),
+                'truncated': sent > MAX_DATA_SIZE_CHARS,
+            })
+        return rows
+
+    def chunking(self) -> Dict[str, Any]:
+        """process-large-file: chunks de Users, grupos y tamaño de cada chunk"""
+        users = self.member('Users')
+        count = users.items if users.kind == 'array' else 0
+        chunks = _ceil(count, MAX_ITEMS_PER_CHUNK)
+        avg_item = users.bytes / count if count else 0
+        return {
+            'users': count,
+            'chunks': chunks,
+            'batches': _ceil(chunks, CHUNK_BATCH_SIZE),
+            'avg_chunk_bytes': int(avg_item * min(count, MAX_ITEMS_PER_CHUNK)),
+            'max_chunk_bytes': min(users.bytes, users.max_item_bytes * MAX_ITEMS_PER_CHUNK),
+        }
+
+    def cost(self) -> Dict[str, Any]:
+        """Llamadas a la IA y tokens de entrada estimados de cada camino"""
+        categories = self.categories()
+        chunking = self.chunking()
+        assessment_chars = sum(row['prompt_chars'] for row in categories)
+        return {
+            'analyze_assessment_calls': len(categories),
+            'analyze_assessment_max_calls': len(categories) * MAX_RETRIES,
+            'analyze_assessment_tokens': assessment_chars // CHARS_PER_TOKEN,
+            'large_file_calls': chunking['chunks'],
+            'large_file_tokens': chunking['chunks'] * MAX_PROMPT // CHARS_PER_TOKEN,
+        }
+
+    def warnings(self) -> List[str]:
+        """Lo que hace que el upload sea problemático para las edge functions"""
+        warnings = []
+        if not self.complete:
+            warnings.append("JSON incompleto o mal formado: JSON.parse fallará en las edge functions")
+        if self.total_bytes > LARGE_UPLOAD_BYTES:
+            warnings.append(f"{_mb(self.total_bytes)} en un solo documento: process-large-file lo carga "
+                            f"entero con text() + JSON.parse")
+        for name in SAMPLED_ITEMS:
+            member = self.members.get(name)
+            if member and member.kind not in ('array', 'null'):
+                warnings.append(f"'{name}' es {member.kind}, no array (¿ConvertTo-Json con un solo "
+                                f"elemento?): las edge functions esperan un array")
+        chunking = self.chunking()
+        if chunking['max_chunk_bytes'] > MAX_CATEGORY_FILE:
+            warnings.append(f"Chunks de Users de hasta {_mb(chunking['max_chunk_bytes'])}: analyze-category "
+                            f"rechaza archivos de más de {_mb(MAX_CATEGORY_FILE)}")
+        for member in self.members.values():
+            if member.max_item_bytes > LARGE_ITEM_BYTES:
+                warnings.append(f"'{member.name}' tiene un elemento de {_mb(member.max_item_bytes)}")
+        for row in self.categories():
+            if not row['keys']:
+                warnings.append(f"Categoría '{row['category_id']}' sin datos ({', '.join(row['missing'])})")
+            elif row['truncated']:
+                warnings.append(f"Categoría '{row['category_id']}' supera {MAX_DATA_SIZE_CHARS} caracteres: "
+                                f"analyze-assessment recorta los datos antes del prompt")
+        return warnings
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_bytes': self.total_bytes,
+            'complete': self.complete,
+            'domain': self.member('DomainName').value,
+            'members': [m.to_dict() for m in sorted(self.members.values(), key=lambda m: m.bytes, reverse=True)],
+            'categories': self.categories(),
+            'chunking': self.chunking(),
+            'cost': self.cost(),
+            'warnings': self.warnings(),
+        }
+
+
+def _mb(size: float) -> str:
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def profile_stream(blocks: Iterable[bytes], root_depth: int = 1) -> UploadProfile:
+    """UploadProfile de un JSON que llega por bloques (archivo, descarga de Storage...)"""
+    profiler = JsonProfiler(root_depth).feed_all(blocks)
+    return UploadProfile(profiler.members, profiler.root_bytes or profiler.total_bytes, profiler.complete)
@@ -1,43 +1,340 @@
 #!/usr/bin/env python3
 """
 Monitoreo de assessments con conexión directa a PostgreSQL
-Uso: python scripts/monitor_db.py
+Uso: python scripts/monitor_db.py [--watch] [--single-query] [--repeat N] [--targets ARCHIVO] [--trends]
 Requiere: pip install psycopg2-binary
 """
 
+import argparse
+import json
+import os
+import select
 import sys
+import time
 from datetime import datetime
-from typing import List, Dict, Any
+from decimal import Decimal
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional
 
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
+    from psycopg2.extras import register_default_json
     PSYCOPG2_AVAILABLE = True
 except ImportError:
     PSYCOPG2_AVAILABLE = False
-    print("❌ Este script requiere psycopg2")
-    print("Instalar con: pip install psycopg2-binary")
-    sys.exit(1)
+
+from monitor_core import (
+    ACTIVE_STATUSES, TARGET_TIMEOUT, TRENDS_PATH, FanOut, MonitorCore, PostgresBackend, TargetResult, TrendStore,
+    calculate_progress, load_targets, merge_counts, merge_rows, severity_emoji, trend_sample
+)
+from monitor_core.backends import STREAM_ITERSIZE
 
 # Configuración de base de datos
+# (se puede sobreescribir con MONITOR_DB_HOST, MONITOR_DB_PORT, ... para apuntar a un Postgres local)
 DB_CONFIG = {
-    'host': '10.10.10.77',
-    'port': 5432,
-    'database': 'postgres',
-    'user': 'postgres',
-    'password': 'your-super-secret-and-long-postgres-password'  # CAMBIAR por tu password
+    'host': os.environ.get('MONITOR_DB_HOST', '10.10.10.77'),
+    'port': int(os.environ.get('MONITOR_DB_PORT', 5432)),
+    'database': os.environ.get('MONITOR_DB_NAME', 'postgres'),
+    'user': os.environ.get('MONITOR_DB_USER', 'postgres'),
+    'password': os.environ.get('MONITOR_DB_PASSWORD', 'your-super-secret-and-long-postgres-password')  # CAMBIAR por tu password
+}
+
+# Modo --watch
+REFRESH_INTERVAL = 5  # segundos (espera máxima por evento o intervalo de polling)
+RECONCILE_INTERVAL = 300  # segundos entre recargas completas de los contadores
+NOTIFY_CHANNEL = 'monitor_changes'
+NOTIFY_TRIGGERS = ('notify_assessments_monitor', 'notify_findings_monitor')
+
+# Queries del reporte (compartidas con monitor_async.py)
+ASSESSMENTS_SUMMARY_SQL = """
+SELECT
+    status,
+    COUNT(*) as count,
+    MIN(created_at) as oldest,
+    MAX(created_at) as newest
+FROM assessments
+GROUP BY status
+ORDER BY count DESC;
+"""
+
+ACTIVE_ASSESSMENTS_SQL = """
+SELECT
+    id,
+    domain,
+    status,
+    analysis_progress->>'current' as current_category,
+    (analysis_progress->>'completed')::int as completed,
+    (analysis_progress->>'total')::int as total,
+    CASE
+        WHEN (analysis_progress->>'total')::int > 0
+        THEN ROUND(((analysis_progress->>'completed')::int * 100.0 / (analysis_progress->>'total')::int), 2)
+        ELSE 0
+    END as progress_percentage,
+    created_at,
+    updated_at
+FROM assessments
+WHERE status IN ('analyzing', 'pending', 'uploaded')
+ORDER BY created_at DESC;
+"""
+
+FINDINGS_BY_SEVERITY_SQL = """
+SELECT
+    severity,
+    COUNT(*) as count
+FROM findings
+GROUP BY severity
+ORDER BY
+    CASE severity
+        WHEN 'critical' THEN 1
+        WHEN 'high' THEN 2
+        WHEN 'medium' THEN 3
+        WHEN 'low' THEN 4
+        WHEN 'info' THEN 5
+    END;
+"""
+
+# Primero los 10 assessments y después sus conteos (LATERAL), para que solo
+# se lean los findings de esos assessments y no la tabla entera
+ASSESSMENTS_WITH_FINDINGS_SQL = """
+SELECT
+    a.id,
+    a.domain,
+    a.status,
+    c.total_findings,
+    c.critical,
+    c.high,
+    c.medium,
+    c.low,
+    a.created_at
+FROM (
+    SELECT id, domain, status, created_at
+    FROM assessments
+    ORDER BY created_at DESC
+    LIMIT 10
+) a
+CROSS JOIN LATERAL (
+    SELECT
+        COUNT(*) as total_findings,
+        COUNT(CASE WHEN f.severity = 'critical' THEN 1 END) as critical,
+        COUNT(CASE WHEN f.severity = 'high' THEN 1 END) as high,
+        COUNT(CASE WHEN f.severity = 'medium' THEN 1 END) as medium,
+        COUNT(CASE WHEN f.severity = 'low' THEN 1 END) as low
+    FROM findings f
+    WHERE f.assessment_id = a.id
+) c
+ORDER BY a.created_at DESC;
+"""
+
+LATEST_FINDINGS_SQL = """
+SELECT
+    a.domain,
+    f.title,
+    f.severity,
+    f.category_id,
+    f.description,
+    f.created_at
+FROM findings f
+JOIN assessments a ON f.assessment_id = a.id
+ORDER BY f.created_at DESC
+LIMIT %s;
+"""
+
+CATEGORY_ANALYSIS_SQL = """
+SELECT
+    category_id,
+    COUNT(*) as total_findings,
+    COUNT(CASE WHEN severity = 'critical' THEN 1 END) as critical,
+    COUNT(CASE WHEN severity = 'high' THEN 1 END) as high,
+    COUNT(CASE WHEN severity = 'medium' THEN 1 END) as medium,
+    AVG(CASE
+        WHEN severity = 'critical' THEN 5
+        WHEN severity = 'high' THEN 4
+        WHEN severity = 'medium' THEN 3
+        WHEN severity = 'low' THEN 2
+        WHEN severity = 'info' THEN 1
+    END) as avg_severity_score
+FROM findings
+WHERE category_id IS NOT NULL
+GROUP BY category_id
+ORDER BY avg_severity_score DESC, total_findings DESC
+LIMIT 10;
+"""
+
+# Variantes sobre los rollups (migración monitor_finding_rollups): leen
+# O(#assessments) / O(#categorías) filas en vez de agrupar todos los findings
+FINDINGS_BY_SEVERITY_ROLLUP_SQL = """
+SELECT severity, count
+FROM (
+    SELECT 'critical' AS severity, SUM(critical) AS count, 1 AS position FROM assessment_finding_rollup
+    UNION ALL SELECT 'high', SUM(high), 2 FROM assessment_finding_rollup
+    UNION ALL SELECT 'medium', SUM(medium), 3 FROM assessment_finding_rollup
+    UNION ALL SELECT 'low', SUM(low), 4 FROM assessment_finding_rollup
+    UNION ALL SELECT 'info', SUM(info), 5 FROM assessment_finding_rollup
+) s
+WHERE count > 0
+ORDER BY position;
+"""
+
+ASSESSMENTS_WITH_FINDINGS_ROLLUP_SQL = """
+SELECT
+    a.id,
+    a.domain,
+    a.status,
+    COALESCE(r.total, 0) as total_findings,
+    COALESCE(r.critical, 0) as critical,
+    COALESCE(r.high, 0) as high,
+    COALESCE(r.medium, 0) as medium,
+    COALESCE(r.low, 0) as low,
+    a.created_at
+FROM assessments a
+LEFT JOIN assessment_finding_rollup r ON r.assessment_id = a.id
+ORDER BY a.created_at DESC
+LIMIT 10;
+"""
+
+CATEGORY_ANALYSIS_ROLLUP_SQL = """
+SELECT
+    category_id,
+    total as total_findings,
+    critical,
+    high,
+    medium,
+    severity_score::numeric / total as avg_severity_score
+FROM category_finding_rollup
+WHERE total > 0
+ORDER BY avg_severity_score DESC, total_findings DESC
+LIMIT 10;
+"""
+
+# Diferencias entre los rollups y los agregados calculados desde findings
+VERIFY_ASSESSMENT_ROLLUP_SQL = """
+WITH raw AS (
+    SELECT
+        assessment_id,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE severity = 'critical') AS critical,
+        COUNT(*) FILTER (WHERE severity = 'high') AS high,
+        COUNT(*) FILTER (WHERE severity = 'medium') AS medium,
+        COUNT(*) FILTER (WHERE severity = 'low') AS low,
+        COUNT(*) FILTER (WHERE severity = 'info') AS info
+    FROM findings
+    GROUP BY assessment_id
+)
+SELECT
+    COALESCE(raw.assessment_id, r.assessment_id)::text AS key,
+    raw.total AS raw_total,
+    r.total AS rollup_total
+FROM raw
+FULL OUTER JOIN assessment_finding_rollup r ON r.assessment_id = raw.assessment_id
+WHERE (raw.total, raw.critical, raw.high, raw.medium, raw.low, raw.info)
+    IS DISTINCT FROM (r.total, r.critical, r.high, r.medium, r.low, r.info);
+"""
+
+VERIFY_CATEGORY_ROLLUP_SQL = """
+WITH raw AS (
+    SELECT
+        category_id,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE severity = 'critical') AS critical,
+        COUNT(*) FILTER (WHERE severity = 'high') AS high,
+        COUNT(*) FILTER (WHERE severity = 'medium') AS medium,
+        COUNT(*) FILTER (WHERE severity = 'low') AS low,
+        COUNT(*) FILTER (WHERE severity = 'info') AS info
+    FROM findings
+    WHERE category_id IS NOT NULL
+    GROUP BY category_id
+)
+SELECT
+    COALESCE(raw.category_id, r.category_id) AS key,
+    raw.total AS raw_total,
+    r.total AS rollup_total
+FROM raw
+FULL OUTER JOIN category_finding_rollup r ON r.category_id = raw.category_id
+WHERE (raw.total, raw.critical, raw.high, raw.medium, raw.low, raw.info)
+    IS DISTINCT FROM (r.total, r.critical, r.high, r.medium, r.low, r.info);
+"""
+
+# Secciones de fetch_summary(), en orden de impresión
+SUMMARY_SECTIONS = (
+    ('assessments_summary', ASSESSMENTS_SUMMARY_SQL),
+    ('active_assessments', ACTIVE_ASSESSMENTS_SQL),
+    ('findings_by_severity', FINDINGS_BY_SEVERITY_SQL),
+    ('assessments_with_findings', ASSESSMENTS_WITH_FINDINGS_SQL),
+    ('latest_findings', LATEST_FINDINGS_SQL),
+    ('category_analysis', CATEGORY_ANALYSIS_SQL),
+)
+
+ROLLUP_SUMMARY_SECTIONS = tuple(
+    (name, {
+        'findings_by_severity': FINDINGS_BY_SEVERITY_ROLLUP_SQL,
+        'assessments_with_findings': ASSESSMENTS_WITH_FINDINGS_ROLLUP_SQL,
+        'category_analysis': CATEGORY_ANALYSIS_ROLLUP_SQL,
+    }.get(name, query))
+    for name, query in SUMMARY_SECTIONS
+)
+
+
+def live_assessment(assessment_id, domain: str, status: str, progress: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Assessment activo de --watch, con los mismos tipos venga de la BD o de un evento
+
+    Sin timestamps (no se muestran): load_counters() los trae como datetime y los
+    eventos como texto, y la reconciliación compara los estados con ==.
+    """
+    progress = progress or {}
+    return {
+        'id': str(assessment_id),
+        'domain': domain,
+        'status': status,
+        'current_category': progress.get('current'),
+        'completed': int(progress.get('completed') or 0),
+        'total': int(progress.get('total') or 0),
+        'progress_percentage': calculate_progress(progress),
+    }
+
+
+def build_summary_sql(sections) -> str:
+    """Unir las secciones en una sola query que devuelve un documento JSON
+
+    Cada sección queda como subquery agregada con json_agg (respeta su ORDER BY);
+    el límite de últimos findings pasa a ser el parámetro $1 del statement preparado.
+    """
+    parts = []
+    for name, query in sections:
+        body = query.strip().rstrip(';').replace('%s', '$1')
+        parts.append(f"    '{name}', (SELECT COALESCE(json_agg(t), '[]'::json) FROM (\n{body}\n) t)")
+    return "SELECT json_build_object(\n" + ",\n".join(parts) + "\n) AS summary"
+
+
+SUMMARY_STATEMENTS = {
+    False: ('monitor_summary', build_summary_sql(SUMMARY_SECTIONS)),
+    True: ('monitor_summary_rollups', build_summary_sql(ROLLUP_SUMMARY_SECTIONS)),
 }
 
 
 class DatabaseMonitor:
+    """Reportes SQL sobre MonitorCore + PostgresBackend"""
+
     def __init__(self, config: Dict[str, str]):
         self.config = config
-        self.conn = None
+        self.backend = PostgresBackend(config)
+        self.core = MonitorCore(self.backend)
+        self.trends: Optional[TrendStore] = None
+
+    @property
+    def conn(self):
+        return self.backend.conn
+
+    @property
+    def round_trips(self) -> int:
+        return self.backend.round_trips
+
+    @property
+    def db_time(self) -> float:
+        return self.backend.db_time
 
     def connect(self):
         """Conectar a la base de datos"""
         try:
-            self.conn = psycopg2.connect(**self.config)
+            self.backend.connect()
             print("✅ Conectado a PostgreSQL")
             return True
         except Exception as e:
@@ -47,144 +344,331 @@ class DatabaseMonitor:
     def disconnect(self):
         """Desconectar de la base de datos"""
         if self.conn:
-            self.conn.close()
+            self.backend.close()
             print("✅ Desconectado de PostgreSQL")
 
+    def reset_query_stats(self):
+        """Reiniciar los contadores de viajes y tiempo en BD"""
+        self.backend.reset_stats()
+
+    def format_query_stats(self) -> str:
+        """Resumen de una línea de los contadores de viajes y tiempo en BD"""
+        return self.backend.format_stats()
+
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
-        """Ejecutar query y retornar resultados"""
-        try:
-            with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                return [dict(row) for row in cursor.fetchall()]
-        except Exception as e:
-            print(f"❌ Error en query: {e}")
-            return []
+        """Ejecutar query y retornar resultados (para queries con pocas filas)"""
+        return self.backend.execute_query(query, params)
+
+    def iter_query(self, query: str, params: tuple = None,
+                   itersize: int = STREAM_ITERSIZE) -> Iterator[NamedTuple]:
+        """Ejecutar query con un cursor con nombre (server-side) y entregar filas en streaming"""
+        return self.backend.iter_query(query, params, itersize)
+
+    def iter_findings(self, columns: str = "id, assessment_id, severity, category_id, created_at",
+                      itersize: int = STREAM_ITERSIZE) -> Iterator[NamedTuple]:
+        """Recorrer todos los findings en streaming, solo con las columnas pedidas"""
+        return self.iter_query(
+            f"SELECT {columns} FROM findings ORDER BY created_at, id;", itersize=itersize
+        )
+
+    def iter_assessment_data(self, assessment_id: str = None,
+                             itersize: int = 50) -> Iterator[NamedTuple]:
+        """Recorrer assessment_data en streaming (los documentos JSONB pueden pesar MBs)"""
+        query = """
+        SELECT id, assessment_id, received_at, pg_column_size(data) AS stored_bytes, data
+        FROM assessment_data
+        """
+        if assessment_id:
+            return self.iter_query(query + " WHERE assessment_id = %s;", (assessment_id,), itersize)
+        return self.iter_query(query + " ORDER BY received_at;", itersize=itersize)
 
     def get_assessments_summary(self):
         """Obtener resumen de assessments"""
-        query = """
-        SELECT
-            status,
-            COUNT(*) as count,
-            MIN(created_at) as oldest,
-            MAX(created_at) as newest
-        FROM assessments
-        GROUP BY status
-        ORDER BY count DESC;
-        """
-        return self.execute_query(query)
+        return self.execute_query(ASSESSMENTS_SUMMARY_SQL)
 
     def get_active_assessments(self):
         """Obtener assessments activos con progreso"""
-        query = """
-        SELECT
-            id,
-            domain,
-            status,
-            analysis_progress->>'current' as current_category,
-            (analysis_progress->>'completed')::int as completed,
-            (analysis_progress->>'total')::int as total,
-            CASE
-                WHEN (analysis_progress->>'total')::int > 0
-                THEN ROUND(((analysis_progress->>'completed')::int * 100.0 / (analysis_progress->>'total')::int), 2)
-                ELSE 0
-            END as progress_percentage,
-            created_at,
-            updated_at
-        FROM assessments
-        WHERE status IN ('analyzing', 'pending', 'uploaded')
-        ORDER BY created_at DESC;
-        """
-        return self.execute_query(query)
+        return self.execute_query(ACTIVE_ASSESSMENTS_SQL)
 
     def get_findings_by_severity(self):
         """Obtener findings agrupados por severidad"""
-        query = """
-        SELECT
-            severity,
-            COUNT(*) as count
-        FROM findings
-        GROUP BY severity
-        ORDER BY
-            CASE severity
-                WHEN 'critical' THEN 1
-                WHEN 'high' THEN 2
-                WHEN 'medium' THEN 3
-                WHEN 'low' THEN 4
-                WHEN 'info' THEN 5
-            END;
-        """
-        return self.execute_query(query)
+        return self.execute_query(FINDINGS_BY_SEVERITY_SQL)
 
     def get_assessments_with_findings(self):
         """Obtener assessments con conteo de findings"""
-        query = """
-        SELECT
-            a.id,
-            a.domain,
-            a.status,
-            COUNT(f.id) as total_findings,
-            COUNT(CASE WHEN f.severity = 'critical' THEN 1 END) as critical,
-            COUNT(CASE WHEN f.severity = 'high' THEN 1 END) as high,
-            COUNT(CASE WHEN f.severity = 'medium' THEN 1 END) as medium,
-            COUNT(CASE WHEN f.severity = 'low' THEN 1 END) as low,
-            a.created_at
-        FROM assessments a
-        LEFT JOIN findings f ON a.id = f.assessment_id
-        GROUP BY a.id, a.domain, a.status, a.created_at
-        ORDER BY a.created_at DESC
-        LIMIT 10;
-        """
-        return self.execute_query(query)
+        return self.execute_query(ASSESSMENTS_WITH_FINDINGS_SQL)
 
     def get_latest_findings(self, limit: int = 10):
         """Obtener últimos findings"""
-        query = """
-        SELECT
-            a.domain,
-            f.title,
-            f.severity,
-            f.category_id,
-            f.description,
-            f.created_at
-        FROM findings f
-        JOIN assessments a ON f.assessment_id = a.id
-        ORDER BY f.created_at DESC
-        LIMIT %s;
-        """
-        return self.execute_query(query, (limit,))
+        return self.execute_query(LATEST_FINDINGS_SQL, (limit,))
 
     def get_category_analysis(self):
         """Análisis de categorías más problemáticas"""
-        query = """
-        SELECT
-            category_id,
-            COUNT(*) as total_findings,
-            COUNT(CASE WHEN severity = 'critical' THEN 1 END) as critical,
-            COUNT(CASE WHEN severity = 'high' THEN 1 END) as high,
-            COUNT(CASE WHEN severity = 'medium' THEN 1 END) as medium,
-            AVG(CASE
-                WHEN severity = 'critical' THEN 5
-                WHEN severity = 'high' THEN 4
-                WHEN severity = 'medium' THEN 3
-                WHEN severity = 'low' THEN 2
-                WHEN severity = 'info' THEN 1
-            END) as avg_severity_score
-        FROM findings
-        WHERE category_id IS NOT NULL
-        GROUP BY category_id
-        ORDER BY avg_severity_score DESC, total_findings DESC
-        LIMIT 10;
+        return self.execute_query(CATEGORY_ANALYSIS_SQL)
+
+    def has_notify_triggers(self) -> bool:
+        """Verificar que los triggers de LISTEN/NOTIFY estén instalados"""
+        rows = self.execute_query(
+            "SELECT COUNT(*) AS count FROM pg_trigger WHERE tgname IN %s AND NOT tgisinternal;",
+            (NOTIFY_TRIGGERS,)
+        )
+        return bool(rows) and rows[0]['count'] == len(NOTIFY_TRIGGERS)
+
+    def load_counters(self) -> Dict[str, Any]:
+        """Cargar el estado inicial que luego actualizan los eventos"""
+        # Conteos por estado y severidad en un solo viaje (sin cache: es el estado base)
+        counts = self.backend.fetch_many({
+            'status_counts': ('status_counts', ()),
+            'severity_counts': ('severity_counts', ()),
+        })
+        return {
+            'status_counts': counts['status_counts'],
+            'severity_counts': counts['severity_counts'],
+            'active': {str(row['id']): live_assessment(row['id'], row['domain'], row['status'], {
+                'current': row['current_category'], 'completed': row['completed'], 'total': row['total'],
+            }) for row in self.get_active_assessments()},
+        }
+
+    def apply_event(self, state: Dict[str, Any], event: Dict[str, Any]) -> bool:
+        """Aplicar una notificación a los contadores; retorna True si el estado cambió"""
+        def bump(counts, key, delta):
+            if key is None:
+                return
+            counts[key] = counts.get(key, 0) + delta
+            if counts[key] <= 0:
+                del counts[key]
+
+        if event.get('table') == 'findings':
+            if event.get('old_severity') == event.get('severity'):
+                return False
+            bump(state['severity_counts'], event.get('old_severity'), -1)
+            bump(state['severity_counts'], event.get('severity'), 1)
+            return True
+
+        changed = event.get('old_status') != event.get('status')
+        bump(state['status_counts'], event.get('old_status'), -1)
+        bump(state['status_counts'], event.get('status'), 1)
+
+        assessment_id = event.get('id')
+        if event.get('status') in ACTIVE_STATUSES:
+            row = live_assessment(assessment_id, event.get('domain'), event.get('status'),
+                                  event.get('analysis_progress'))
+            changed = changed or state['active'].get(assessment_id) != row
+            state['active'][assessment_id] = row
+        elif state['active'].pop(assessment_id, None) is not None:
+            changed = True
+
+        return changed
+
+    def record_trends(self, status_counts: Dict[str, int], severity_counts: Dict[str, int], active):
+        """Guardar el snapshot en el histórico (--trends)"""
+        if self.trends:
+            self.trends.record(trend_sample(status_counts, severity_counts, active))
+
+    def print_live_state(self, state: Dict[str, Any]):
+        """Imprimir el estado mantenido por --watch"""
+        print("\n" + "="*80)
+        print(f"📡 ESTADO EN VIVO - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("="*80 + "\n")
+
+        for status, count in sorted(state['status_counts'].items(), key=lambda x: x[1], reverse=True):
+            print(f"  {status.upper():20} : {count}")
+
+        print()
+        for severity in ['critical', 'high', 'medium', 'low', 'info']:
+            count = state['severity_counts'].get(severity, 0)
+            if count > 0:
+                print(f"  {severity.upper():20} : {count}")
+
+        print()
+        if not state['active']:
+            print("  No hay assessments activos")
+        for assessment in state['active'].values():
+            line = f"  ⏳ {assessment['domain']} [{assessment['status']}]"
+            if assessment['total']:
+                line += f" {assessment['completed']}/{assessment['total']} ({assessment['progress_percentage']}%)"
+            print(line)
+
+    def watch(self, interval: float = REFRESH_INTERVAL):
+        """Monitoreo por eventos (LISTEN/NOTIFY) con fallback a polling
+
+        Solo se vuelve a imprimir cuando el estado cambia de verdad. Sin los
+        triggers de la migración monitor_change_notifications se recargan los
+        contadores cada `interval` segundos.
+        """
+        # LISTEN solo entrega notificaciones fuera de transacciones abiertas
+        self.conn.autocommit = True
+        use_notify = self.has_notify_triggers()
+
+        if use_notify:
+            with self.conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL};")
+            print(f"📡 Escuchando cambios en el canal '{NOTIFY_CHANNEL}'")
+        else:
+            print(f"⚠️  Triggers de notificación no instalados: polling cada {interval} segundos")
+
+        state = self.load_counters()
+        self.print_live_state(state)
+        self.record_trends(state['status_counts'], state['severity_counts'], state['active'].values())
+        last_reconcile = time.monotonic()
+
+        try:
+            while True:
+                changed = False
+                if use_notify:
+                    if select.select([self.conn], [], [], interval) != ([], [], []):
+                        self.conn.poll()
+                        while self.conn.notifies:
+                            notify = self.conn.notifies.pop(0)
+                            changed |= self.apply_event(state, json.loads(notify.payload))
+
+                if not use_notify or time.monotonic() - last_reconcile >= RECONCILE_INTERVAL:
+                    if not use_notify:
+                        time.sleep(interval)
+                    fresh = self.load_counters()
+                    changed = changed or fresh != state
+                    state = fresh
+                    last_reconcile = time.monotonic()
+
+                if changed:
+                    self.print_live_state(state)
+                    self.record_trends(state['status_counts'], state['severity_counts'], state['active'].values())
+        except KeyboardInterrupt:
+            print("\n✅ Monitor detenido")
+
+    def get_findings_by_severity_rollup(self):
+        """Findings por severidad leídos de los rollups"""
+        return self.execute_query(FINDINGS_BY_SEVERITY_ROLLUP_SQL)
+
+    def get_assessments_with_findings_rollup(self):
+        """Últimos assessments con sus conteos leídos de los rollups"""
+        return self.execute_query(ASSESSMENTS_WITH_FINDINGS_ROLLUP_SQL)
+
+    def get_category_analysis_rollup(self):
+        """Categorías más problemáticas leídas de los rollups"""
+        return self.execute_query(CATEGORY_ANALYSIS_ROLLUP_SQL)
+
+    def verify_rollups(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Comparar los rollups con los agregados reales; retorna las filas que difieren"""
+        return {
+            'assessments': self.execute_query(VERIFY_ASSESSMENT_ROLLUP_SQL),
+            'categories': self.execute_query(VERIFY_CATEGORY_ROLLUP_SQL),
+        }
+
+    def rebuild_rollups(self):
+        """Reconstruir los rollups desde findings (corrige cualquier desvío)"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT public.refresh_finding_rollups();")
+        self.conn.commit()
+
+    def fetch_summary(self, use_rollups: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Ejecutar las queries del resumen una tras otra (en el orden de las secciones)"""
+        if use_rollups:
+            findings_by_severity = self.get_findings_by_severity_rollup()
+            assessments_with_findings = self.get_assessments_with_findings_rollup()
+            category_analysis = self.get_category_analysis_rollup()
+        else:
+            findings_by_severity = self.get_findings_by_severity()
+            assessments_with_findings = self.get_assessments_with_findings()
+            category_analysis = self.get_category_analysis()
+
+        return {
+            'assessments_summary': self.get_assessments_summary(),
+            'active_assessments': self.get_active_assessments(),
+            'findings_by_severity': findings_by_severity,
+            'assessments_with_findings': assessments_with_findings,
+            'latest_findings': self.get_latest_findings(10),
+            'category_analysis': category_analysis,
+        }
+
+    def fetch_summary_single(self, use_rollups: bool = False,
+                             latest_limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """Todas las secciones de fetch_summary() en un solo viaje (documento JSON)
+
+        La query se prepara una vez por conexión; las ejecuciones siguientes
+        (p.ej. con --repeat) reusan el plan y solo envían EXECUTE.
         """
-        return self.execute_query(query)
+        name, query = SUMMARY_STATEMENTS[use_rollups]
+        try:
+            with self.conn.cursor() as cursor:
+                # NUMERIC como Decimal, igual que en execute_query (conserva la escala: 12.50)
+                register_default_json(cursor, loads=lambda value: json.loads(value, parse_float=Decimal))
+                if name not in self.backend.prepared:
+                    self.backend.timed_execute(cursor, f"PREPARE {name}(int) AS {query}")
+                    self.backend.prepared.add(name)
+                self.backend.timed_execute(cursor, f"EXECUTE {name}(%s)", (latest_limit,))
+                # Las fechas llegan como texto ISO
+                return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"❌ Error en query: {e}")
+            # Un PREPARE dentro de una transacción abortada se pierde con el rollback
+            if not self.conn.autocommit:
+                self.conn.rollback()
+            self.backend.prepared.discard(name)
+            return {section: [] for section, _ in SUMMARY_SECTIONS}
+
+    def fetch_target_summary(self, single_query: bool = False,
+                             use_rollups: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Resumen de una instancia para FanOut (conecta si hace falta; los errores de conexión se propagan)"""
+        if self.conn is None or self.conn.closed:
+            self.backend.connect()
+            self.conn.autocommit = True
+        self.reset_query_stats()
+        if single_query:
+            return self.fetch_summary_single(use_rollups)
+        return self.fetch_summary(use_rollups)
+
+    def run_summary_loop(self, repeat: int, interval: float, single_query: bool = False,
+                         use_rollups: bool = False):
+        """Repetir el resumen `repeat` veces reportando tiempo en BD y viajes por ejecución"""
+        # Sin transacción abierta entre ejecuciones: cada resumen ve los datos actuales
+        if not self.conn.autocommit:
+            self.conn.rollback()
+            self.conn.autocommit = True
+
+        for run in range(1, repeat + 1):
+            self.reset_query_stats()
+            if single_query:
+                data = self.fetch_summary_single(use_rollups)
+            else:
+                data = self.fetch_summary(use_rollups)
+            self.print_summary(data)
+            self.record_trends({row['status']: row['count'] for row in data['assessments_summary']},
+                               {row['severity']: row['count'] for row in data['findings_by_severity']},
+                               data['active_assessments'])
+            print(f"⏱️  Ejecución {run}/{repeat}: {self.format_query_stats()}")
+            if run < repeat:
+                time.sleep(interval)
+
+    def print_rollup_verification(self) -> bool:
+        """Imprimir el resultado de verify_rollups(); retorna True si coinciden"""
+        print("\n" + "="*80)
+        print("🧮 VERIFICACIÓN DE ROLLUPS")
+        print("="*80 + "\n")
+
+        mismatches = self.verify_rollups()
+        ok = True
+        for name, rows in mismatches.items():
+            if not rows:
+                print(f"  ✅ {name}: coinciden con findings")
+                continue
+            ok = False
+            print(f"  ❌ {name}: {len(rows)} diferencias")
+            for row in rows[:10]:
+                print(f"     {row['key']}: findings={row['raw_total']} rollup={row['rollup_total']}")
+        print()
+        return ok
+
+    def print_summary(self, data: Dict[str, List[Dict[str, Any]]] = None, use_rollups: bool = False):
+        """Imprimir resumen completo (data: resultado de fetch_summary o equivalente)"""
+        if data is None:
+            data = self.fetch_summary(use_rollups)
 
-    def print_summary(self):
-        """Imprimir resumen completo"""
         print("\n" + "="*80)
         print("📊 RESUMEN DE ASSESSMENTS")
         print("="*80 + "\n")
 
-        summary = self.get_assessments_summary()
+        summary = data['assessments_summary']
         for row in summary:
             print(f"  {row['status'].upper():20} : {row['count']}")
 
@@ -192,12 +676,14 @@ class DatabaseMonitor:
         print("⏳ ASSESSMENTS ACTIVOS")
         print("="*80 + "\n")
 
-        active = self.get_active_assessments()
+        active = data['active_assessments']
         if not active:
             print("  No hay assessments activos\n")
         else:
             for assessment in active:
                 print(f"  Dominio: {assessment['domain']}")
+                if 'instance' in assessment:
+                    print(f"  Instancia: {assessment['instance']}")
                 print(f"  Estado: {assessment['status']}")
                 if assessment['total']:
                     print(f"  Progreso: {assessment['completed']}/{assessment['total']} ({assessment['progress_percentage']}%)")
@@ -209,24 +695,17 @@ class DatabaseMonitor:
         print("🔍 FINDINGS POR SEVERIDAD")
         print("="*80 + "\n")
 
-        findings = self.get_findings_by_severity()
+        findings = data['findings_by_severity']
         for row in findings:
-            emoji = {
-                'critical': '🔴',
-                'high': '🟠',
-                'medium': '🟡',
-                'low': '🟢',
-                'info': 'ℹ️'
-            }.get(row['severity'], '⚪')
-            print(f"  {emoji} {row['severity'].upper():20} : {row['count']}")
+            print(f"  {severity_emoji(row['severity'])} {row['severity'].upper():20} : {row['count']}")
 
         print("\n" + "="*80)
         print("📋 ÚLTIMOS ASSESSMENTS CON FINDINGS")
         print("="*80 + "\n")
 
-        assessments_findings = self.get_assessments_with_findings()
+        assessments_findings = data['assessments_with_findings']
         for assessment in assessments_findings:
-            print(f"  {assessment['domain']}")
+            print(f"  {assessment['domain']}" + (f" [{assessment['instance']}]" if 'instance' in assessment else ""))
             print(f"    Total: {assessment['total_findings']} | "
                   f"🔴 {assessment['critical']} | "
                   f"🟠 {assessment['high']} | "
@@ -238,24 +717,18 @@ class DatabaseMonitor:
         print("🆕 ÚLTIMOS 10 FINDINGS")
         print("="*80 + "\n")
 
-        latest = self.get_latest_findings(10)
+        latest = data['latest_findings']
         for i, finding in enumerate(latest, 1):
-            emoji = {
-                'critical': '🔴',
-                'high': '🟠',
-                'medium': '🟡',
-                'low': '🟢',
-                'info': 'ℹ️'
-            }.get(finding['severity'], '⚪')
-            print(f"{i}. {emoji} [{finding['severity'].upper()}] {finding['title']}")
-            print(f"   Dominio: {finding['domain']} | Categoría: {finding['category_id']}")
+            print(f"{i}. {severity_emoji(finding['severity'])} [{finding['severity'].upper()}] {finding['title']}")
+            print(f"   Dominio: {finding['domain']} | Categoría: {finding['category_id']}"
+                  + (f" | Instancia: {finding['instance']}" if 'instance' in finding else ""))
             print()
 
         print("="*80)
         print("📊 CATEGORÍAS MÁS PROBLEMÁTICAS")
         print("="*80 + "\n")
 
-        categories = self.get_category_analysis()
+        categories = data['category_analysis']
         for category in categories:
             print(f"  {category['category_id']}")
             print(f"    Total: {category['total_findings']} | "
@@ -266,17 +739,160 @@ class DatabaseMonitor:
             print()
 
 
+def merge_summaries(summaries: Dict[str, Dict[str, List[Dict[str, Any]]]],
+                    latest_limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+    """Resumen global con las secciones de fetch_summary() de cada instancia
+
+    Las secciones con LIMIT (últimos assessments, categorías) se combinan a
+    partir del top de cada instancia.
+    """
+    statuses = merge_counts({row['status']: row['count'] for row in data['assessments_summary']}
+                            for data in summaries.values())
+    severities = merge_counts({row['severity']: row['count'] for row in data['findings_by_severity']}
+                              for data in summaries.values())
+
+    categories: Dict[str, Dict[str, Any]] = {}
+    for data in summaries.values():
+        for row in data['category_analysis']:
+            entry = categories.setdefault(row['category_id'], {
+                'category_id': row['category_id'], 'total_findings': 0, 'critical': 0, 'high': 0,
+                'medium': 0, 'score_sum': 0.0,
+            })
+            for column in ('total_findings', 'critical', 'high', 'medium'):
+                entry[column] += row[column]
+            # Promedio ponderado por la cantidad de findings de cada instancia
+            entry['score_sum'] += float(row['avg_severity_score']) * row['total_findings']
+    for entry in categories.values():
+        entry['avg_severity_score'] = entry.pop('score_sum') / max(entry['total_findings'], 1)
+
+    return {
+        'assessments_summary': [{'status': status, 'count': count}
+                                for status, count in sorted(statuses.items(), key=lambda x: x[1], reverse=True)],
+        'active_assessments': merge_rows({name: data['active_assessments'] for name, data in summaries.items()}),
+        'findings_by_severity': [{'severity': severity, 'count': count}
+                                 for severity, count in severities.items()],
+        'assessments_with_findings': merge_rows(
+            {name: data['assessments_with_findings'] for name, data in summaries.items()}, limit=10),
+        'latest_findings': merge_rows({name: data['latest_findings'] for name, data in summaries.items()},
+                                      limit=latest_limit),
+        'category_analysis': sorted(categories.values(),
+                                    key=lambda c: (c['avg_severity_score'], c['total_findings']),
+                                    reverse=True)[:10],
+    }
+
+
+def print_instances(results: Dict[str, TargetResult], monitors: Dict[str, DatabaseMonitor]):
+    """Imprimir el estado, los totales y el costo de cada instancia"""
+    print("\n" + "="*80)
+    print("🌐 INSTANCIAS")
+    print("="*80 + "\n")
+
+    for name, result in results.items():
+        if result.ok:
+            data = result.value
+            print(f"  ✅ {name:20} {result.elapsed * 1000:8.0f} ms | "
+                  f"{sum(row['count'] for row in data['assessments_summary'])} assessments "
+                  f"({len(data['active_assessments'])} activos), "
+                  f"{sum(row['count'] for row in data['findings_by_severity'])} findings | "
+                  f"{monitors[name].format_query_stats()}")
+        else:
+            print(f"  ❌ {name:20} {result.status.upper()}: {result.error}")
+
+    print()
+
+
+def run_multi_summary(targets, timeout: float = TARGET_TIMEOUT, single_query: bool = False,
+                      use_rollups: bool = False) -> bool:
+    """Resumen global y por instancia, consultando la BD de cada target en paralelo"""
+    try:
+        monitors = {target.name: DatabaseMonitor(target.db_config(DB_CONFIG)) for target in targets}
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+
+    print(f"\n🔍 Consultando {len(monitors)} bases de datos en paralelo (plazo {timeout:g} s)...")
+    fanout = FanOut(monitors, timeout)
+    results = fanout.run(lambda monitor: monitor.fetch_target_summary(single_query, use_rollups))
+    summaries = fanout.values(results, stale=False)
+    if summaries:
+        next(iter(monitors.values())).print_summary(merge_summaries(summaries))
+    print_instances(results, monitors)
+
+    # Los que siguen colgados se abandonan (hilos daemon)
+    for name in summaries:
+        monitors[name].backend.close()
+    return bool(summaries)
+
+
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Monitoreo de assessments vía PostgreSQL")
+    parser.add_argument('--watch', action='store_true',
+                        help="Monitoreo continuo por eventos (LISTEN/NOTIFY, con fallback a polling)")
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL,
+                        help="Segundos de espera por evento / intervalo de polling")
+    parser.add_argument('--rollups', action='store_true',
+                        help="Leer conteos de findings desde los rollups en vez de agrupar findings")
+    parser.add_argument('--verify-rollups', action='store_true',
+                        help="Comparar los rollups con los agregados reales (exit 1 si difieren)")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="Reconstruir los rollups desde findings")
+    parser.add_argument('--single-query', action='store_true',
+                        help="Traer todas las secciones en un solo viaje (statement preparado)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Repetir el resumen N veces (cada --interval segundos)")
+    parser.add_argument('--targets', metavar='ARCHIVO',
+                        help="JSON con varias instancias (clave 'db'; por defecto: variable MONITOR_TARGETS)")
+    parser.add_argument('--timeout', type=float, default=TARGET_TIMEOUT,
+                        help="Plazo por instancia en segundos (con varias instancias)")
+    parser.add_argument('--trends', action='store_true',
+                        help=f"Guardar cada resumen o cambio en el histórico ({TRENDS_PATH}, ver monitor_trends.py)")
+    args = parser.parse_args()
+
+    if not PSYCOPG2_AVAILABLE:
+        print("❌ Este script requiere psycopg2")
+        print("Instalar con: pip install psycopg2-binary")
+        sys.exit(1)
+
+    try:
+        targets = load_targets(args.targets)
+    except (OSError, ValueError) as e:
+        print(f"❌ Targets inválidos: {e}")
+        sys.exit(1)
+    if targets:
+        if args.watch or args.verify_rollups or args.rebuild_rollups or args.repeat > 1:
+            print("❌ Con varias instancias solo está disponible el resumen (--single-query, --rollups)")
+            sys.exit(1)
+        ok = run_multi_summary(targets, args.timeout, args.single_query, args.rollups)
+        print("="*80)
+        print("✅ Reporte completado" if ok else "❌ Ninguna instancia respondió")
+        print("="*80 + "\n")
+        sys.exit(0 if ok else 1)
+
     print("\n🔍 Conectando a PostgreSQL...")
 
     monitor = DatabaseMonitor(DB_CONFIG)
 
     if not monitor.connect():
         return
+    if args.trends:
+        monitor.trends = TrendStore().open()
 
     try:
-        monitor.print_summary()
+        if args.watch:
+            monitor.watch(args.interval)
+            return
+
+        if args.rebuild_rollups:
+            monitor.rebuild_rollups()
+            print("✅ Rollups reconstruidos")
+
+        if args.verify_rollups:
+            if not monitor.print_rollup_verification():
+                sys.exit(1)
+            return
+
+        monitor.run_summary_loop(args.repeat, args.interval, args.single_query, args.rollups)
 
         print("\n" + "="*80)
         print("✅ Reporte completado")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Export de findings y assessments a NDJSON (gzip) o Parquet para análisis offline
+Uso: python scripts/monitor_export.py DIRECTORIO [--source db|rest] [--format ndjson|parquet]
+                                     [--tables findings,assessments] [--workers N] [--restart]
+
+Parte cada tabla en rangos de created_at y los exporta en paralelo, un archivo
+por rango. Si se corta, volver a correr la misma orden retoma solo los rangos
+que faltan (manifest.json en DIRECTORIO).
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from monitor_core import PSYCOPG2_AVAILABLE
+from monitor_core.export import (
+    DEFAULT_WORKERS, EXPORT_COLUMNS, FORMATS, PARTS_PER_WORKER, PYARROW_AVAILABLE,
+    DbExportSource, Manifest, RestExportSource, export_range, plan_ranges
+)
+
+
+def open_source(name: str):
+    if name == 'db':
+        from monitor_db import DB_CONFIG
+        return DbExportSource(DB_CONFIG)
+    from monitor_assessments import SUPABASE_URL, ANON_KEY
+    return RestExportSource(SUPABASE_URL, ANON_KEY)
+
+
+def prepare_manifest(directory: str, source, fmt: str, tables, parts: int, restart: bool) -> Manifest:
+    """Manifest existente (si es el mismo export) o uno nuevo con los rangos planificados"""
+    manifest = None if restart else Manifest.load(directory)
+    if manifest is None:
+        manifest = Manifest.create(directory, source.name, fmt)
+    else:
+        manifest.check(source.name, fmt, tables)
+    for table in tables:
+        if table not in manifest.data['tables']:
+            manifest.add_table(table, plan_ranges(table, source.boundaries(table, parts), fmt))
+    manifest.save()
+    return manifest
+
+
+def run_export(manifest: Manifest, source, fmt: str, tables, workers: int) -> bool:
+    """Exportar los rangos pendientes; True si no quedó ninguno con error"""
+    pending = manifest.pending(tables)
+    total = sum(len(manifest.ranges(table)) for table in tables)
+    if len(pending) < total:
+        print(f"♻️  Reanudando: {total - len(pending)} de {total} rangos ya exportados")
+    if not pending:
+        return True
+
+    started = time.perf_counter()
+    rows = size = done = 0
+    ok = True
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        executor.submit(export_range, source, manifest.directory, fmt, table, EXPORT_COLUMNS[table], entry):
+            (table, entry)
+        for table, entry in pending
+    }
+    try:
+        for future in as_completed(futures):
+            table, entry = futures[future]
+            done += 1
+            try:
+                entry_rows, entry_bytes = future.result()
+            except Exception as e:
+                ok = False
+                entry.update(status='error', error=str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__)
+                print(f"  ❌ {entry['file']}: {entry['error']}")
+            else:
+                entry.update(status='done', rows=entry_rows, bytes=entry_bytes)
+                entry.pop('error', None)
+                rows += entry_rows
+                size += entry_bytes
+                print(f"  ✅ {entry['file']}: {entry_rows:,} filas, {entry_bytes / 1024 / 1024:.1f} MB "
+                      f"[{done}/{len(pending)}]")
+            manifest.save()
+    except KeyboardInterrupt:
+        executor.shutdown(wait=False, cancel_futures=True)
+        manifest.save()
+        print("\n⏸️  Export interrumpido: correr la misma orden para retomarlo")
+        sys.exit(130)
+    executor.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n📦 {rows:,} filas, {size / 1024 / 1024:.1f} MB en {elapsed:.1f} s "
+          f"({rows / max(elapsed, 1e-9):,.0f} filas/s, {workers} workers)")
+    return ok
+
+
+def print_summary(manifest: Manifest, tables):
+    print("\n" + "="*80)
+    print(f"📁 EXPORT EN {manifest.directory} ({manifest.data['format']}, {manifest.data['source']})")
+    print("="*80)
+    for table in tables:
+        ranges = manifest.ranges(table)
+        done = [entry for entry in ranges if entry['status'] == 'done']
+        rows = sum(entry['rows'] for entry in done)
+        size = sum(entry['bytes'] for entry in done)
+        print(f"  {table:12} {len(done):>4}/{len(ranges)} rangos  {rows:>12,} filas  {size / 1024 / 1024:>9.1f} MB")
+    print()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Export paralelo y reanudable de findings y assessments")
+    parser.add_argument('directory', help="Directorio de salida (con su manifest.json)")
+    parser.add_argument('--source', choices=['db', 'rest'], default='db')
+    parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+    parser.add_argument('--tables', default="findings,assessments",
+                        help=f"Tablas a exportar ({', '.join(EXPORT_COLUMNS)})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Rangos exportados en paralelo")
+    parser.add_argument('--parts', type=int, default=None,
+                        help=f"Rangos por tabla en un export nuevo (por defecto {PARTS_PER_WORKER} por worker)")
+    parser.add_argument('--restart', action='store_true', help="Ignorar el manifest existente y empezar de cero")
+    args = parser.parse_args()
+
+    tables = [table.strip() for table in args.tables.split(',') if table.strip()]
+    unknown = [table for table in tables if table not in EXPORT_COLUMNS]
+    if unknown:
+        parser.error(f"tablas no soportadas: {', '.join(unknown)}")
+    if args.format == 'parquet' and not PYARROW_AVAILABLE:
+        print("❌ pyarrow no está instalado: pip install pyarrow")
+        sys.exit(1)
+    if args.source == 'db' and not PSYCOPG2_AVAILABLE:
+        print("❌ psycopg2 no está instalado: pip install psycopg2-binary")
+        sys.exit(1)
+
+    source = open_source(args.source)
+    try:
+        source.open()
+        manifest = prepare_manifest(args.directory, source, args.format, tables,
+                                    args.parts or args.workers * PARTS_PER_WORKER, args.restart)
+        ok = run_export(manifest, source, args.format, tables, args.workers)
+    except Exception as e:
+        print(f"❌ Error en el export: {e}")
+        sys.exit(1)
+    finally:
+        source.close()
+
+    print_summary(manifest, tables)
+    if not ok:
+        print("⚠️  Hubo rangos con error: correr la misma orden para reintentarlos")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
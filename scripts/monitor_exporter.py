@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Exporter de métricas de assessments en formato Prometheus (text exposition 0.0.4)
+Uso: python scripts/monitor_exporter.py [--source rest|db|local] [--port 9464] [--interval 15] [--trends]
+
+Un solo hilo refresca el snapshot cada --interval segundos (un delta de
+assessments y un conteo por categoría/severidad) y /metrics sirve siempre los
+bytes ya renderizados: la cantidad de scrapers no cambia la carga en la BD.
+"""
+
+import argparse
+import gzip
+import sys
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from monitor_core import (
+    ACTIVE_STATUSES, ASSESSMENT_COLUMNS, PSYCOPG2_AVAILABLE, TRENDS_PATH, MonitorCore, TrendStore, open_core,
+    parse_timestamp, trend_sample
+)
+
+# Configuración
+EXPORTER_BIND = "0.0.0.0"
+EXPORTER_PORT = 9464
+REFRESH_INTERVAL = 15  # segundos entre refrescos del snapshot
+RECONCILE_EVERY = 20  # refrescos entre verificaciones del conteo de assessments (detecta borrados)
+WATERMARK_OVERLAP = 2  # segundos que se vuelven a pedir por transacciones tardías
+METRIC_PREFIX = "monitor"
+
+# Buckets (segundos) del histograma de duración de análisis: created_at -> completed_at
+DURATION_BUCKETS = (60, 300, 900, 1800, 3600, 7200, 14400, 43200, 86400)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _value(value: float) -> str:
+    """Enteros sin decimales; el resto con precisión completa (timestamps incluidos)"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class MetricsWriter:
+    """Acumula familias de métricas y las renderiza en el formato de texto de Prometheus"""
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> str:
+        name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def sample(self, name: str, value: float, labels: Dict[str, Any] = None):
+        self.lines.append(f"{name}{_labels(labels)} {_value(value)}")
+
+    def gauge(self, name: str, help_text: str, samples: Dict[tuple, float], label_names: tuple = ()):
+        """Gauge con una muestra por tupla de valores de labels"""
+        name = self.family(name, 'gauge', help_text)
+        for values, value in sorted(samples.items()):
+            self.sample(name, value, dict(zip(label_names, values)))
+
+    def histogram(self, name: str, help_text: str, observations: List[float], buckets: tuple):
+        name = self.family(name, 'histogram', help_text)
+        ordered = sorted(observations)
+        index = 0
+        for bound in buckets:
+            while index < len(ordered) and ordered[index] <= bound:
+                index += 1
+            self.sample(f"{name}_bucket", index, {'le': f"{bound:g}"})
+        self.sample(f"{name}_bucket", len(ordered), {'le': '+Inf'})
+        self.sample(f"{name}_sum", sum(ordered))
+        self.sample(f"{name}_count", len(ordered))
+
+    def render(self) -> bytes:
+        return ('\n'.join(self.lines) + '\n').encode()
+
+
+class MetricsExporter:
+    """Snapshot compartido y refrescado por deltas, renderizado una vez por refresco"""
+
+    def __init__(self, core: MonitorCore, interval: float = REFRESH_INTERVAL,
+                 reconcile_every: int = RECONCILE_EVERY, trends: Optional[TrendStore] = None):
+        self.core = core
+        self.trends = trends
+        self.interval = interval
+        self.reconcile_every = reconcile_every
+        self.assessments: Dict[str, Dict[str, Any]] = {}  # id -> fila (ASSESSMENT_COLUMNS)
+        self.category_counts: Dict[str, Dict[str, int]] = {}
+        self.watermark = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.scrapes = 0
+        self.last_refresh = 0.0
+        self.last_refresh_duration = 0.0
+        self._lock = threading.Lock()
+        self._payload = b''
+        self._payload_gzip = b''
+        self._stop = threading.Event()
+
+    def _load_assessments(self):
+        """Carga completa de assessments"""
+        self.assessments, self.watermark = {}, None
+        for row in self.core.iter_rows("assessments", ASSESSMENT_COLUMNS):
+            self._apply_assessment(row)
+
+    def _apply_assessment(self, row: Dict[str, Any]):
+        updated = parse_timestamp(row.get('updated_at'))
+        if updated and (self.watermark is None or updated > self.watermark):
+            self.watermark = updated
+        self.assessments[row['id']] = row
+
+    def refresh(self):
+        """Aplicar el delta de assessments, recontar findings y re-renderizar /metrics"""
+        started = time.perf_counter()
+        try:
+            self.core.backend.ensure_connection()
+            if self.watermark is None:
+                self._load_assessments()
+            else:
+                since = self.watermark - timedelta(seconds=WATERMARK_OVERLAP)
+                for row in self.core.rows_since("assessments", ASSESSMENT_COLUMNS, "updated_at", since):
+                    self._apply_assessment(row)
+                if self.refreshes % self.reconcile_every == 0 and \
+                        self.core.count("assessments") not in (None, len(self.assessments)):
+                    self._load_assessments()
+
+            # Un solo conteo agrupado: los totales por severidad salen de aquí
+            self.core.invalidate()
+            self.category_counts = self.core.category_counts()
+            if self.trends:
+                self.record_trends()
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"❌ Error al refrescar métricas: {e}", file=sys.stderr)
+        finally:
+            self.refreshes += 1
+            self.last_refresh = time.time()
+            self.last_refresh_duration = time.perf_counter() - started
+            self._publish()
+
+    def record_trends(self):
+        """Guardar el snapshot en el histórico (--trends)"""
+        status_counts: Dict[str, int] = {}
+        for row in self.assessments.values():
+            status = row.get('status') or 'unknown'
+            status_counts[status] = status_counts.get(status, 0) + 1
+        severity_counts: Dict[str, int] = {}
+        for by_severity in self.category_counts.values():
+            for severity, count in by_severity.items():
+                severity_counts[severity] = severity_counts.get(severity, 0) + count
+        active = [row for row in self.assessments.values() if row.get('status') in ACTIVE_STATUSES]
+        self.trends.record(trend_sample(status_counts, severity_counts, active))
+
+    def render(self) -> bytes:
+        """Métricas del snapshot actual (no consulta la BD)"""
+        metrics = MetricsWriter()
+
+        status_counts: Dict[tuple, float] = {}
+        progress, completed_categories, durations = {}, {}, []
+        for row in self.assessments.values():
+            status = row.get('status') or 'unknown'
+            status_counts[(status,)] = status_counts.get((status,), 0) + 1
+
+            if status in ACTIVE_STATUSES:
+                labels = (str(row['id']), row.get('domain') or '', status)
+                analysis = row.get('analysis_progress') or {}
+                total = int(analysis.get('total') or 0)
+                done = int(analysis.get('completed') or 0)
+                progress[labels] = done / total if total > 0 else 0.0
+                completed_categories[labels] = done
+
+            created = parse_timestamp(row.get('created_at'))
+            finished = parse_timestamp(row.get('completed_at'))
+            if created and finished and finished >= created:
+                durations.append((finished - created).total_seconds())
+
+        severity_counts: Dict[tuple, float] = {}
+        category_counts: Dict[tuple, float] = {}
+        for category, by_severity in self.category_counts.items():
+            for severity, count in by_severity.items():
+                category_counts[(category, severity)] = count
+                severity_counts[(severity,)] = severity_counts.get((severity,), 0) + count
+
+        metrics.gauge('assessments', "Assessments por estado", status_counts, ('status',))
+        metrics.gauge('findings', "Findings por severidad", severity_counts, ('severity',))
+        metrics.gauge('findings_by_category', "Findings por categoría y severidad",
+                      category_counts, ('category', 'severity'))
+        metrics.gauge('assessment_progress_ratio', "Fracción de categorías analizadas (assessments activos)",
+                      progress, ('assessment_id', 'domain', 'status'))
+        metrics.gauge('assessment_categories_completed', "Categorías analizadas (assessments activos)",
+                      completed_categories, ('assessment_id', 'domain', 'status'))
+        metrics.histogram('analysis_duration_seconds', "Duración del análisis (created_at a completed_at)",
+                          durations, DURATION_BUCKETS)
+
+        name = metrics.family('exporter_last_refresh_timestamp_seconds', 'gauge',
+                              "Hora (epoch) del último refresco del snapshot")
+        metrics.sample(name, self.last_refresh)
+        name = metrics.family('exporter_refresh_duration_seconds', 'gauge', "Duración del último refresco")
+        metrics.sample(name, self.last_refresh_duration)
+        name = metrics.family('exporter_refreshes_total', 'counter', "Refrescos del snapshot")
+        metrics.sample(name, self.refreshes)
+        name = metrics.family('exporter_refresh_errors_total', 'counter', "Refrescos que fallaron")
+        metrics.sample(name, self.refresh_errors)
+        name = metrics.family('exporter_scrapes_total', 'counter', "Peticiones a /metrics servidas")
+        metrics.sample(name, self.scrapes)
+        return metrics.render()
+
+    def _publish(self):
+        payload = self.render()
+        compressed = gzip.compress(payload, compresslevel=5)
+        with self._lock:
+            self._payload, self._payload_gzip = payload, compressed
+
+    def payload(self, accept_gzip: bool = False) -> bytes:
+        """Bytes de /metrics ya renderizados en el último refresco"""
+        with self._lock:
+            self.scrapes += 1
+            return self._payload_gzip if accept_gzip else self._payload
+
+    def run(self):
+        """Refrescar cada `interval` segundos hasta stop()"""
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def stop(self):
+        self._stop.set()
+
+
+def make_handler(exporter: MetricsExporter):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404, "Solo /metrics")
+                return
+            accept_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+            body = exporter.payload(accept_gzip)
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            if accept_gzip:
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def make_core(source: str) -> Optional[MonitorCore]:
+    if source == 'db':
+        if not PSYCOPG2_AVAILABLE:
+            print("❌ psycopg2 no está instalado: pip install psycopg2-binary")
+            return None
+        from monitor_db import DB_CONFIG
+        return open_core('db', db_config=DB_CONFIG)
+    if source == 'local':
+        return open_core('local')
+
+    from monitor_assessments import SUPABASE_URL, ANON_KEY
+    return open_core('rest', SUPABASE_URL, ANON_KEY)
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Exporter de métricas Prometheus de assessments")
+    parser.add_argument('--source', choices=['rest', 'db', 'local'], default='rest',
+                        help="local: espejo de monitor_mirror.py (MONITOR_MIRROR)")
+    parser.add_argument('--bind', default=EXPORTER_BIND)
+    parser.add_argument('--port', type=int, default=EXPORTER_PORT)
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL,
+                        help="Segundos entre refrescos del snapshot")
+    parser.add_argument('--once', action='store_true',
+                        help="Imprimir las métricas una vez y salir (p.ej. textfile collector)")
+    parser.add_argument('--trends', action='store_true',
+                        help=f"Guardar cada refresco en el histórico ({TRENDS_PATH}, ver monitor_trends.py)")
+    args = parser.parse_args()
+
+    try:
+        core = make_core(args.source)
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}")
+        sys.exit(1)
+    if core is None:
+        sys.exit(1)
+
+    exporter = MetricsExporter(core, args.interval, trends=TrendStore().open() if args.trends else None)
+    exporter.refresh()
+
+    if args.once:
+        sys.stdout.write(exporter.render().decode())
+        core.close()
+        return
+
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(exporter))
+    server.daemon_threads = True
+    threading.Thread(target=exporter.run, daemon=True).start()
+
+    print(f"📡 Métricas en http://{args.bind}:{server.server_port}/metrics "
+          f"(refresco cada {args.interval:g} s, fuente {args.source})")
+    print("Presiona Ctrl+C para detener\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✅ Exporter detenido")
+        print(f"📊 {exporter.refreshes} refrescos, {exporter.scrapes} scrapes; {core.format_stats()}")
+    finally:
+        exporter.stop()
+        server.server_close()
+        core.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
 """
 Monitoreo en tiempo real de assessments con interfaz visual
-Uso: python scripts/monitor_live.py
-Requiere: pip install rich
+Uso: python scripts/monitor_live.py [--mode auto|realtime|poll] [--targets ARCHIVO] [--trends]
+Requiere: pip install rich (opcional: websocket-client para Supabase Realtime)
 """
 
-import requests
+import argparse
+import json
+import queue
+import random
+import signal
+import sys
+import threading
 import time
-from datetime import datetime
-from typing import Dict, List, Any
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Optional
+
+from monitor_core import (
+    ACTIVE_ASSESSMENT_COLUMNS, ACTIVE_STATUSES, SEVERITY_COLORS, TARGET_TIMEOUT, FanOut, MonitorCore,
+    TRENDS_PATH, ProgressTracker, RestBackend, TrendStore, calculate_progress, format_duration, load_targets,
+    merge_live_stats, ordered_severities, parse_timestamp, trend_sample
+)
 
 try:
     from rich.console import Console
@@ -16,7 +30,7 @@ try:
     from rich.live import Live
     from rich.layout import Layout
     from rich.panel import Panel
-    from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
+    from rich.segment import Segment
     from rich.text import Text
     RICH_AVAILABLE = True
 except ImportError:
@@ -24,61 +38,663 @@ except ImportError:
     print("⚠️  Para mejor visualización, instala rich: pip install rich")
     print("Usando modo básico...\n")
 
+try:
+    import websocket  # pip install websocket-client
+    WEBSOCKET_AVAILABLE = True
+except ImportError:
+    WEBSOCKET_AVAILABLE = False
+
 # Configuración
 SUPABASE_URL = "http://10.10.10.77:8000"
 ANON_KEY = "eeyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoiYW5vbiIsImlzcyI6InN1cGFiYXNlIiwiaWF0IjoxNzYzMzU1NjAwLCJleHAiOjE5MjExMjIwMDB9.OzXw4tdhXGo59s1KqnAWD8O9XpdN3dcHTazxY0uL0Go"
-REFRESH_INTERVAL = 5  # segundos
+ACTIVE_ROWS = 5  # assessments activos que muestra el dashboard
+RECONCILE_EVERY = 60  # ticks entre reconciliaciones completas (detecta borrados)
+RECONCILE_IDS_EVERY = 4  # reconciliaciones entre comparaciones de ids (borrado + alta no cambian el conteo)
+WATERMARK_OVERLAP = 2  # segundos que se vuelven a pedir por transacciones tardías
+
+ASSESSMENT_COLUMNS = ACTIVE_ASSESSMENT_COLUMNS
+FINDING_COLUMNS = "id,severity,created_at"
+
+# Modo de actualización:
+#   auto     -> Supabase Realtime si está disponible, si no polling
+#   realtime -> igual que auto pero avisa si no puede suscribirse
+#   poll     -> polling incremental (PollScheduler)
+LIVE_MODE = "auto"
+REALTIME_HEARTBEAT = 25  # segundos entre heartbeats del websocket
+REALTIME_RESYNC_INTERVAL = 300  # segundos entre polls de seguridad (y reconexiones)
+REALTIME_CONNECT_TIMEOUT = 10  # segundos para confirmar la suscripción (en segundo plano)
+
+# Polling adaptativo: intervalo (mínimo, máximo) en segundos de cada fuente
+#   assessments -> delta de assessments (progreso de los activos y estados)
+#   findings    -> delta de findings (totales por severidad)
+#   reconcile   -> conteo exacto de ambas tablas (detecta borrados)
+# Se usa el mínimo mientras hay análisis avanzando o llegan cambios; si no, el
+# intervalo se multiplica por POLL_BACKOFF en cada poll hasta el máximo
+POLL_INTERVALS = {
+    'assessments': (3, 60),
+    'findings': (15, 300),
+    'reconcile': (300, 1800),
+}
+POLL_BACKOFF = 2
+POLL_JITTER = 0.2  # ± fracción aleatoria de cada espera (varios dashboards no consultan a la vez)
+SLOW_POLL = 2.0  # segundos; un poll más lento o con errores también espacia su fuente
+
+# El dashboard se redibuja al cambiar los datos y, con SIGWINCH, al cambiar el
+# tamaño de la terminal; sin SIGWINCH (Windows) se redibuja cada RESIZE_REFRESH s
+RESIZE_REFRESH = 2.0
+RESIZE_SIGNAL = hasattr(signal, 'SIGWINCH')
+
+# Cómo se está actualizando el modelo (panel de resumen)
+UPDATE_STATUS = {
+    'realtime': "Supabase Realtime",
+    'connecting': "polling (conectando a Realtime...)",
+    'fallback': f"polling (sin Realtime, se reintenta cada {REALTIME_RESYNC_INTERVAL} s)",
+    'unavailable': "polling (sin websocket-client)",
+    'polling': "polling",
+}
+UPDATE_STATUS_COLORS = {'realtime': "green", 'connecting': "yellow", 'fallback': "yellow"}
+
+# Estado de cada instancia en el panel de instancias (--targets)
+INSTANCE_STATUS = {
+    'ok': "[green]✅ ok[/green]",
+    'timeout': "[yellow]⏱️ timeout[/yellow]",
+    'busy': "[yellow]⏳ ocupada[/yellow]",
+    'error': "[red]❌ error[/red]",
+}
+
+
+class IncrementalSync:
+    """Modelo en memoria de assessments y findings sincronizado por deltas
+
+    Cada tick pide solo las filas con updated_at (assessments) o created_at
+    (findings) posteriores a la última marca de agua y actualiza los contadores.
+    Cada RECONCILE_EVERY ticks compara el conteo exacto del servidor con el
+    modelo, y cada RECONCILE_IDS_EVERY reconciliaciones también los ids, para
+    quitar los borrados que el delta no ve. Cada versión
+    nueva de un assessment alimenta el historial de `progress` (ritmo y ETA).
+    """
+
+    def __init__(self, core: MonitorCore, reconcile_every: int = RECONCILE_EVERY):
+        self.core = core
+        self.reconcile_every = reconcile_every
+        self.assessments = {}  # id -> fila
+        self.findings = {}  # id -> severidad
+        self.status_counts = {}
+        self.severity_counts = {}
+        self.assessments_watermark = None
+        self.findings_watermark = None
+        self.progress = ProgressTracker()
+        self.ticks = 0
+        self.reconciles = 0
+        self.last_delta_rows = 0
+        # Se incrementa cada vez que el modelo cambia: la UI solo redibuja si cambió
+        self.version = 0
+
+    def _bump(self, counts: Dict[str, int], key: str, delta: int):
+        counts[key] = counts.get(key, 0) + delta
+        if counts[key] <= 0:
+            del counts[key]
+
+    def _advance(self, watermark: Optional[datetime], value: str) -> Optional[datetime]:
+        ts = parse_timestamp(value)
+        if ts and (watermark is None or ts > watermark):
+            return ts
+        return watermark
+
+    def _since(self, table: str, columns: str, column: str, watermark: datetime):
+        return self.core.rows_since(table, columns, column, watermark - timedelta(seconds=WATERMARK_OVERLAP))
+
+    def apply_assessment(self, row: Dict[str, Any]) -> bool:
+        """Insertar o actualizar un assessment en el modelo; False si ya estaba igual"""
+        self.assessments_watermark = self._advance(self.assessments_watermark, row.get('updated_at'))
+        previous = self.assessments.get(row['id'])
+        if previous == row:
+            return False
+        if previous:
+            self._bump(self.status_counts, previous.get('status') or 'unknown', -1)
+        self.assessments[row['id']] = row
+        self._bump(self.status_counts, row.get('status') or 'unknown', 1)
+        self.progress.observe(row)
+        self.version += 1
+        return True
+
+    def apply_finding(self, row: Dict[str, Any]) -> bool:
+        """Insertar un finding en el modelo (o corregir su severidad); False si ya estaba igual"""
+        self.findings_watermark = self._advance(self.findings_watermark, row.get('created_at'))
+        severity = row.get('severity') or 'unknown'
+        previous = self.findings.get(row['id'])
+        if previous == severity:
+            return False
+        if previous:
+            self._bump(self.severity_counts, previous, -1)
+        self.findings[row['id']] = severity
+        self._bump(self.severity_counts, severity, 1)
+        self.version += 1
+        return True
+
+    def remove_assessment(self, assessment_id: str):
+        """Quitar un assessment borrado del modelo"""
+        previous = self.assessments.pop(assessment_id, None)
+        self.progress.forget(assessment_id)
+        if previous:
+            self._bump(self.status_counts, previous.get('status') or 'unknown', -1)
+            self.version += 1
+
+    def remove_finding(self, finding_id: str):
+        """Quitar un finding borrado del modelo"""
+        previous = self.findings.pop(finding_id, None)
+        if previous:
+            self._bump(self.severity_counts, previous, -1)
+            self.version += 1
+
+    def apply_change(self, change: Dict[str, Any]):
+        """Aplicar un evento postgres_changes de Supabase Realtime"""
+        table = change.get('table')
+        if change.get('type') == 'DELETE':
+            row_id = (change.get('old_record') or {}).get('id')
+            if table == 'assessments':
+                self.remove_assessment(row_id)
+            elif table == 'findings':
+                self.remove_finding(row_id)
+            return
+
+        record = change.get('record') or {}
+        if table == 'assessments':
+            self.apply_assessment({column: record.get(column) for column in ASSESSMENT_COLUMNS.split(',')})
+        elif table == 'findings':
+            self.apply_finding({column: record.get(column) for column in FINDING_COLUMNS.split(',')})
+
+    def load_assessments(self):
+        """Carga completa de assessments"""
+        previous, version = self.assessments, self.version
+        self.assessments, self.status_counts, self.assessments_watermark = {}, {}, None
+        for row in self.core.iter_rows("assessments", ASSESSMENT_COLUMNS):
+            self.apply_assessment(row)
+        self.progress.prune(self.assessments)
+        self.version = version + (self.assessments != previous)
+        return len(self.assessments)
+
+    def load_findings(self):
+        """Carga completa de findings (solo las columnas que se cuentan)"""
+        previous, version = self.findings, self.version
+        self.findings, self.severity_counts, self.findings_watermark = {}, {}, None
+        for row in self.core.iter_rows("findings", FINDING_COLUMNS):
+            self.apply_finding(row)
+        self.version = version + (self.findings != previous)
+        return len(self.findings)
+
+    def reconcile(self) -> int:
+        """Quitar del modelo las filas borradas en el servidor; filas que cambiaron
+
+        Si el conteo no coincide (o cada RECONCILE_IDS_EVERY veces, porque un
+        borrado más un alta lo dejan igual) se comparan los ids (select=id).
+        Los ids nuevos se buscan primero con el delta; si alguno sigue
+        faltando (p.ej. un commit tardío fuera del solapamiento) se recarga la
+        tabla.
+        """
+        self.reconciles += 1
+        check_ids = self.reconciles % RECONCILE_IDS_EVERY == 0
+        changed = 0
+        for table, poll, load, remove in (
+            ("assessments", self.poll_assessments, self.load_assessments, self.remove_assessment),
+            ("findings", self.poll_findings, self.load_findings, self.remove_finding),
+        ):
+            known = set(self.assessments if table == "assessments" else self.findings)
+            count = self.core.count(table)
+            if count is None or (count == len(known) and not check_ids):
+                continue
+            ids = {row['id'] for row in self.core.iter_rows(table, "id")}
+            if len(ids) != count:
+                # El recorrido falló a medias o la tabla cambió mientras tanto: en la próxima
+                continue
+            if ids - known:
+                changed += poll()
+                if ids - set(self.assessments if table == "assessments" else self.findings):
+                    changed += load()
+                    continue
+            # Solo las filas que ya estaban antes de leer los ids: las que trajo el delta son nuevas
+            gone = known - ids
+            for row_id in gone:
+                remove(row_id)
+            changed += len(gone)
+        return changed
+
+    def poll_assessments(self) -> int:
+        """Delta de assessments desde la última marca de agua (carga completa la primera vez)
+
+        Retorna las filas que cambiaron el modelo: las del solapamiento de la
+        marca de agua llegan en cada poll y no cuentan.
+        """
+        if self.assessments_watermark is None:
+            return self.load_assessments()
+        rows = self._since("assessments", ASSESSMENT_COLUMNS, "updated_at", self.assessments_watermark)
+        return sum(self.apply_assessment(row) for row in rows)
+
+    def poll_findings(self) -> int:
+        """Delta de findings desde la última marca de agua (carga completa la primera vez); filas que cambiaron"""
+        if self.findings_watermark is None:
+            return self.load_findings()
+        rows = self._since("findings", FINDING_COLUMNS, "created_at", self.findings_watermark)
+        return sum(self.apply_finding(row) for row in rows)
+
+    def has_active(self) -> bool:
+        """Hay algún análisis en curso que avanza
+
+        Los pendientes, los subidos y los detenidos (sin avance en
+        STALL_AFTER) no cuentan: uno trabado no debe mantener el polling rápido.
+        """
+        stalled = self.progress.stalled_ids()
+        return any((self.assessments.get(assessment_id) or {}).get('status') == 'analyzing'
+                   for assessment_id in self.progress.tracks if assessment_id not in stalled)
+
+    def poll(self) -> Dict[str, Any]:
+        """Aplicar los deltas de ambas tablas y retornar las estadísticas"""
+        fetched = self.poll_assessments() + self.poll_findings()
+
+        self.ticks += 1
+        if self.ticks % self.reconcile_every == 0:
+            fetched += self.reconcile()
+
+        self.last_delta_rows = fetched
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas en el mismo formato que AssessmentMonitor.get_stats()"""
+        active = [a for a in self.assessments.values() if a.get('status') in ACTIVE_STATUSES]
+        active.sort(key=lambda a: a.get('created_at') or '', reverse=True)
+        return {
+            'total_assessments': len(self.assessments),
+            'total_findings': len(self.findings),
+            'status_counts': dict(self.status_counts),
+            'severity_counts': dict(self.severity_counts),
+            'active_assessments': active,
+            'delta_rows': self.last_delta_rows
+        }
+
+
+class PollScheduler:
+    """Cuándo le toca a cada fuente del polling incremental (POLL_INTERVALS)
 
+    Mientras hay análisis avanzando, o el último poll cambió el modelo, cada
+    fuente usa su intervalo mínimo. Si no, el intervalo se multiplica por
+    POLL_BACKOFF hasta el máximo: un dashboard en reposo hace una petición por
+    minuto. Cuando vuelve la actividad (p.ej. un upload nuevo) las fuentes
+    espaciadas por reposo vuelven al mínimo. Un poll que sumó errores HTTP o
+    tardó más de SLOW_POLL también espacia su fuente, aunque haya actividad.
+    Cada espera lleva ±POLL_JITTER aleatorio.
+    """
+
+    def __init__(self, sync: IncrementalSync, error_count: Callable[[], int] = None,
+                 intervals: Dict[str, tuple] = POLL_INTERVALS):
+        self.sync = sync
+        self.error_count = error_count or (lambda: 0)
+        self.limits = dict(intervals)
+        self.intervals = {name: minimum for name, (minimum, _) in intervals.items()}
+        self.due = {name: time.monotonic() + self._jitter(minimum) for name, minimum in self.intervals.items()}
+        self.polls = dict.fromkeys(intervals, 0)
+        self.strained = dict.fromkeys(intervals, False)  # último poll con errores o lento
+        self.backoffs = 0  # polls espaciados por errores o lentitud
+
+    @staticmethod
+    def _jitter(interval: float) -> float:
+        return interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+    def _poll(self, name: str) -> int:
+        if name == 'assessments':
+            return self.sync.poll_assessments()
+        if name == 'findings':
+            return self.sync.poll_findings()
+        return self.sync.reconcile()
+
+    def _schedule(self, name: str, busy: bool, strained: bool):
+        minimum, maximum = self.limits[name]
+        if busy and not strained:
+            self.intervals[name] = minimum
+        else:
+            self.intervals[name] = min(self.intervals[name] * POLL_BACKOFF, maximum)
+        self.due[name] = time.monotonic() + self._jitter(self.intervals[name])
+
+    def _wake(self):
+        """Adelantar las fuentes espaciadas por reposo (no las espaciadas por errores)"""
+        for name, (minimum, _) in self.limits.items():
+            if name != 'reconcile' and not self.strained[name] and self.intervals[name] > minimum:
+                self.intervals[name] = minimum
+                self.due[name] = min(self.due[name], time.monotonic() + self._jitter(minimum))
+
+    def wait(self) -> float:
+        """Segundos hasta la próxima fuente que toca"""
+        return max(min(self.due.values()) - time.monotonic(), 0)
+
+    def run_due(self) -> int:
+        """Pollear las fuentes a las que ya les tocaba; filas que cambiaron el modelo"""
+        total = 0
+        for name in sorted(self.due, key=self.due.get):
+            if self.due[name] > time.monotonic():
+                continue
+            errors, started = self.error_count(), time.perf_counter()
+            try:
+                changed = self._poll(name)
+            except Exception:
+                self.backoffs += 1
+                self.strained[name] = True
+                self._schedule(name, busy=False, strained=True)
+                raise
+            strained = self.error_count() > errors or time.perf_counter() - started > SLOW_POLL
+            self.backoffs += strained
+            self.strained[name] = strained
+            # La reconciliación no se acelera con la actividad: solo detecta borrados
+            busy = changed > 0 or (name != 'reconcile' and self.sync.has_active())
+            self._schedule(name, busy, strained)
+            if busy and name != 'reconcile':
+                self._wake()
+            self.polls[name] += 1
+            total += changed
+        self.sync.last_delta_rows = total
+        return total
+
+    def format_stats(self) -> str:
+        polls = ", ".join(f"{name} {self.polls[name]} (cada {self.intervals[name]:g} s)" for name in self.polls)
+        return f"polls: {polls}; {self.backoffs} espaciados por errores o lentitud"
+
+
+class RealtimeListener:
+    """Suscripción a Supabase Realtime (postgres_changes) en un hilo aparte
+
+    Los eventos se encolan en `events`; el hilo principal los aplica sobre
+    IncrementalSync para no compartir estado entre hilos.
+    """
+
+    TOPIC = "realtime:monitor"
 
-class AssessmentMonitor:
     def __init__(self, url: str, key: str):
-        self.url = url
-        self.headers = {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json"
+        ws_url = url.replace('https://', 'wss://').replace('http://', 'ws://')
+        self.ws_url = f"{ws_url}/realtime/v1/websocket?apikey={key}&vsn=1.0.0"
+        self.key = key
+        self.events = queue.Queue()
+        self.connected = threading.Event()
+        self.closed = threading.Event()
+        self._ref = 0
+        self._app = None
+
+    def _send(self, topic: str, event: str, payload: Dict[str, Any]):
+        self._ref += 1
+        self._app.send(json.dumps({"topic": topic, "event": event, "payload": payload, "ref": str(self._ref)}))
+
+    def _on_open(self, ws):
+        self._send(self.TOPIC, "phx_join", {
+            "config": {
+                "postgres_changes": [
+                    {"event": "*", "schema": "public", "table": "assessments"},
+                    {"event": "*", "schema": "public", "table": "findings"},
+                ]
+            },
+            "access_token": self.key
+        })
+
+    def _on_message(self, ws, message: str):
+        msg = json.loads(message)
+        event = msg.get('event')
+        if event == 'phx_reply' and msg.get('topic') == self.TOPIC:
+            if msg.get('payload', {}).get('status') == 'ok':
+                self.connected.set()
+            else:
+                self.close()
+        elif event == 'postgres_changes':
+            self.events.put(msg['payload']['data'])
+        elif event in ('phx_error', 'phx_close'):
+            self.close()
+
+    def _on_close(self, ws, *args):
+        self.connected.clear()
+        self.closed.set()
+
+    def _heartbeat(self):
+        while not self.closed.wait(REALTIME_HEARTBEAT):
+            try:
+                self._send("phoenix", "heartbeat", {})
+            except Exception:
+                self.close()
+
+    def start(self, timeout: float = REALTIME_CONNECT_TIMEOUT):
+        """Conectar y suscribirse en segundo plano; si no se confirma en `timeout` s se cierra
+
+        No bloquea: el dashboard sigue con polling hasta que se activa `connected`
+        (o se activa `closed` si la suscripción falló).
+        """
+        self._app = websocket.WebSocketApp(
+            self.ws_url,
+            on_open=self._on_open,
+            on_message=self._on_message,
+            on_close=self._on_close,
+            on_error=lambda ws, error: None
+        )
+        threading.Thread(target=self._app.run_forever, daemon=True).start()
+        threading.Thread(target=self._heartbeat, daemon=True).start()
+        threading.Thread(target=self._confirm, args=(timeout,), daemon=True).start()
+
+    def _confirm(self, timeout: float):
+        if not self.connected.wait(timeout):
+            self.close()
+
+    def close(self):
+        """Cerrar la conexión (el monitor vuelve a polling)"""
+        self.connected.clear()
+        self.closed.set()
+        if self._app:
+            self._app.close()
+
+
+class CachedRenderable:
+    """Widget persistente: conserva sus líneas ya renderizadas hasta que cambie su contenido o su tamaño"""
+
+    def __init__(self, renderable=""):
+        self.renderable = renderable
+        self.renders = 0
+        self._size = None
+        self._lines = None
+
+    def update(self, renderable):
+        self.renderable = renderable
+        self._lines = None
+
+    def __rich_console__(self, console, options):
+        size = (options.max_width, options.height)
+        lines = self._lines
+        if lines is None or size != self._size:
+            # Sin SIGWINCH renderiza el hilo de refresco de Live: si update() llega
+            # a mitad del render, estas líneas no se guardan
+            renderable = self.renderable
+            lines = console.render_lines(renderable, options, pad=True)
+            if renderable is self.renderable:
+                self._lines, self._size = lines, size
+            self.renders += 1
+        new_line = Segment.line()
+        for line in lines:
+            yield from line
+            yield new_line
+
+
+class LiveDashboard:
+    """Layout de rich con widgets persistentes que se actualizan por diferencias
+
+    Cada panel tiene una "vista" (tupla inmutable con solo lo que muestra); en
+    cada tick se compara con la anterior y solo se reconstruyen y re-renderizan
+    los paneles cuya vista cambió. Si no cambió ninguno no se redibuja nada.
+    """
+
+    def __init__(self, monitor: 'LiveMonitor'):
+        self.monitor = monitor
+        names = ['header', 'summary', 'status', 'active', 'findings']
+        multi = isinstance(monitor, MultiAssessmentMonitor)
+        if multi:
+            names.append('instances')
+        self.widgets = {name: CachedRenderable() for name in names}
+        self.views = {}
+
+        self.layout = Layout()
+        self.layout.split_column(
+            Layout(self.widgets['header'], name="header", size=5),
+            Layout(self.widgets['summary'], name="summary", size=7),
+            Layout(name="tables"),
+        )
+        self.layout["tables"].split_row(Layout(name="status"), Layout(self.widgets['findings'], name="findings"))
+        self.layout["status"].split_column(Layout(self.widgets['status']), Layout(self.widgets['active']))
+        if multi:
+            self.layout["findings"].split_column(Layout(self.widgets['findings']), Layout(self.widgets['instances']))
+
+        # Costo por tick (CPU del proceso, no tiempo de pared)
+        self.ticks = 0
+        self.redraws = 0
+        self.panel_updates = 0
+        self.cpu_total = 0.0
+        self.cpu_max = 0.0
+        self._drawing = False
+        self._resized = False
+
+    def views_for(self, stats: Dict[str, Any]) -> Dict[str, tuple]:
+        """Lo que muestra cada panel; el costo no depende de cuántos assessments activos haya"""
+        active = stats.get('active_assessments', [])
+        views = {
+            'summary': (stats['total_assessments'], stats['total_findings'], len(active), stats.get('updates')),
+            'status': tuple(sorted(stats.get('status_counts', {}).items(), key=lambda x: x[1], reverse=True)),
+            'findings': tuple(ordered_severities(stats.get('severity_counts', {}))),
+            'active': tuple(
+                (a.get('instance'), a.get('domain'), a.get('status'),
+                 json.dumps(a.get('analysis_progress'), sort_keys=True),
+                 self.monitor.format_estimate(self.monitor.estimate(a)))
+                for a in active[:ACTIVE_ROWS]
+            ),
         }
-        self.console = Console() if RICH_AVAILABLE else None
+        if 'instances' in self.widgets:
+            views['instances'] = stats['instances']
+        return views
+
+    def _build(self, name: str, stats: Dict[str, Any]):
+        if name == 'summary':
+            lines = (
+                f"[bold green]Total Assessments:[/bold green] {stats['total_assessments']}\n"
+                f"[bold yellow]Total Findings:[/bold yellow] {stats['total_findings']}\n"
+                f"[bold blue]Activos:[/bold blue] {len(stats['active_assessments'])}"
+            )
+            if 'updates' in stats:
+                color = UPDATE_STATUS_COLORS.get(stats['updates'], "white")
+                lines += (f"\n[bold magenta]Actualización:[/bold magenta] "
+                          f"[{color}]{UPDATE_STATUS[stats['updates']]}[/{color}]")
+            return Panel(
+                lines,
+                title="📈 Resumen General",
+                style="green"
+            )
+        if name == 'status':
+            return self.monitor.create_status_table(stats)
+        if name == 'findings':
+            return self.monitor.create_findings_table(stats)
+        if name == 'instances':
+            return self.monitor.create_instances_table(stats)
+        return self.monitor.create_active_table(stats)
+
+    def update(self, stats: Dict[str, Any]) -> List[str]:
+        """Actualizar los paneles que cambiaron; retorna sus nombres ([] = no redibujar)"""
+        started = time.process_time()
+        changed = []
+        for name, view in self.views_for(stats).items():
+            if self.views.get(name) != view:
+                self.views[name] = view
+                self.widgets[name].update(self._build(name, stats))
+                changed.append(name)
+
+        if changed:
+            # La hora del encabezado es la del último cambio de datos
+            self.widgets['header'].update(Panel(
+                f"[bold cyan]🔍 Monitor de Assessments - Supabase[/bold cyan]\n"
+                f"[dim]{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}[/dim]",
+                style="bold white on blue"
+            ))
+            self.redraws += 1
+            self.panel_updates += len(changed)
+
+        self._account(started)
+        return changed
+
+    def _account(self, started: float):
+        elapsed = time.process_time() - started
+        self.ticks += 1
+        self.cpu_total += elapsed
+        self.cpu_max = max(self.cpu_max, elapsed)
+
+    def refresh(self, live: 'Live'):
+        """Redibujar en la terminal (el render cuenta en el CPU del tick)"""
+        started = time.process_time()
+        self._drawing = True
+        try:
+            live.refresh()
+            # Un resize durante el redibujado lo deja pendiente: se repite con el tamaño nuevo
+            while self._resized:
+                self._resized = False
+                live.refresh()
+        finally:
+            self._drawing = False
+        elapsed = time.process_time() - started
+        self.cpu_total += elapsed
+        self.cpu_max = max(self.cpu_max, elapsed)
+
+    @contextmanager
+    def redraw_on_resize(self, live: 'Live'):
+        """Redibujar con SIGWINCH mientras dura el bloque (solo el hilo principal recibe señales)"""
+        if not RESIZE_SIGNAL or threading.current_thread() is not threading.main_thread():
+            yield
+            return
 
-    def query(self, table: str, select: str = "*", filters: str = "") -> List[Dict[str, Any]]:
-        """Hacer query a Supabase"""
-        endpoint = f"{self.url}/rest/v1/{table}"
-        params = f"?select={select}{filters}"
+        def on_resize(signum, frame):
+            if self._drawing:
+                self._resized = True
+            else:
+                self.refresh(live)
 
+        previous = signal.signal(signal.SIGWINCH, on_resize)
         try:
-            response = requests.get(endpoint + params, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            return []
+            yield
+        finally:
+            signal.signal(signal.SIGWINCH, previous)
 
+    def format_stats(self) -> str:
+        average = self.cpu_total * 1000 / max(self.ticks, 1)
+        return (f"CPU por tick: media {average:.2f} ms, máx {self.cpu_max * 1000:.2f} ms "
+                f"({self.ticks} ticks, {self.redraws} redibujados, {self.panel_updates} paneles actualizados)")
+
+
+class LiveMonitor(ABC):
+    """Presentación común de los dashboards en vivo: tablas, layout y bucles de refresco
+
+    Las subclases aportan los datos (iter_updates, get_stats, estimate y http_stats).
+    """
+
+    def __init__(self):
+        self.console = Console() if RICH_AVAILABLE else None
+        self.trends: Optional[TrendStore] = None
+        self.dashboard: Optional[LiveDashboard] = None
+
+    @abstractmethod
     def get_stats(self) -> Dict[str, Any]:
-        """Obtener estadísticas generales"""
-        assessments = self.query("assessments", "status,created_at,analysis_progress")
-        findings = self.query("findings", "severity")
+        """Estadísticas actuales en el formato de MonitorCore.live_stats()"""
 
-        # Contar por estado
-        status_counts = {}
-        for a in assessments:
-            status = a.get('status', 'unknown')
-            status_counts[status] = status_counts.get(status, 0) + 1
+    @abstractmethod
+    def iter_updates(self, mode: str = LIVE_MODE):
+        """Generar las estadísticas cada vez que el modelo cambia"""
 
-        # Contar por severidad
-        severity_counts = {}
-        for f in findings:
-            severity = f.get('severity', 'unknown')
-            severity_counts[severity] = severity_counts.get(severity, 0) + 1
+    @abstractmethod
+    def estimate(self, assessment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Ritmo y ETA de un assessment activo"""
 
-        # Assessments activos
-        active = [a for a in assessments if a.get('status') in ['analyzing', 'pending', 'uploaded']]
+    @abstractmethod
+    def http_stats(self) -> List[str]:
+        """Contadores para imprimir al salir"""
 
-        return {
-            'total_assessments': len(assessments),
-            'total_findings': len(findings),
-            'status_counts': status_counts,
-            'severity_counts': severity_counts,
-            'active_assessments': active
-        }
+    def record_trends(self, stats: Dict[str, Any]):
+        """Guardar el snapshot en el histórico (--trends)"""
+        if self.trends:
+            self.trends.record(trend_sample(stats['status_counts'], stats['severity_counts'],
+                                            stats['active_assessments']))
 
     def create_status_table(self, stats: Dict) -> Table:
         """Crear tabla de estados"""
@@ -99,23 +715,12 @@ class AssessmentMonitor:
         table.add_column("Cantidad", justify="right")
 
         severity_counts = stats.get('severity_counts', {})
-        severity_colors = {
-            'critical': 'red',
-            'high': 'orange1',
-            'medium': 'yellow',
-            'low': 'green',
-            'info': 'blue'
-        }
-
-        severity_order = ['critical', 'high', 'medium', 'low', 'info']
-        for severity in severity_order:
-            count = severity_counts.get(severity, 0)
-            if count > 0:
-                color = severity_colors.get(severity, 'white')
-                table.add_row(
-                    f"[{color}]{severity.upper()}[/{color}]",
-                    f"[{color}]{count}[/{color}]"
-                )
+        for severity, count in ordered_severities(severity_counts):
+            color = SEVERITY_COLORS.get(severity, 'white')
+            table.add_row(
+                f"[{color}]{severity.upper()}[/{color}]",
+                f"[{color}]{count}[/{color}]"
+            )
 
         return table
 
@@ -125,87 +730,61 @@ class AssessmentMonitor:
         table.add_column("Dominio", style="cyan")
         table.add_column("Estado", style="yellow")
         table.add_column("Progreso", justify="right")
+        table.add_column("Ritmo", justify="right")
+        table.add_column("ETA", justify="right")
 
         active = stats.get('active_assessments', [])
 
         if not active:
-            table.add_row("---", "---", "---")
+            table.add_row("---", "---", "---", "---", "---")
         else:
-            for assessment in active[:5]:  # Mostrar solo 5
-                # Obtener assessment completo con dominio
-                ass_id = assessment.get('id')
-                full_data = self.query("assessments", "domain,status,analysis_progress", f"&id=eq.{ass_id}")
-
-                if full_data:
-                    domain = full_data[0].get('domain', 'N/A')
-                    status = full_data[0].get('status', 'N/A')
-                    progress = full_data[0].get('analysis_progress', {})
-
-                    if progress:
-                        completed = progress.get('completed', 0)
-                        total = progress.get('total', 1)
-                        percentage = round((completed / total) * 100, 1) if total > 0 else 0
-                        progress_str = f"{completed}/{total} ({percentage}%)"
-                    else:
-                        progress_str = "N/A"
-
-                    table.add_row(domain, status, progress_str)
+            for assessment in active[:ACTIVE_ROWS]:
+                domain = assessment.get('domain', 'N/A')
+                if 'instance' in assessment:
+                    domain = f"{domain} [dim]({assessment['instance']})[/dim]"
+                status = assessment.get('status', 'N/A')
+                progress = assessment.get('analysis_progress', {})
+                rate, eta, stalled = self.format_estimate(self.estimate(assessment))
+                if stalled:
+                    status = f"[bold red]⚠️ {status} (detenido)[/bold red]"
 
-        return table
-
-    def create_layout(self, stats: Dict) -> Layout:
-        """Crear layout completo"""
-        layout = Layout()
-
-        # Título
-        title = Panel(
-            f"[bold cyan]🔍 Monitor de Assessments - Supabase[/bold cyan]\n"
-            f"[dim]{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}[/dim]",
-            style="bold white on blue"
-        )
-
-        # Estadísticas generales
-        summary = Panel(
-            f"[bold green]Total Assessments:[/bold green] {stats['total_assessments']}\n"
-            f"[bold yellow]Total Findings:[/bold yellow] {stats['total_findings']}\n"
-            f"[bold blue]Activos:[/bold blue] {len(stats['active_assessments'])}",
-            title="📈 Resumen General",
-            style="green"
-        )
+                if progress:
+                    completed = progress.get('completed', 0)
+                    total = progress.get('total', 1)
+                    percentage = calculate_progress(progress, 1)
+                    progress_str = f"{completed}/{total} ({percentage}%)"
+                else:
+                    progress_str = "N/A"
 
-        # Crear layout
-        layout.split_column(
-            Layout(name="header", size=5),
-            Layout(name="summary", size=7),
-            Layout(name="tables"),
-        )
+                table.add_row(domain, status, progress_str, rate, eta)
 
-        layout["header"].update(title)
-        layout["summary"].update(summary)
-
-        # Tablas
-        layout["tables"].split_row(
-            Layout(name="status"),
-            Layout(name="findings"),
-        )
+        return table
 
-        layout["status"].split_column(
-            Layout(self.create_status_table(stats)),
-            Layout(self.create_active_table(stats))
-        )
-        layout["findings"].update(self.create_findings_table(stats))
+    @staticmethod
+    def format_estimate(estimate: Optional[Dict[str, Any]]) -> tuple:
+        """(ritmo, ETA, detenido) como texto para la tabla de activos"""
+        if not estimate:
+            return "--", "--", False
+        rate = estimate['rate_per_min']
+        return (f"{rate:.1f} cat/min" if rate is not None else "--",
+                format_duration(estimate['eta_seconds']),
+                estimate['stalled'])
 
-        return layout
+    def create_layout(self, stats: Dict) -> Layout:
+        """Layout completo con `stats` (el LiveDashboard se crea una vez y se actualiza por diferencias)"""
+        if self.dashboard is None:
+            self.dashboard = LiveDashboard(self)
+        self.dashboard.update(stats)
+        return self.dashboard.layout
 
-    def monitor_basic(self):
+    def monitor_basic(self, mode: str = LIVE_MODE):
         """Monitoreo básico sin rich"""
         print("\n🔍 Iniciando monitor básico...")
         print("Presiona Ctrl+C para detener\n")
 
         try:
-            while True:
-                stats = self.get_stats()
-
+            for stats in self.iter_updates(mode):
+                self.record_trends(stats)
                 print(f"\n{'='*60}")
                 print(f"Actualizado: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 print(f"{'='*60}")
@@ -213,6 +792,21 @@ class AssessmentMonitor:
                 print(f"\n📊 Total Assessments: {stats['total_assessments']}")
                 print(f"🔍 Total Findings: {stats['total_findings']}")
                 print(f"⏳ Activos: {len(stats['active_assessments'])}")
+                print(f"🔄 Filas sincronizadas: {stats['delta_rows']}")
+                if 'updates' in stats:
+                    print(f"📡 Actualización: {UPDATE_STATUS[stats['updates']]}")
+
+                for assessment in stats['active_assessments'][:ACTIVE_ROWS]:
+                    rate, eta, stalled = self.format_estimate(self.estimate(assessment))
+                    instance = f" ({assessment['instance']})" if 'instance' in assessment else ""
+                    print(f"  {assessment.get('domain', 'N/A')}{instance}: {rate}, ETA {eta}"
+                          + (" ⚠️ detenido" if stalled else ""))
+
+                if 'instances' in stats:
+                    print("\nInstancias:")
+                    for name, status, stale, total, active in stats['instances']:
+                        print(f"  {name}: {status}" + (" (datos previos)" if stale else "")
+                              + (f", {total} assessments, {active} activos" if total is not None else ""))
 
                 print("\nEstados:")
                 for status, count in stats['status_counts'].items():
@@ -222,48 +816,302 @@ class AssessmentMonitor:
                 for severity, count in stats['severity_counts'].items():
                     print(f"  {severity}: {count}")
 
-                print(f"\nPróxima actualización en {REFRESH_INTERVAL} segundos...")
-                time.sleep(REFRESH_INTERVAL)
+                print("\nEsperando cambios...")
 
         except KeyboardInterrupt:
             print("\n\n✅ Monitor detenido")
+            for line in self.http_stats():
+                print(f"🌐 HTTP: {line}")
 
-    def monitor_live(self):
-        """Monitoreo en tiempo real con rich"""
+    def monitor_live(self, mode: str = LIVE_MODE):
+        """Monitoreo en tiempo real con rich (redibuja solo cuando cambian los datos)"""
         if not RICH_AVAILABLE:
-            self.monitor_basic()
+            self.monitor_basic(mode)
             return
 
-        with Live(self.create_layout(self.get_stats()), refresh_per_second=1, console=self.console) as live:
+        updates = self.iter_updates(mode)
+        stats = next(updates)
+        self.record_trends(stats)
+        layout = self.create_layout(stats)
+        dashboard = self.dashboard
+        # Sin refresco por temporizador: solo se redibuja cuando cambia algún panel o la terminal
+        with Live(layout, auto_refresh=not RESIZE_SIGNAL, refresh_per_second=1 / RESIZE_REFRESH,
+                  console=self.console) as live, dashboard.redraw_on_resize(live):
             try:
-                while True:
-                    time.sleep(REFRESH_INTERVAL)
-                    stats = self.get_stats()
-                    live.update(self.create_layout(stats))
+                for stats in updates:
+                    self.record_trends(stats)
+                    if dashboard.update(stats):
+                        dashboard.refresh(live)
             except KeyboardInterrupt:
                 self.console.print("\n[bold green]✅ Monitor detenido[/bold green]")
+                for line in self.http_stats():
+                    self.console.print(f"[dim]🌐 HTTP: {line}[/dim]")
+                self.console.print(f"[dim]🖥️  {dashboard.format_stats()}[/dim]")
+
+
+class AssessmentMonitor(LiveMonitor):
+    """Dashboard en vivo sobre MonitorCore + RestBackend"""
+
+    def __init__(self, url: str, key: str):
+        super().__init__()
+        self.url = url
+        self.key = key
+        # Sin mensajes de error: se imprimirían encima del layout de rich
+        self.backend = RestBackend(url, key, verbose=False)
+        self.core = MonitorCore(self.backend)
+        self.transport = self.backend.transport
+        self.headers = self.backend.headers
+        self.sync = IncrementalSync(self.core)
+        self.scheduler = PollScheduler(self.sync, lambda: self.transport.error_count)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtener estadísticas generales (todos los conteos resueltos en el servidor)"""
+        return self.core.live_stats()
+
+    def estimate(self, assessment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Ritmo y ETA de un assessment activo según el historial de la sincronización"""
+        return self.sync.progress.estimate(assessment.get('id'))
+
+    def http_stats(self) -> List[str]:
+        """Contadores HTTP, de cache y del polling para imprimir al salir"""
+        return [self.core.format_stats(), self.scheduler.format_stats()]
+
+    def _start_realtime(self) -> Optional[RealtimeListener]:
+        if not WEBSOCKET_AVAILABLE:
+            return None
+        listener = RealtimeListener(self.url, self.key)
+        listener.start()
+        return listener
+
+    @staticmethod
+    def update_status(mode: str, listener: Optional[RealtimeListener]) -> str:
+        """Clave de UPDATE_STATUS para el modo y el estado de la suscripción"""
+        if mode == 'poll':
+            return 'polling'
+        if listener is None:
+            return 'unavailable'
+        if listener.connected.is_set():
+            return 'realtime'
+        return 'fallback' if listener.closed.is_set() else 'connecting'
+
+    def iter_updates(self, mode: str = LIVE_MODE):
+        """Generar las estadísticas cada vez que el modelo cambia
+
+        Con Supabase Realtime los eventos se aplican en cuanto llegan (y cada
+        REALTIME_RESYNC_INTERVAL se hace un poll incremental de seguridad);
+        si no hay websocket o se pierde la conexión se usa polling incremental
+        con la cadencia de PollScheduler. La suscripción (y cada reintento) se
+        confirma en segundo plano, sin frenar el refresco, y su estado va en
+        stats['updates'] (no se imprime: el layout de rich ya está en pantalla).
+        """
+        # La suscripción avanza mientras se hace la carga completa
+        listener = self._start_realtime() if mode != 'poll' else None
+        status = self.update_status(mode, listener)
+        yield dict(self.sync.poll(), updates=status)
+        last_version = self.sync.version
+        # Un análisis puede quedar detenido sin que cambie ningún dato
+        last_stalled = self.sync.progress.stalled_ids()
+        last_status = status
+        last_resync = time.monotonic()
+
+        while True:
+            if listener and listener.connected.is_set():
+                try:
+                    self.sync.apply_change(listener.events.get(timeout=1))
+                    while not listener.events.empty():
+                        self.sync.apply_change(listener.events.get_nowait())
+                except queue.Empty:
+                    pass
+            else:
+                wait = self.scheduler.wait()
+                if listener and not listener.closed.is_set():
+                    # Se despierta en cuanto la suscripción se confirma o falla
+                    deadline = time.monotonic() + wait
+                    while not (listener.connected.is_set() or listener.closed.is_set()):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        listener.connected.wait(min(1, remaining))
+                else:
+                    time.sleep(wait)
+                if not (listener and listener.connected.is_set()):
+                    self.scheduler.run_due()
+
+            if mode != 'poll' and time.monotonic() - last_resync >= REALTIME_RESYNC_INTERVAL:
+                if listener and listener.connected.is_set():
+                    self.sync.poll()
+                elif listener is None or listener.closed.is_set():
+                    listener = self._start_realtime()
+                last_resync = time.monotonic()
+
+            status = self.update_status(mode, listener)
+            if status == 'realtime' and last_status != 'realtime':
+                # Los cambios anteriores a la suscripción no llegan como eventos
+                self.sync.poll()
+            stalled = self.sync.progress.stalled_ids()
+            if self.sync.version != last_version or stalled != last_stalled or status != last_status:
+                last_version, last_stalled, last_status = self.sync.version, stalled, status
+                yield dict(self.sync.stats(), updates=status)
+
+
+class MultiAssessmentMonitor(LiveMonitor):
+    """Dashboard global de varias instancias (--targets)
+
+    Cada instancia tiene su propio AssessmentMonitor e IncrementalSync; en cada
+    tick se hace el poll incremental de todas en paralelo con un plazo por
+    instancia. Las que no responden a tiempo siguen mostrando sus últimos datos
+    (marcadas en el panel de instancias) y no retrasan el refresco de las demás.
+    """
+
+    def __init__(self, targets, timeout: float = TARGET_TIMEOUT):
+        super().__init__()
+        self.monitors = {target.name: AssessmentMonitor(target.url, target.key or ANON_KEY) for target in targets}
+        self.fanout = FanOut(self.monitors, timeout)
+        self.results = {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas globales consultando todas las instancias en paralelo (las que fallan no suman)
+
+        Usa su propio FanOut: las consultas pendientes y los últimos resultados
+        de `self.fanout` son los del polling incremental del dashboard.
+        """
+        fanout = FanOut(self.monitors, self.fanout.timeout)
+        return merge_live_stats(fanout.values(fanout.run(AssessmentMonitor.get_stats), stale=False))
+
+    def poll(self) -> Dict[str, Any]:
+        """Una ronda de polls en paralelo; estadísticas globales más el estado de cada instancia"""
+        self.results = self.fanout.run(self.poll_target)
+        values = self.fanout.values(self.results)
+        stats = merge_live_stats(values)
+        stats['instances'] = tuple(
+            (name, result.status, not result.ok and name in values,
+             values[name]['total_assessments'] if name in values else None,
+             len(values[name]['active_assessments']) if name in values else None)
+            for name, result in self.results.items()
+        )
+        return stats
+
+    @staticmethod
+    def poll_target(monitor: AssessmentMonitor) -> Dict[str, Any]:
+        """Poll de una instancia; falla si falló alguna petición (el backend silencioso devolvería datos vacíos)
+
+        La primera ronda es la carga completa; después solo se pollean las
+        fuentes a las que les toca según el PollScheduler de la instancia.
+        """
+        errors = monitor.transport.error_count
+        if monitor.sync.ticks:
+            monitor.scheduler.run_due()
+            stats = monitor.sync.stats()
+        else:
+            stats = monitor.sync.poll()
+        if monitor.transport.error_count > errors:
+            raise RuntimeError(f"{monitor.transport.error_count - errors} peticiones fallidas")
+        return stats
+
+    def iter_updates(self, mode: str = LIVE_MODE):
+        """Polling incremental en paralelo (sin Realtime: un websocket por instancia no escala)
+
+        Cada ronda se lanza cuando le toca a la primera fuente de alguna
+        instancia; las demás instancias responden sin consultar.
+        """
+        last_signature = None
+        stalled = {}
+        while True:
+            stats = self.poll()
+            for name, result in self.results.items():
+                # Solo se lee el tracker de las instancias cuyo poll ya terminó
+                if result.ok:
+                    stalled[name] = frozenset(self.monitors[name].sync.progress.stalled_ids())
+            signature = (tuple(monitor.sync.version for monitor in self.monitors.values()),
+                         stats['instances'], tuple(sorted(stalled.items())))
+            if signature != last_signature:
+                last_signature = signature
+                yield stats
+            time.sleep(min(monitor.scheduler.wait() for monitor in self.monitors.values()))
+
+    def estimate(self, assessment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        monitor = self.monitors.get(assessment.get('instance'))
+        return monitor.estimate(assessment) if monitor else None
+
+    def http_stats(self) -> List[str]:
+        return [f"{name}: {monitor.core.format_stats()}; {monitor.scheduler.format_stats()}"
+                for name, monitor in self.monitors.items()]
+
+    def create_instances_table(self, stats: Dict) -> Table:
+        """Crear tabla de estado por instancia"""
+        table = Table(title="🌐 Instancias", show_header=True, header_style="bold magenta")
+        table.add_column("Instancia", style="cyan")
+        table.add_column("Estado")
+        table.add_column("Assessments", justify="right")
+        table.add_column("Activos", justify="right")
+
+        for name, status, stale, total, active in stats.get('instances', ()):
+            label = INSTANCE_STATUS.get(status, status)
+            if stale:
+                label += " [dim](datos previos)[/dim]"
+            table.add_row(name, label, "--" if total is None else str(total), "--" if active is None else str(active))
+
+        return table
+
+
+def format_poll_intervals() -> str:
+    return "Polling adaptativo: " + ", ".join(
+        f"{name} cada {minimum}-{maximum} s" for name, (minimum, maximum) in POLL_INTERVALS.items())
 
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Monitoreo en tiempo real de assessments")
+    parser.add_argument('--mode', choices=['auto', 'realtime', 'poll'], default=LIVE_MODE,
+                        help="Supabase Realtime (push) o polling incremental")
+    parser.add_argument('--targets', metavar='ARCHIVO',
+                        help="JSON con varias instancias (por defecto: variable MONITOR_TARGETS)")
+    parser.add_argument('--timeout', type=float, default=TARGET_TIMEOUT,
+                        help="Plazo por instancia en cada refresco (con varias instancias)")
+    parser.add_argument('--trends', action='store_true',
+                        help=f"Guardar cada actualización en el histórico ({TRENDS_PATH}, ver monitor_trends.py)")
+    args = parser.parse_args()
+
+    trends = TrendStore().open() if args.trends else None
+
+    try:
+        targets = load_targets(args.targets)
+    except (OSError, ValueError) as e:
+        print(f"❌ Targets inválidos: {e}")
+        sys.exit(1)
+    if targets:
+        missing = [target.name for target in targets if not target.url]
+        if missing:
+            print(f"❌ Targets sin 'url': {', '.join(missing)}")
+            sys.exit(1)
+        if args.mode == 'realtime':
+            print("⚠️  Con varias instancias se usa polling incremental")
+        print(f"\n🔍 Monitoreando {len(targets)} instancias (plazo {args.timeout:g} s por instancia)")
+        print(f"⏱️  {format_poll_intervals()}")
+        print("Presiona Ctrl+C para detener\n")
+        monitor = MultiAssessmentMonitor(targets, args.timeout)
+        monitor.trends = trends
+        monitor.monitor_live(args.mode)
+        return
+
     monitor = AssessmentMonitor(SUPABASE_URL, ANON_KEY)
+    monitor.trends = trends
 
     print("\n🔍 Conectando a Supabase...")
     try:
-        response = requests.get(f"{SUPABASE_URL}/rest/v1/", headers=monitor.headers, timeout=5)
-        response.raise_for_status()
+        monitor.transport.get("rest/v1/", timeout=5)
         print("✅ Conexión exitosa")
     except Exception as e:
         print(f"❌ Error de conexión: {e}")
         return
 
-    print(f"\n⏱️  Intervalo de actualización: {REFRESH_INTERVAL} segundos")
+    print(f"\n⏱️  {format_poll_intervals()}")
     print("Presiona Ctrl+C para detener\n")
 
     time.sleep(2)
 
     # Iniciar monitor
-    monitor.monitor_live()
+    monitor.monitor_live(args.mode)
 
 
 if __name__ == "__main__":
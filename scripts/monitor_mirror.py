@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Espejo local (SQLite) de assessments y findings para reportes sin tocar producción
+Uso: python scripts/monitor_mirror.py sync [--source db|rest] [--full] [--watch SEGUNDOS]
+     python scripts/monitor_mirror.py status
+     python scripts/monitor_mirror.py query "SELECT ..." | --file scripts/queries-assessments.sql [--only 3,7]
+
+`sync` copia las tablas la primera vez y después solo trae los deltas;
+los monitores leen el espejo con `--source local`. `query` corre SQL de
+Postgres (por ejemplo queries-assessments.sql) contra el espejo.
+El archivo es --mirror o la variable MONITOR_MIRROR.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from monitor_core import PSYCOPG2_AVAILABLE, format_datetime, open_core
+from monitor_core.backends import TABLES
+from monitor_core.mirror import MIRROR_PATH, MIRROR_TABLES, LocalMirror, SqliteBackend, split_queries
+
+QUERY_ROWS = 20  # filas a mostrar por query
+QUERY_WIDTH = 40  # ancho máximo de cada columna
+UNMIRRORED_TABLES = [table for table in TABLES if table not in MIRROR_TABLES]
+
+
+def open_source(source: str):
+    if source == 'db':
+        from monitor_db import DB_CONFIG
+        return open_core('db', db_config=DB_CONFIG)
+    from monitor_assessments import SUPABASE_URL, ANON_KEY
+    return open_core('rest', SUPABASE_URL, ANON_KEY)
+
+
+def run_sync(mirror: LocalMirror, source: str, full: bool) -> bool:
+    """Una sincronización; False si falló"""
+    try:
+        core = open_source(source)
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}")
+        return False
+    try:
+        results = mirror.sync(core, full)
+    except Exception as e:
+        print(f"❌ Error al sincronizar: {e}")
+        return False
+    finally:
+        core.close()
+
+    for table, result in results.items():
+        icon = "📥" if result['mode'] == 'full' else "🔄"
+        print(f"  {icon} {table:12} {result['mode']:6} {result['received']:>10,} recibidas "
+              f"{result['deleted']:>6,} borradas {result['rows']:>10,} en el espejo  "
+              f"{result['seconds'] * 1000:8.0f} ms")
+    print(f"  📡 {core.format_stats()}")
+    return True
+
+
+def print_status(mirror: LocalMirror):
+    state = mirror.state()
+    print("\n" + "="*80)
+    print(f"🗄️  ESPEJO LOCAL: {mirror.path} ({os.path.getsize(mirror.path) / 1024 / 1024:.1f} MB)")
+    print("="*80 + "\n")
+    for table, column in MIRROR_TABLES.items():
+        entry = state.get(table)
+        if entry is None:
+            print(f"  {table:12} sin sincronizar")
+            continue
+        print(f"  {table:12} {entry['rows']:>10,} filas  {column} hasta {format_datetime(entry['watermark'])}  "
+              f"sincronizado {format_datetime(entry['synced_at'])} desde {entry['source']}")
+    print()
+
+
+def print_result(title: str, columns, rows, elapsed: float, limit: int):
+    print(f"\n{'─'*80}")
+    print(f"📋 {title} ({len(rows)} filas, {elapsed * 1000:.1f} ms)")
+    print(f"{'─'*80}")
+    if not columns:
+        return
+    shown = [[("NULL" if value is None else str(value))[:QUERY_WIDTH] for value in row] for row in rows[:limit]]
+    widths = [max([len(name)] + [len(row[i]) for row in shown]) for i, name in enumerate(columns)]
+    print("  " + "  ".join(name.ljust(width) for name, width in zip(columns, widths)))
+    for row in shown:
+        print("  " + "  ".join(value.ljust(width) for value, width in zip(row, widths)))
+    if len(rows) > limit:
+        print(f"  ... {len(rows) - limit} filas más")
+
+
+def run_queries(backend: SqliteBackend, queries, limit: int) -> bool:
+    """Correr cada query contra el espejo; False si alguna falló"""
+    ok = True
+    for title, sql in queries:
+        started = time.perf_counter()
+        try:
+            columns, rows = backend.run_sql(sql)
+        except sqlite3.Error as e:
+            if str(e).split(': ')[-1] in UNMIRRORED_TABLES:
+                # assessment_data no se espeja: el resto del archivo sigue sirviendo
+                print(f"\n{'─'*80}\n⏭️  {title}: {e} (el espejo tiene {', '.join(MIRROR_TABLES)})")
+            else:
+                ok = False
+                print(f"\n{'─'*80}\n❌ {title}: {e}")
+            continue
+        print_result(title, columns, rows, time.perf_counter() - started, limit)
+    print()
+    return ok
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Espejo local (SQLite) de assessments y findings")
+    parser.add_argument('--mirror', default=MIRROR_PATH, help="Archivo del espejo")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sync = commands.add_parser('sync', help="Copiar o actualizar el espejo")
+    sync.add_argument('--source', choices=['db', 'rest'], default='db')
+    sync.add_argument('--full', action='store_true', help="Volver a copiar las tablas completas")
+    sync.add_argument('--watch', type=float, default=0, metavar='SEGUNDOS',
+                      help="Sincronizar cada SEGUNDOS hasta Ctrl+C")
+
+    commands.add_parser('status', help="Filas y última sincronización de cada tabla")
+
+    query = commands.add_parser('query', help="Correr SQL de Postgres contra el espejo")
+    query.add_argument('sql', nargs='?', help="Query a correr")
+    query.add_argument('--file', help="Archivo .sql con varias queries (p.ej. queries-assessments.sql)")
+    query.add_argument('--only', help="Números de las queries del archivo a correr (p.ej. 3,7)")
+    query.add_argument('--limit', type=int, default=QUERY_ROWS, help="Filas a mostrar por query")
+    args = parser.parse_args()
+
+    if args.command == 'sync':
+        if args.source == 'db' and not PSYCOPG2_AVAILABLE:
+            print("❌ psycopg2 no está instalado: pip install psycopg2-binary")
+            sys.exit(1)
+        mirror = LocalMirror(args.mirror)
+        mirror.open()
+        print(f"\n🗄️  Sincronizando {args.mirror} desde {args.source}")
+        try:
+            ok = run_sync(mirror, args.source, args.full)
+            while args.watch:
+                time.sleep(args.watch)
+                ok = run_sync(mirror, args.source, False)
+        except KeyboardInterrupt:
+            print("\n✅ Sincronización detenida")
+        finally:
+            mirror.close()
+        if not ok:
+            sys.exit(1)
+        return
+
+    if not os.path.exists(args.mirror):
+        print(f"❌ No existe el espejo {args.mirror}: correr antes `monitor_mirror.py sync`")
+        sys.exit(1)
+
+    if args.command == 'status':
+        mirror = LocalMirror(args.mirror)
+        mirror.open()
+        print_status(mirror)
+        mirror.close()
+        return
+
+    if bool(args.sql) == bool(args.file):
+        parser.error("indicar una query o --file")
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            queries = split_queries(f.read())
+        if args.only:
+            numbers = {number.strip() for number in args.only.split(',')}
+            queries = [(title, sql) for title, sql in queries if title.split('.')[0] in numbers]
+    else:
+        queries = [("Query", args.sql)]
+
+    backend = SqliteBackend(args.mirror)
+    backend.connect()
+    try:
+        ok = run_queries(backend, queries, args.limit)
+    finally:
+        backend.close()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
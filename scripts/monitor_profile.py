@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Latencia por categoría del análisis (analyze-assessment / analyze-category)
+Uso: python scripts/monitor_profile.py [--source rest|db|local] [--watch SEGUNDOS] [--json]
+
+Reconstruye inicio y fin de cada categoría en cada assessment a partir de los
+batches de findings (findings.created_at) y, con --watch, de las transiciones
+de analysis_progress.current, y muestra percentiles por category_id ordenados
+de la categoría más lenta a la más rápida.
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import timedelta
+
+from monitor_core import (
+    ASSESSMENT_COLUMNS, PSYCOPG2_AVAILABLE, format_duration, open_core, parse_timestamp
+)
+from monitor_core.profiling import CategoryProfiler
+
+# Modo --watch
+WATCH_INTERVAL = 5  # segundos entre muestras de analysis_progress
+WATERMARK_OVERLAP = 2  # segundos que se vuelven a pedir por transacciones tardías
+
+
+def watch_transitions(core, profiler: CategoryProfiler, seconds: float, interval: float = WATCH_INTERVAL):
+    """Muestrear los assessments activos durante `seconds` registrando cada cambio de `current`"""
+    watermark = None
+    for row in core.active_assessments():
+        profiler.observe(row)
+        updated = parse_timestamp(row.get('updated_at'))
+        if updated and (watermark is None or updated > watermark):
+            watermark = updated
+
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        if watermark is None:
+            core.invalidate()
+            rows = core.active_assessments()
+        else:
+            rows = core.rows_since("assessments", ASSESSMENT_COLUMNS, "updated_at",
+                                   watermark - timedelta(seconds=WATERMARK_OVERLAP))
+        for row in rows:
+            updated = parse_timestamp(row.get('updated_at'))
+            if updated and (watermark is None or updated > watermark):
+                watermark = updated
+            profiler.observe(row)
+
+
+def build_profile(core, include_first: bool = False, watch: float = 0) -> CategoryProfiler:
+    """Cargar assessments y batches de findings (y opcionalmente observar transiciones)"""
+    profiler = CategoryProfiler(include_first)
+    if watch > 0:
+        watch_transitions(core, profiler, watch)
+        # Los batches que se insertaron durante la observación también cuentan
+        core.invalidate()
+
+    for row in core.iter_rows("assessments", ASSESSMENT_COLUMNS):
+        profiler.add_assessment(row)
+    for batch in core.category_batches():
+        profiler.add_batch(batch['assessment_id'], batch['category_id'], batch['finished_at'])
+    return profiler
+
+
+def print_report(rows, limit: int = None):
+    """Imprimir el ranking de categorías"""
+    print("\n" + "="*80)
+    print("⏱️  LATENCIA POR CATEGORÍA (más lenta primero)")
+    print("="*80 + "\n")
+
+    if not rows:
+        print("No hay categorías con inicio y fin reconstruibles.\n")
+        return
+
+    print(f"  {'#':>2}  {'Categoría':22} {'n':>6} {'p50':>9} {'p90':>9} {'p95':>9} {'máx':>9} {'% tiempo':>9}")
+    for i, row in enumerate(rows[:limit], 1):
+        print(f"  {i:>2}  {row['category_id']:22} {row['samples']:>6} "
+              f"{format_duration(row['p50']):>9} {format_duration(row['p90']):>9} "
+              f"{format_duration(row['p95']):>9} {format_duration(row['max']):>9} {row['share']:>8.1f}%")
+    print()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Latencia por categoría del pipeline de análisis")
+    parser.add_argument('--source', choices=['rest', 'db', 'local'], default='rest',
+                        help="local: espejo de monitor_mirror.py (MONITOR_MIRROR)")
+    parser.add_argument('--watch', type=float, default=0, metavar='SEGUNDOS',
+                        help="Observar antes las transiciones de analysis_progress.current de los análisis en curso")
+    parser.add_argument('--include-first', action='store_true',
+                        help="Medir la primera categoría desde created_at (incluye subida y cola)")
+    parser.add_argument('--limit', type=int, default=None, help="Mostrar solo las N categorías más lentas")
+    parser.add_argument('--json', action='store_true', help="Imprimir el reporte como JSON")
+    args = parser.parse_args()
+
+    try:
+        if args.source == 'db':
+            if not PSYCOPG2_AVAILABLE:
+                print("❌ psycopg2 no está instalado: pip install psycopg2-binary")
+                sys.exit(1)
+            from monitor_db import DB_CONFIG
+            core = open_core('db', db_config=DB_CONFIG)
+        elif args.source == 'local':
+            core = open_core('local')
+        else:
+            from monitor_assessments import SUPABASE_URL, ANON_KEY
+            core = open_core('rest', SUPABASE_URL, ANON_KEY)
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}")
+        sys.exit(1)
+
+    if args.watch and not args.json:
+        print(f"👀 Observando transiciones durante {args.watch:g} s...")
+    rows = build_profile(core, args.include_first, args.watch).report()
+
+    if args.json:
+        print(json.dumps(rows[:args.limit], indent=2))
+    else:
+        print_report(rows, args.limit)
+        print(f"📡 {core.format_stats()}\n")
+    core.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Histórico de estados, severidades y progreso de los análisis
+Uso: python scripts/monitor_trends.py record [--source rest|db|local] [--interval SEGUNDOS] [--once]
+     python scripts/monitor_trends.py show [--since 7d] [--series assessments.status] [--resolution auto|raw|1m|1h] [--json]
+     python scripts/monitor_trends.py info
+
+`record` guarda un snapshot cada --interval segundos; los monitores también
+lo hacen con `--trends`. `show` resume las series con la resolución más fina
+que entra en el rango pedido. El archivo es --trends o la variable MONITOR_TRENDS.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from monitor_core import PSYCOPG2_AVAILABLE, open_core
+from monitor_core.trends import RAW_INTERVAL, RESOLUTIONS, TRENDS_PATH, TrendStore, trend_sample
+
+RECORD_INTERVAL = 60  # segundos entre snapshots de `record`
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_WIDTH = 48  # caracteres por sparkline
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+
+def parse_duration(text: str) -> float:
+    """Segundos de una duración como 90s, 30m, 6h, 7d o 2w"""
+    text = text.strip().lower()
+    if text[-1:] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+def format_ts(ts: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(ts))
+
+
+def sparkline(values, width: int = SPARK_WIDTH) -> str:
+    if not values:
+        return ""
+    if len(values) > width:
+        # Promedio por tramo para que entre en el ancho
+        step = len(values) / width
+        values = [sum(chunk) / len(chunk) for chunk in
+                  (values[int(i * step):max(int((i + 1) * step), int(i * step) + 1)] for i in range(width))]
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK_CHARS[0] * len(values)
+    scale = (len(SPARK_CHARS) - 1) / (high - low)
+    return "".join(SPARK_CHARS[int((value - low) * scale)] for value in values)
+
+
+def record_snapshot(core, store: TrendStore) -> bool:
+    core.invalidate()
+    stats = core.live_stats()
+    return store.record(trend_sample(stats['status_counts'], stats['severity_counts'],
+                                     stats['active_assessments']))
+
+
+def run_record(args, store: TrendStore):
+    try:
+        if args.source == 'db':
+            if not PSYCOPG2_AVAILABLE:
+                print("❌ psycopg2 no está instalado: pip install psycopg2-binary")
+                sys.exit(1)
+            from monitor_db import DB_CONFIG
+            core = open_core('db', db_config=DB_CONFIG)
+        elif args.source == 'local':
+            core = open_core('local')
+        else:
+            from monitor_assessments import SUPABASE_URL, ANON_KEY
+            core = open_core('rest', SUPABASE_URL, ANON_KEY)
+    except Exception as e:
+        print(f"❌ Error de conexión: {e}")
+        sys.exit(1)
+
+    print(f"\n📈 Guardando snapshots en {store.path} cada {args.interval:g} s (Ctrl+C para detener)")
+    try:
+        while True:
+            try:
+                saved = record_snapshot(core, store)
+            except Exception as e:
+                print(f"❌ Error al obtener el snapshot: {e}")
+            else:
+                icon = "✅" if saved else "⚠️ "
+                print(f"  {icon} {time.strftime('%H:%M:%S')} {len(store.series)} series"
+                      f"{'' if saved else ' (no guardado)'}  📡 {core.format_stats()}")
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n✅ Registro detenido")
+    finally:
+        core.close()
+
+
+def rate_per_hour(points) -> float:
+    """Cambio por hora entre el primer y el último valor"""
+    if len(points) < 2 or points[-1].ts <= points[0].ts:
+        return 0.0
+    return (points[-1].last - points[0].last) * 3600 / (points[-1].ts - points[0].ts)
+
+
+def print_trends(resolution: str, series, since: float, elapsed: float):
+    print("\n" + "="*80)
+    print(f"📈 TENDENCIAS DESDE {format_ts(since)} (resolución {resolution}, {elapsed * 1000:.1f} ms)")
+    print("="*80 + "\n")
+    width = max(len(name) for name in series)
+    for name, points in series.items():
+        if not points:
+            print(f"  {name:{width}}  sin datos")
+            continue
+        low = min(point.min for point in points)
+        high = max(point.max for point in points)
+        print(f"  {name:{width}}  {sparkline([point.avg for point in points])}  "
+              f"{points[0].last:,.0f} → {points[-1].last:,.0f}  (mín {low:,.0f}, máx {high:,.0f})")
+
+    completed = series.get('assessments.status.completed')
+    findings = series.get('findings.total')
+    if completed or findings:
+        print()
+    if completed:
+        print(f"  ✅ {rate_per_hour(completed):,.1f} assessments completados por hora")
+    if findings:
+        print(f"  🔍 {rate_per_hour(findings):,.1f} findings nuevos por hora")
+    print()
+
+
+def print_info(info):
+    print("\n" + "="*80)
+    print(f"🗄️  HISTÓRICO: {info['path']} ({info['bytes'] / 1024 / 1024:.1f} MB, {info['series']} series)")
+    print("="*80 + "\n")
+    for name, step, retention in RESOLUTIONS:
+        entry = info['resolutions'][name]
+        span = (f"{format_ts(entry['oldest'])} → {format_ts(entry['newest'])}"
+                if entry['points'] else "sin datos")
+        print(f"  {name:4} cada {step:>5} s, retención {retention / 86400:>5.2f} d: "
+              f"{entry['points']:>9,} puntos (tope {entry['max_points']:,})  {span}")
+    print()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Histórico de estados, severidades y progreso de los análisis")
+    parser.add_argument('--trends', default=TRENDS_PATH, help="Archivo del histórico")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="Guardar snapshots periódicamente")
+    record.add_argument('--source', choices=['rest', 'db', 'local'], default='rest',
+                        help="local: espejo de monitor_mirror.py (MONITOR_MIRROR)")
+    record.add_argument('--interval', type=float, default=RECORD_INTERVAL, metavar='SEGUNDOS',
+                        help=f"Segundos entre snapshots (mínimo {RAW_INTERVAL})")
+    record.add_argument('--once', action='store_true', help="Guardar un solo snapshot y salir")
+
+    show = commands.add_parser('show', help="Tendencias de las series guardadas")
+    show.add_argument('--since', default='24h', help="Rango hacia atrás (p.ej. 90m, 6h, 7d)")
+    show.add_argument('--series', help="Prefijos de las series, separados por comas (p.ej. assessments.status)")
+    show.add_argument('--resolution', choices=['auto'] + [name for name, _, _ in RESOLUTIONS], default='auto')
+    show.add_argument('--json', action='store_true', help="Imprimir los puntos como JSON")
+
+    commands.add_parser('info', help="Puntos y retención de cada resolución")
+    args = parser.parse_args()
+
+    if args.command != 'record' and not os.path.exists(args.trends):
+        print(f"❌ No existe el histórico {args.trends}: correr antes `monitor_trends.py record` o un monitor con --trends")
+        sys.exit(1)
+
+    store = TrendStore(args.trends)
+    store.open()
+    try:
+        if args.command == 'record':
+            args.interval = max(args.interval, RAW_INTERVAL)
+            run_record(args, store)
+        elif args.command == 'info':
+            print_info(store.info())
+        else:
+            prefixes = [prefix.strip() for prefix in args.series.split(',')] if args.series else None
+            since = time.time() - parse_duration(args.since)
+            started = time.perf_counter()
+            resolution, series = store.query(prefixes, since, resolution=args.resolution)
+            elapsed = time.perf_counter() - started
+            if args.json:
+                print(json.dumps({'resolution': resolution, 'series': {
+                    name: [point._asdict() for point in points] for name, points in series.items()
+                }}, indent=2))
+            elif not series:
+                print("⚠️  No hay series que coincidan")
+            else:
+                print_trends(resolution, series, since, elapsed)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
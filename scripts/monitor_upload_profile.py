@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Perfil de un upload de assessment antes de que lo procesen las edge functions
+Uso: python scripts/monitor_upload_profile.py ARCHIVO.json [--json]
+     python scripts/monitor_upload_profile.py --storage RUTA [--json]
+     python scripts/monitor_upload_profile.py --assessment ID [--source rest|db] [--json]
+
+Recorre el JSON en streaming (memoria constante, sin JSON.parse del documento)
+y muestra por clave y por categoría los elementos y bytes, los chunks y
+grupos que armaría process-large-file, las llamadas a la IA y los tokens
+estimados, y advertencias de lo que haría fallar o truncar el análisis.
+Sale con código 2 si hay advertencias.
+"""
+
+import argparse
+import json
+import sys
+from urllib.parse import quote
+
+from monitor_core import PSYCOPG2_AVAILABLE, open_core
+from monitor_core.uploads import (
+    CHUNK_BATCH_SIZE, MAX_ITEMS_PER_CHUNK, MemberStats, UploadProfile, profile_stream
+)
+
+STORAGE_BUCKET = "assessment-files"
+READ_BLOCK_SIZE = 1024 * 1024  # bytes por lectura de archivos locales
+
+# Stats de las claves de primer nivel de la última fila de assessment_data, calculadas en el servidor
+MEMBER_STATS_SQL = """
+    SELECT e.key, jsonb_typeof(e.value) AS kind, octet_length(e.value::text) AS size,
+           CASE jsonb_typeof(e.value)
+               WHEN 'array' THEN jsonb_array_length(e.value)
+               WHEN 'object' THEN (SELECT count(*) FROM jsonb_object_keys(e.value))
+               ELSE 0 END AS items,
+           CASE jsonb_typeof(e.value)
+               WHEN 'array' THEN (SELECT max(octet_length(x::text)) FROM jsonb_array_elements(e.value) x)
+               WHEN 'object' THEN (SELECT max(octet_length(to_jsonb(k)::text) + 1 + octet_length(v::text))
+                                   FROM jsonb_each(e.value) AS o(k, v))
+               ELSE 0 END AS max_item_bytes,
+           CASE WHEN jsonb_typeof(e.value) IN ('string', 'number', 'boolean')
+                THEN left(e.value #>> '{}', 200) END AS value,
+           octet_length(d.data::text) AS total_bytes
+    FROM (SELECT data FROM assessment_data WHERE assessment_id = %s
+          ORDER BY received_at DESC LIMIT 1) d,
+         jsonb_each(d.data) e
+"""
+
+
+def read_blocks(path: str, size: int = READ_BLOCK_SIZE):
+    """Bloques de un archivo local ('-' para stdin)"""
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        while True:
+            block = stream.read(size)
+            if not block:
+                return
+            yield block
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def profile_storage(transport, path: str) -> UploadProfile:
+    """Descargar un objeto del bucket en streaming y perfilarlo"""
+    return profile_stream(transport.stream(f"storage/v1/object/{STORAGE_BUCKET}/{quote(path)}"))
+
+
+def profile_assessment_rest(core, assessment_id: str):
+    """(profile, origen) de la última fila de assessment_data, o del archivo de Storage del assessment"""
+    transport = core.backend.transport
+    # [{"data": {...}}]: las claves a perfilar están a profundidad 3
+    profile = profile_stream(transport.stream(
+        f"rest/v1/assessment_data?assessment_id=eq.{quote(assessment_id)}"
+        f"&select=data&order=received_at.desc&limit=1"
+    ), root_depth=3)
+    if profile.members:
+        return profile, "assessment_data"
+    return profile_assessment_file(core, transport, assessment_id)
+
+
+def profile_assessment_file(core, transport, assessment_id: str):
+    rows = core.backend.query("assessments", "file_path", f"&id=eq.{quote(assessment_id)}")
+    file_path = rows[0].get('file_path') if rows else None
+    if not file_path:
+        return None, None
+    return profile_storage(transport, file_path), f"storage:{file_path}"
+
+
+def profile_assessment_db(core, assessment_id: str):
+    """Igual que profile_assessment_rest, pero las stats de assessment_data salen de SQL"""
+    members, total = {}, 0
+    for key, kind, size, items, max_item, value, total in core.backend.iter_query(
+            MEMBER_STATS_SQL, (assessment_id,)):
+        members[key] = MemberStats(key, kind, size, items or 0, max_item or 0, value)
+    if members:
+        return UploadProfile(members, total), "assessment_data"
+    return None, None
+
+
+def _size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size} B"
+
+
+def print_report(profile: UploadProfile, origin: str, limit: int = 15):
+    """Imprimir claves, categorías, chunks, costo y advertencias"""
+    report = profile.to_dict()
+    print("\n" + "="*80)
+    print(f"📦 PERFIL DEL UPLOAD: {origin}")
+    print("="*80)
+    print(f"\n🌐 Dominio: {report['domain'] or '-'}   Tamaño: {_size(report['total_bytes'])}"
+          f"   Claves: {len(report['members'])}\n")
+
+    print("🔑 CLAVES MÁS PESADAS")
+    print("-"*80)
+    print(f"  {'Clave':28} {'Tipo':8} {'Elementos':>10} {'Bytes':>10} {'Máx. elemento':>14}")
+    for member in report['members'][:limit]:
+        print(f"  {member['name'][:28]:28} {member['kind']:8} {member['items']:>10} "
+              f"{_size(member['bytes']):>10} {_size(member['max_item_bytes']):>14}")
+
+    print("\n📂 CATEGORÍAS (analyze-assessment)")
+    print("-"*80)
+    print(f"  {'Categoría':16} {'Claves':>6} {'Elementos':>10} {'Bytes':>10} {'Al prompt':>10}")
+    for row in report['categories']:
+        keys = f"{row['keys']}/{row['keys'] + len(row['missing'])}"
+        prompt = f"{row['prompt_chars']}{'✂️' if row['truncated'] else ''}"
+        print(f"  {row['category_id']:16} {keys:>6} {row['items']:>10} {_size(row['bytes']):>10} {prompt:>10}")
+
+    chunking, cost = report['chunking'], report['cost']
+    print("\n🧩 PROCESS-LARGE-FILE")
+    print("-"*80)
+    print(f"  {chunking['users']} usuarios → {chunking['chunks']} chunks de {MAX_ITEMS_PER_CHUNK} "
+          f"en {chunking['batches']} grupos de {CHUNK_BATCH_SIZE}")
+    print(f"  Chunk medio {_size(chunking['avg_chunk_bytes'])}, máximo {_size(chunking['max_chunk_bytes'])}")
+
+    print("\n💰 COSTO ESTIMADO")
+    print("-"*80)
+    print(f"  analyze-assessment: {cost['analyze_assessment_calls']} llamadas a la IA "
+          f"(hasta {cost['analyze_assessment_max_calls']} con reintentos), "
+          f"~{cost['analyze_assessment_tokens']:,} tokens de datos")
+    print(f"  process-large-file: {cost['large_file_calls']} llamadas a la IA, "
+          f"hasta ~{cost['large_file_tokens']:,} tokens de datos")
+
+    print("\n⚠️  ADVERTENCIAS")
+    print("-"*80)
+    for warning in report['warnings'] or ["Ninguna ✅"]:
+        print(f"  • {warning}")
+    print()
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Perfil en streaming de un upload de assessment")
+    parser.add_argument('file', nargs='?', help="Archivo JSON local ('-' para stdin)")
+    parser.add_argument('--storage', metavar='RUTA', help=f"Objeto del bucket {STORAGE_BUCKET}")
+    parser.add_argument('--assessment', metavar='ID',
+                        help="Última fila de assessment_data del assessment (o su archivo de Storage)")
+    parser.add_argument('--source', choices=['rest', 'db'], default='rest',
+                        help="Origen de --assessment (con db las stats se calculan en el servidor)")
+    parser.add_argument('--limit', type=int, default=15, help="Claves a mostrar")
+    parser.add_argument('--json', action='store_true', help="Imprimir el perfil como JSON")
+    args = parser.parse_args()
+
+    if sum(bool(x) for x in (args.file, args.storage, args.assessment)) != 1:
+        parser.error("indicar uno de: ARCHIVO, --storage o --assessment")
+
+    core = None
+    try:
+        if args.file:
+            profile, origin = profile_stream(read_blocks(args.file)), args.file
+        elif args.source == 'db' and args.assessment:
+            if not PSYCOPG2_AVAILABLE:
+                print("❌ psycopg2 no está instalado: pip install psycopg2-binary")
+                sys.exit(1)
+            from monitor_db import DB_CONFIG
+            core = open_core('db', db_config=DB_CONFIG)
+            profile, origin = profile_assessment_db(core, args.assessment)
+            if profile is None:
+                # El archivo de Storage solo se puede descargar por la API
+                from monitor_assessments import SUPABASE_URL, ANON_KEY
+                rest = open_core('rest', SUPABASE_URL, ANON_KEY)
+                try:
+                    profile, origin = profile_assessment_file(rest, rest.backend.transport, args.assessment)
+                finally:
+                    rest.close()
+        else:
+            from monitor_assessments import SUPABASE_URL, ANON_KEY
+            core = open_core('rest', SUPABASE_URL, ANON_KEY)
+            if args.storage:
+                profile = profile_storage(core.backend.transport, args.storage)
+                origin = f"storage:{args.storage}"
+            else:
+                profile, origin = profile_assessment_rest(core, args.assessment)
+    except Exception as e:
+        print(f"❌ Error al leer el upload: {e}")
+        sys.exit(1)
+    finally:
+        if core:
+            core.close()
+
+    if profile is None:
+        print(f"❌ El assessment {args.assessment} no tiene assessment_data ni archivo en Storage")
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps({'origin': origin, **profile.to_dict()}, indent=2, ensure_ascii=False))
+    else:
+        print_report(profile, origin, args.limit)
+    sys.exit(2 if profile.warnings() else 0)
+
+
+if __name__ == "__main__":
+    main()
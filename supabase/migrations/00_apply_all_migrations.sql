@@ -176,6 +176,376 @@ ALTER TABLE public.assessments
 ADD CONSTRAINT assessments_status_check
 CHECK (status IN ('pending', 'analyzing', 'completed', 'uploaded', 'failed'));
 
+-- ============================================================================
+-- MIGRACIÓN 7: Funciones de agregación para monitoreo
+-- Fecha: 2025-11-19
+-- ============================================================================
+
+-- Aggregate functions used by scripts/monitor_assessments.py so that the
+-- status/severity summaries are computed in Postgres instead of downloading
+-- every row through PostgREST (GET /rest/v1/rpc/<function>)
+CREATE OR REPLACE FUNCTION public.monitor_status_counts()
+RETURNS TABLE (status TEXT, count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT a.status, COUNT(*) AS count
+  FROM public.assessments a
+  GROUP BY a.status
+  ORDER BY count DESC;
+$$;
+
+CREATE OR REPLACE FUNCTION public.monitor_severity_counts()
+RETURNS TABLE (severity TEXT, count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT f.severity, COUNT(*) AS count
+  FROM public.findings f
+  GROUP BY f.severity
+  ORDER BY
+    CASE f.severity
+      WHEN 'critical' THEN 1
+      WHEN 'high' THEN 2
+      WHEN 'medium' THEN 3
+      WHEN 'low' THEN 4
+      WHEN 'info' THEN 5
+    END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.monitor_status_counts() TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.monitor_severity_counts() TO anon, authenticated, service_role;
+
+-- ============================================================================
+-- MIGRACIÓN 8: Notificaciones de cambios para monitoreo
+-- Fecha: 2025-11-20
+-- ============================================================================
+
+-- Change notifications for the event-driven monitors:
+--   * scripts/monitor_db.py --watch listens on the 'monitor_changes' channel
+--   * scripts/monitor_live.py subscribes to Supabase Realtime postgres_changes
+CREATE OR REPLACE FUNCTION public.notify_monitor_change()
+RETURNS TRIGGER AS $$
+DECLARE
+  payload JSONB;
+BEGIN
+  IF TG_TABLE_NAME = 'assessments' THEN
+    payload := jsonb_build_object(
+      'table', TG_TABLE_NAME,
+      'op', TG_OP,
+      'id', COALESCE(NEW.id, OLD.id),
+      'status', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE NEW.status END,
+      'old_status', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE OLD.status END
+    );
+    IF TG_OP <> 'DELETE' THEN
+      payload := payload || jsonb_build_object(
+        'domain', NEW.domain,
+        'created_at', NEW.created_at,
+        'updated_at', NEW.updated_at,
+        'analysis_progress', NEW.analysis_progress
+      );
+    END IF;
+  ELSE
+    payload := jsonb_build_object(
+      'table', TG_TABLE_NAME,
+      'op', TG_OP,
+      'id', COALESCE(NEW.id, OLD.id),
+      'severity', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE NEW.severity END,
+      'old_severity', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE OLD.severity END,
+      'category_id', CASE WHEN TG_OP = 'DELETE' THEN OLD.category_id ELSE NEW.category_id END,
+      'created_at', CASE WHEN TG_OP = 'DELETE' THEN OLD.created_at ELSE NEW.created_at END
+    );
+  END IF;
+
+  -- NOTIFY payloads are limited to 8000 bytes: drop the progress document if needed
+  IF octet_length(payload::text) > 7900 THEN
+    payload := payload - 'analysis_progress';
+  END IF;
+
+  PERFORM pg_notify('monitor_changes', payload::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SET search_path = public;
+
+DROP TRIGGER IF EXISTS notify_assessments_monitor ON public.assessments;
+CREATE TRIGGER notify_assessments_monitor
+  AFTER INSERT OR UPDATE OR DELETE ON public.assessments
+  FOR EACH ROW
+  EXECUTE FUNCTION public.notify_monitor_change();
+
+DROP TRIGGER IF EXISTS notify_findings_monitor ON public.findings;
+CREATE TRIGGER notify_findings_monitor
+  AFTER INSERT OR UPDATE OR DELETE ON public.findings
+  FOR EACH ROW
+  EXECUTE FUNCTION public.notify_monitor_change();
+
+-- Publish both tables to Supabase Realtime (only where the publication exists)
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime') THEN
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'assessments'
+    ) THEN
+      ALTER PUBLICATION supabase_realtime ADD TABLE public.assessments;
+    END IF;
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'findings'
+    ) THEN
+      ALTER PUBLICATION supabase_realtime ADD TABLE public.findings;
+    END IF;
+  END IF;
+END;
+$$;
+
+-- ============================================================================
+-- MIGRACIÓN 9: Rollups de findings por assessment y categoría
+-- Fecha: 2025-11-21
+-- ============================================================================
+
+-- Per-assessment and per-category severity counters for scripts/monitor_db.py --rollups.
+-- They are kept current by statement-level triggers on findings, so the monitor
+-- reads O(#assessments) / O(#categories) rows instead of grouping every finding.
+CREATE TABLE IF NOT EXISTS public.assessment_finding_rollup (
+  assessment_id UUID PRIMARY KEY,
+  total BIGINT NOT NULL DEFAULT 0,
+  critical BIGINT NOT NULL DEFAULT 0,
+  high BIGINT NOT NULL DEFAULT 0,
+  medium BIGINT NOT NULL DEFAULT 0,
+  low BIGINT NOT NULL DEFAULT 0,
+  info BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.category_finding_rollup (
+  category_id TEXT PRIMARY KEY,
+  total BIGINT NOT NULL DEFAULT 0,
+  critical BIGINT NOT NULL DEFAULT 0,
+  high BIGINT NOT NULL DEFAULT 0,
+  medium BIGINT NOT NULL DEFAULT 0,
+  low BIGINT NOT NULL DEFAULT 0,
+  info BIGINT NOT NULL DEFAULT 0,
+  -- Sum of severity scores (critical=5 ... info=1); avg score = severity_score / total
+  severity_score BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.assessment_finding_rollup ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.category_finding_rollup ENABLE ROW LEVEL SECURITY;
+
+-- Read-only through the API; only the trigger functions write
+CREATE POLICY "Allow read on assessment_finding_rollup"
+  ON public.assessment_finding_rollup
+  FOR SELECT
+  USING (true);
+
+CREATE POLICY "Allow read on category_finding_rollup"
+  ON public.category_finding_rollup
+  FOR SELECT
+  USING (true);
+
+-- Apply a signed count of findings for one (assessment, category, severity)
+CREATE OR REPLACE FUNCTION public.rollup_apply_delta(
+  p_assessment_id UUID,
+  p_category_id TEXT,
+  p_severity TEXT,
+  p_count BIGINT
+)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.assessment_finding_rollup AS r
+    (assessment_id, total, critical, high, medium, low, info)
+  VALUES (
+    p_assessment_id,
+    p_count,
+    CASE WHEN p_severity = 'critical' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'high' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'medium' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'low' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'info' THEN p_count ELSE 0 END
+  )
+  ON CONFLICT (assessment_id) DO UPDATE SET
+    total = r.total + EXCLUDED.total,
+    critical = r.critical + EXCLUDED.critical,
+    high = r.high + EXCLUDED.high,
+    medium = r.medium + EXCLUDED.medium,
+    low = r.low + EXCLUDED.low,
+    info = r.info + EXCLUDED.info,
+    updated_at = now();
+
+  -- Deleted assessments (ON DELETE CASCADE) leave their counters at zero
+  DELETE FROM public.assessment_finding_rollup
+  WHERE assessment_id = p_assessment_id AND total <= 0;
+
+  IF p_category_id IS NOT NULL THEN
+    INSERT INTO public.category_finding_rollup AS r
+      (category_id, total, critical, high, medium, low, info, severity_score)
+    VALUES (
+      p_category_id,
+      p_count,
+      CASE WHEN p_severity = 'critical' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'high' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'medium' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'low' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'info' THEN p_count ELSE 0 END,
+      p_count * CASE p_severity
+        WHEN 'critical' THEN 5
+        WHEN 'high' THEN 4
+        WHEN 'medium' THEN 3
+        WHEN 'low' THEN 2
+        WHEN 'info' THEN 1
+        ELSE 0
+      END
+    )
+    ON CONFLICT (category_id) DO UPDATE SET
+      total = r.total + EXCLUDED.total,
+      critical = r.critical + EXCLUDED.critical,
+      high = r.high + EXCLUDED.high,
+      medium = r.medium + EXCLUDED.medium,
+      low = r.low + EXCLUDED.low,
+      info = r.info + EXCLUDED.info,
+      severity_score = r.severity_score + EXCLUDED.severity_score,
+      updated_at = now();
+
+    DELETE FROM public.category_finding_rollup
+    WHERE category_id = p_category_id AND total <= 0;
+  END IF;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Statement-level trigger: one delta per (assessment, category, severity) group,
+-- so a batch insert of findings touches each counter row once
+CREATE OR REPLACE FUNCTION public.rollup_findings_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.rollup_apply_delta(assessment_id, category_id, severity, COUNT(*))
+    FROM new_rows
+    GROUP BY assessment_id, category_id, severity;
+  END IF;
+
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    PERFORM public.rollup_apply_delta(assessment_id, category_id, severity, -COUNT(*))
+    FROM old_rows
+    GROUP BY assessment_id, category_id, severity;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Transition tables require one trigger per event
+DROP TRIGGER IF EXISTS rollup_findings_insert ON public.findings;
+CREATE TRIGGER rollup_findings_insert
+  AFTER INSERT ON public.findings
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_findings_change();
+
+DROP TRIGGER IF EXISTS rollup_findings_update ON public.findings;
+CREATE TRIGGER rollup_findings_update
+  AFTER UPDATE ON public.findings
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_findings_change();
+
+DROP TRIGGER IF EXISTS rollup_findings_delete ON public.findings;
+CREATE TRIGGER rollup_findings_delete
+  AFTER DELETE ON public.findings
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_findings_change();
+
+-- Rebuild both rollups from the raw findings (initial backfill and drift repair)
+CREATE OR REPLACE FUNCTION public.refresh_finding_rollups()
+RETURNS VOID AS $$
+BEGIN
+  -- Block concurrent writes to findings while the counters are rebuilt
+  LOCK TABLE public.findings IN SHARE ROW EXCLUSIVE MODE;
+
+  DELETE FROM public.assessment_finding_rollup;
+  INSERT INTO public.assessment_finding_rollup
+    (assessment_id, total, critical, high, medium, low, info)
+  SELECT
+    assessment_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE severity = 'critical'),
+    COUNT(*) FILTER (WHERE severity = 'high'),
+    COUNT(*) FILTER (WHERE severity = 'medium'),
+    COUNT(*) FILTER (WHERE severity = 'low'),
+    COUNT(*) FILTER (WHERE severity = 'info')
+  FROM public.findings
+  GROUP BY assessment_id;
+
+  DELETE FROM public.category_finding_rollup;
+  INSERT INTO public.category_finding_rollup
+    (category_id, total, critical, high, medium, low, info, severity_score)
+  SELECT
+    category_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE severity = 'critical'),
+    COUNT(*) FILTER (WHERE severity = 'high'),
+    COUNT(*) FILTER (WHERE severity = 'medium'),
+    COUNT(*) FILTER (WHERE severity = 'low'),
+    COUNT(*) FILTER (WHERE severity = 'info'),
+    SUM(CASE severity
+      WHEN 'critical' THEN 5
+      WHEN 'high' THEN 4
+      WHEN 'medium' THEN 3
+      WHEN 'low' THEN 2
+      WHEN 'info' THEN 1
+      ELSE 0
+    END)
+  FROM public.findings
+  WHERE category_id IS NOT NULL
+  GROUP BY category_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The counters are written only by the triggers (SECURITY DEFINER, run as the
+-- owner) and rebuilt by the owner; PostgREST would otherwise expose these
+-- functions to anon through /rpc
+REVOKE EXECUTE ON FUNCTION public.rollup_apply_delta(UUID, TEXT, TEXT, BIGINT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rollup_findings_change() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.refresh_finding_rollups() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rollup_apply_delta(UUID, TEXT, TEXT, BIGINT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.rollup_findings_change() TO service_role;
+GRANT EXECUTE ON FUNCTION public.refresh_finding_rollups() TO service_role;
+
+SELECT public.refresh_finding_rollups();
+
+-- ============================================================================
+-- MIGRACIÓN 10: Índices para las queries del monitor
+-- Fecha: 2025-11-22
+-- ============================================================================
+
+-- Indexes for the queries in scripts/monitor_db.py (checked by scripts/check_query_plans.py).
+
+-- Active assessments: WHERE status IN (...) ORDER BY created_at DESC.
+-- Partial, so it only holds the handful of rows still in progress.
+CREATE INDEX IF NOT EXISTS idx_assessments_active_created_at
+  ON public.assessments(created_at DESC)
+  WHERE status IN ('analyzing', 'pending', 'uploaded');
+
+-- Latest findings: ORDER BY created_at DESC LIMIT n
+CREATE INDEX IF NOT EXISTS idx_findings_created_at
+  ON public.findings(created_at DESC);
+
+-- Per-assessment severity counts (index-only scan per assessment)
+CREATE INDEX IF NOT EXISTS idx_findings_assessment_severity
+  ON public.findings(assessment_id, severity);
+-- Its leading column covers every WHERE assessment_id = ... lookup (and the
+-- assessment_id foreign key), so the single-column index is dropped to keep
+-- one index less to maintain on each findings insert.
+DROP INDEX IF EXISTS public.idx_findings_assessment_id;
+
+-- Category analysis: GROUP BY category_id over severity (index-only scan)
+CREATE INDEX IF NOT EXISTS idx_findings_category_severity
+  ON public.findings(category_id, severity);
+
 -- ============================================================================
 -- FIN DE MIGRACIONES
 -- ============================================================================
@@ -0,0 +1,36 @@
+-- Aggregate functions used by scripts/monitor_assessments.py so that the
+-- status/severity summaries are computed in Postgres instead of downloading
+-- every row through PostgREST (GET /rest/v1/rpc/<function>)
+CREATE OR REPLACE FUNCTION public.monitor_status_counts()
+RETURNS TABLE (status TEXT, count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT a.status, COUNT(*) AS count
+  FROM public.assessments a
+  GROUP BY a.status
+  ORDER BY count DESC;
+$$;
+
+CREATE OR REPLACE FUNCTION public.monitor_severity_counts()
+RETURNS TABLE (severity TEXT, count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+  SELECT f.severity, COUNT(*) AS count
+  FROM public.findings f
+  GROUP BY f.severity
+  ORDER BY
+    CASE f.severity
+      WHEN 'critical' THEN 1
+      WHEN 'high' THEN 2
+      WHEN 'medium' THEN 3
+      WHEN 'low' THEN 4
+      WHEN 'info' THEN 5
+    END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.monitor_status_counts() TO anon, authenticated, service_role;
+GRANT EXECUTE ON FUNCTION public.monitor_severity_counts() TO anon, authenticated, service_role;
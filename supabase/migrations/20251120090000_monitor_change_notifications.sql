@@ -0,0 +1,77 @@
+-- Change notifications for the event-driven monitors:
+--   * scripts/monitor_db.py --watch listens on the 'monitor_changes' channel
+--   * scripts/monitor_live.py subscribes to Supabase Realtime postgres_changes
+CREATE OR REPLACE FUNCTION public.notify_monitor_change()
+RETURNS TRIGGER AS $$
+DECLARE
+  payload JSONB;
+BEGIN
+  IF TG_TABLE_NAME = 'assessments' THEN
+    payload := jsonb_build_object(
+      'table', TG_TABLE_NAME,
+      'op', TG_OP,
+      'id', COALESCE(NEW.id, OLD.id),
+      'status', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE NEW.status END,
+      'old_status', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE OLD.status END
+    );
+    IF TG_OP <> 'DELETE' THEN
+      payload := payload || jsonb_build_object(
+        'domain', NEW.domain,
+        'created_at', NEW.created_at,
+        'updated_at', NEW.updated_at,
+        'analysis_progress', NEW.analysis_progress
+      );
+    END IF;
+  ELSE
+    payload := jsonb_build_object(
+      'table', TG_TABLE_NAME,
+      'op', TG_OP,
+      'id', COALESCE(NEW.id, OLD.id),
+      'severity', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE NEW.severity END,
+      'old_severity', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE OLD.severity END,
+      'category_id', CASE WHEN TG_OP = 'DELETE' THEN OLD.category_id ELSE NEW.category_id END,
+      'created_at', CASE WHEN TG_OP = 'DELETE' THEN OLD.created_at ELSE NEW.created_at END
+    );
+  END IF;
+
+  -- NOTIFY payloads are limited to 8000 bytes: drop the progress document if needed
+  IF octet_length(payload::text) > 7900 THEN
+    payload := payload - 'analysis_progress';
+  END IF;
+
+  PERFORM pg_notify('monitor_changes', payload::text);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SET search_path = public;
+
+DROP TRIGGER IF EXISTS notify_assessments_monitor ON public.assessments;
+CREATE TRIGGER notify_assessments_monitor
+  AFTER INSERT OR UPDATE OR DELETE ON public.assessments
+  FOR EACH ROW
+  EXECUTE FUNCTION public.notify_monitor_change();
+
+DROP TRIGGER IF EXISTS notify_findings_monitor ON public.findings;
+CREATE TRIGGER notify_findings_monitor
+  AFTER INSERT OR UPDATE OR DELETE ON public.findings
+  FOR EACH ROW
+  EXECUTE FUNCTION public.notify_monitor_change();
+
+-- Publish both tables to Supabase Realtime (only where the publication exists)
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_publication WHERE pubname = 'supabase_realtime') THEN
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'assessments'
+    ) THEN
+      ALTER PUBLICATION supabase_realtime ADD TABLE public.assessments;
+    END IF;
+    IF NOT EXISTS (
+      SELECT 1 FROM pg_publication_tables
+      WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'findings'
+    ) THEN
+      ALTER PUBLICATION supabase_realtime ADD TABLE public.findings;
+    END IF;
+  END IF;
+END;
+$$;
@@ -0,0 +1,210 @@
+-- Per-assessment and per-category severity counters for scripts/monitor_db.py --rollups.
+-- They are kept current by statement-level triggers on findings, so the monitor
+-- reads O(#assessments) / O(#categories) rows instead of grouping every finding.
+CREATE TABLE IF NOT EXISTS public.assessment_finding_rollup (
+  assessment_id UUID PRIMARY KEY,
+  total BIGINT NOT NULL DEFAULT 0,
+  critical BIGINT NOT NULL DEFAULT 0,
+  high BIGINT NOT NULL DEFAULT 0,
+  medium BIGINT NOT NULL DEFAULT 0,
+  low BIGINT NOT NULL DEFAULT 0,
+  info BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS public.category_finding_rollup (
+  category_id TEXT PRIMARY KEY,
+  total BIGINT NOT NULL DEFAULT 0,
+  critical BIGINT NOT NULL DEFAULT 0,
+  high BIGINT NOT NULL DEFAULT 0,
+  medium BIGINT NOT NULL DEFAULT 0,
+  low BIGINT NOT NULL DEFAULT 0,
+  info BIGINT NOT NULL DEFAULT 0,
+  -- Sum of severity scores (critical=5 ... info=1); avg score = severity_score / total
+  severity_score BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+ALTER TABLE public.assessment_finding_rollup ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.category_finding_rollup ENABLE ROW LEVEL SECURITY;
+
+-- Read-only through the API; only the trigger functions write
+CREATE POLICY "Allow read on assessment_finding_rollup"
+  ON public.assessment_finding_rollup
+  FOR SELECT
+  USING (true);
+
+CREATE POLICY "Allow read on category_finding_rollup"
+  ON public.category_finding_rollup
+  FOR SELECT
+  USING (true);
+
+-- Apply a signed count of findings for one (assessment, category, severity)
+CREATE OR REPLACE FUNCTION public.rollup_apply_delta(
+  p_assessment_id UUID,
+  p_category_id TEXT,
+  p_severity TEXT,
+  p_count BIGINT
+)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.assessment_finding_rollup AS r
+    (assessment_id, total, critical, high, medium, low, info)
+  VALUES (
+    p_assessment_id,
+    p_count,
+    CASE WHEN p_severity = 'critical' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'high' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'medium' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'low' THEN p_count ELSE 0 END,
+    CASE WHEN p_severity = 'info' THEN p_count ELSE 0 END
+  )
+  ON CONFLICT (assessment_id) DO UPDATE SET
+    total = r.total + EXCLUDED.total,
+    critical = r.critical + EXCLUDED.critical,
+    high = r.high + EXCLUDED.high,
+    medium = r.medium + EXCLUDED.medium,
+    low = r.low + EXCLUDED.low,
+    info = r.info + EXCLUDED.info,
+    updated_at = now();
+
+  -- Deleted assessments (ON DELETE CASCADE) leave their counters at zero
+  DELETE FROM public.assessment_finding_rollup
+  WHERE assessment_id = p_assessment_id AND total <= 0;
+
+  IF p_category_id IS NOT NULL THEN
+    INSERT INTO public.category_finding_rollup AS r
+      (category_id, total, critical, high, medium, low, info, severity_score)
+    VALUES (
+      p_category_id,
+      p_count,
+      CASE WHEN p_severity = 'critical' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'high' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'medium' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'low' THEN p_count ELSE 0 END,
+      CASE WHEN p_severity = 'info' THEN p_count ELSE 0 END,
+      p_count * CASE p_severity
+        WHEN 'critical' THEN 5
+        WHEN 'high' THEN 4
+        WHEN 'medium' THEN 3
+        WHEN 'low' THEN 2
+        WHEN 'info' THEN 1
+        ELSE 0
+      END
+    )
+    ON CONFLICT (category_id) DO UPDATE SET
+      total = r.total + EXCLUDED.total,
+      critical = r.critical + EXCLUDED.critical,
+      high = r.high + EXCLUDED.high,
+      medium = r.medium + EXCLUDED.medium,
+      low = r.low + EXCLUDED.low,
+      info = r.info + EXCLUDED.info,
+      severity_score = r.severity_score + EXCLUDED.severity_score,
+      updated_at = now();
+
+    DELETE FROM public.category_finding_rollup
+    WHERE category_id = p_category_id AND total <= 0;
+  END IF;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Statement-level trigger: one delta per (assessment, category, severity) group,
+-- so a batch insert of findings touches each counter row once
+CREATE OR REPLACE FUNCTION public.rollup_findings_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.rollup_apply_delta(assessment_id, category_id, severity, COUNT(*))
+    FROM new_rows
+    GROUP BY assessment_id, category_id, severity;
+  END IF;
+
+  IF TG_OP IN ('DELETE', 'UPDATE') THEN
+    PERFORM public.rollup_apply_delta(assessment_id, category_id, severity, -COUNT(*))
+    FROM old_rows
+    GROUP BY assessment_id, category_id, severity;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Transition tables require one trigger per event
+DROP TRIGGER IF EXISTS rollup_findings_insert ON public.findings;
+CREATE TRIGGER rollup_findings_insert
+  AFTER INSERT ON public.findings
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_findings_change();
+
+DROP TRIGGER IF EXISTS rollup_findings_update ON public.findings;
+CREATE TRIGGER rollup_findings_update
+  AFTER UPDATE ON public.findings
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_findings_change();
+
+DROP TRIGGER IF EXISTS rollup_findings_delete ON public.findings;
+CREATE TRIGGER rollup_findings_delete
+  AFTER DELETE ON public.findings
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.rollup_findings_change();
+
+-- Rebuild both rollups from the raw findings (initial backfill and drift repair)
+CREATE OR REPLACE FUNCTION public.refresh_finding_rollups()
+RETURNS VOID AS $$
+BEGIN
+  -- Block concurrent writes to findings while the counters are rebuilt
+  LOCK TABLE public.findings IN SHARE ROW EXCLUSIVE MODE;
+
+  DELETE FROM public.assessment_finding_rollup;
+  INSERT INTO public.assessment_finding_rollup
+    (assessment_id, total, critical, high, medium, low, info)
+  SELECT
+    assessment_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE severity = 'critical'),
+    COUNT(*) FILTER (WHERE severity = 'high'),
+    COUNT(*) FILTER (WHERE severity = 'medium'),
+    COUNT(*) FILTER (WHERE severity = 'low'),
+    COUNT(*) FILTER (WHERE severity = 'info')
+  FROM public.findings
+  GROUP BY assessment_id;
+
+  DELETE FROM public.category_finding_rollup;
+  INSERT INTO public.category_finding_rollup
+    (category_id, total, critical, high, medium, low, info, severity_score)
+  SELECT
+    category_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE severity = 'critical'),
+    COUNT(*) FILTER (WHERE severity = 'high'),
+    COUNT(*) FILTER (WHERE severity = 'medium'),
+    COUNT(*) FILTER (WHERE severity = 'low'),
+    COUNT(*) FILTER (WHERE severity = 'info'),
+    SUM(CASE severity
+      WHEN 'critical' THEN 5
+      WHEN 'high' THEN 4
+      WHEN 'medium' THEN 3
+      WHEN 'low' THEN 2
+      WHEN 'info' THEN 1
+      ELSE 0
+    END)
+  FROM public.findings
+  WHERE category_id IS NOT NULL
+  GROUP BY category_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- The counters are written only by the triggers (SECURITY DEFINER, run as the
+-- owner) and rebuilt by the owner; PostgREST would otherwise expose these
+-- functions to anon through /rpc
+REVOKE EXECUTE ON FUNCTION public.rollup_apply_delta(UUID, TEXT, TEXT, BIGINT) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.rollup_findings_change() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.refresh_finding_rollups() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.rollup_apply_delta(UUID, TEXT, TEXT, BIGINT) TO service_role;
+GRANT EXECUTE ON FUNCTION public.rollup_findings_change() TO service_role;
+GRANT EXECUTE ON FUNCTION public.refresh_finding_rollups() TO service_role;
+
+SELECT public.refresh_finding_rollups();
@@ -0,0 +1,23 @@
+-- Indexes for the queries in scripts/monitor_db.py (checked by scripts/check_query_plans.py).
+
+-- Active assessments: WHERE status IN (...) ORDER BY created_at DESC.
+-- Partial, so it only holds the handful of rows still in progress.
+CREATE INDEX IF NOT EXISTS idx_assessments_active_created_at
+  ON public.assessments(created_at DESC)
+  WHERE status IN ('analyzing', 'pending', 'uploaded');
+
+-- Latest findings: ORDER BY created_at DESC LIMIT n
+CREATE INDEX IF NOT EXISTS idx_findings_created_at
+  ON public.findings(created_at DESC);
+
+-- Per-assessment severity counts (index-only scan per assessment)
+CREATE INDEX IF NOT EXISTS idx_findings_assessment_severity
+  ON public.findings(assessment_id, severity);
+-- Its leading column covers every WHERE assessment_id = ... lookup (and the
+-- assessment_id foreign key), so the single-column index is dropped to keep
+-- one index less to maintain on each findings insert.
+DROP INDEX IF EXISTS public.idx_findings_assessment_id;
+
+-- Category analysis: GROUP BY category_id over severity (index-only scan)
+CREATE INDEX IF NOT EXISTS idx_findings_category_severity
+  ON public.findings(category_id, severity);